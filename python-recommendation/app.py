@@ -1,19 +1,12 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import pymongo
-import numpy as np
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import NMF
-from sklearn.feature_extraction.text import TfidfVectorizer
 import base64
+import hashlib
 import io
 import os
 from dotenv import load_dotenv
 import json
 from datetime import datetime
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 import time
 import psutil
 import math
@@ -21,38 +14,61 @@ import pickle
 import os
 import re
 import sys
+import threading
 import types
-from main import analyze_submission as analyze_recommendation_submission
-from main import RECOMMENDER_BUNDLE as MAIN_RECOMMENDER_BUNDLE
-from main import SOLUTIONS_DF as MAIN_SOLUTIONS_DF
-from main import USER_RATINGS_DF as MAIN_USER_RATINGS_DF
-from main import SOLUTION_SIMILARITY_DF as MAIN_SOLUTION_SIMILARITY_DF
-from main import USER_SIMILARITY_DF as MAIN_USER_SIMILARITY_DF
-from main import PARAMS as MAIN_PARAMS
-from main import T_OPT as MAIN_T_OPT
-from main import M_OPT as MAIN_M_OPT
-from main import ALPHA as MAIN_ALPHA
-from main import BETA as MAIN_BETA
-from main import W_TIME as MAIN_W_TIME
-from main import W_SPACE as MAIN_W_SPACE
-from main import MODEL_LOAD_ERROR as MAIN_MODEL_LOAD_ERROR
-from main import get_bundle_metadata as get_recommendation_bundle_metadata
-from main import get_model_status as get_recommendation_model_status
-
-try:
-    import face_recognition
-except Exception:
-    face_recognition = None
-
-try:
-    import cv2
-except Exception:
-    cv2 = None
-
-try:
-    from PIL import Image
-except Exception:
-    Image = None
+from collections import OrderedDict
+from startup_profile import startup_profile
+
+with startup_profile.measure('web framework'):
+    from flask import Flask, request, jsonify, g, has_request_context
+    from flask_cors import CORS
+    import pymongo
+    from bson import ObjectId
+
+with startup_profile.measure('numpy/pandas'):
+    import numpy as np
+    import pandas as pd
+
+with startup_profile.measure('recommender bundle'):
+    from main import analyze_submission as analyze_recommendation_submission
+    from main import analyze_submissions as analyze_recommendation_submissions
+    from main import RECOMMENDER_BUNDLE as MAIN_RECOMMENDER_BUNDLE
+    from main import SOLUTIONS_DF as MAIN_SOLUTIONS_DF
+    from main import USER_RATINGS_DF as MAIN_USER_RATINGS_DF
+    from main import SOLUTION_SIMILARITY_DF as MAIN_SOLUTION_SIMILARITY_DF
+    from main import USER_SIMILARITY_DF as MAIN_USER_SIMILARITY_DF
+    from main import PARAMS as MAIN_PARAMS
+    from main import T_OPT as MAIN_T_OPT
+    from main import M_OPT as MAIN_M_OPT
+    from main import ALPHA as MAIN_ALPHA
+    from main import BETA as MAIN_BETA
+    from main import W_TIME as MAIN_W_TIME
+    from main import W_SPACE as MAIN_W_SPACE
+    from main import MODEL_LOAD_ERROR as MAIN_MODEL_LOAD_ERROR
+    from main import get_bundle_metadata as get_recommendation_bundle_metadata
+    from main import get_bundle_version as get_recommendation_bundle_version
+    from main import get_model_status as get_recommendation_model_status
+    from main import get_topic_label_stats as get_recommendation_topic_label_stats
+    from main import get_similarity_neighbor_stats as get_recommendation_similarity_neighbor_stats
+    from main import get_solution_partition_stats as get_recommendation_solution_partition_stats
+    from main import get_student_rating_stats as get_recommendation_student_rating_stats
+    from neighbor_index import create_neighbor_index
+    import recommender_utils
+    from face_index import FaceEncodingIndex
+    import face_inference
+    from face_inference import FaceInferenceBusy, FaceInferencePool
+    import proctoring
+    from proctoring import ProctoringSessionStore
+
+# scikit-learn is imported by the first request that needs it; dlib only by the face inference workers, and
+# OpenCV by those workers and by the first proctoring frame (for its 1/8-scale thumbnail).
+if TYPE_CHECKING:
+    from sklearn.decomposition import NMF
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def load_sklearn(module_name: str) -> Any:
+    return startup_profile.lazy_import(module_name, 'scikit-learn', required=True)
 
 # Recommendation bundle is loaded centrally in main.py for the live submission flow.
 recommender_bundle = MAIN_RECOMMENDER_BUNDLE
@@ -618,94 +634,529 @@ try:
 except Exception as e:
     logger.error(f"MongoDB connection error: {e}")
 
+class ExamMetadataLoader:
+    """Batch exam lookups with a shared TTL/LRU cache of exam subject and title"""
+
+    PROJECTION = {'subject': 1, 'title': 1}
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'round_trips': 0}
+
+    def _get_cached(self, exam_id: Any, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(exam_id)
+        if entry is None:
+            return None
+        expires_at, exam = entry
+        if expires_at < now:
+            del self._cache[exam_id]
+            return None
+        self._cache.move_to_end(exam_id)
+        return exam
+
+    def _store(self, exam_id: Any, exam: Dict[str, Any], now: float):
+        self._cache[exam_id] = (now + self.ttl_seconds, exam)
+        self._cache.move_to_end(exam_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _lookup_cached(self, exam_ids: List[Any]) -> tuple:
+        exams: Dict[Any, Dict[str, Any]] = {}
+        missing = []
+        now = time.monotonic()
+
+        with self._lock:
+            for exam_id in dict.fromkeys(exam_ids):
+                cached = self._get_cached(exam_id, now)
+                if cached is not None:
+                    exams[exam_id] = cached
+                    self.stats['hits'] += 1
+                else:
+                    missing.append(exam_id)
+                    self.stats['misses'] += 1
+        return exams, missing
+
+    def _store_fetched(self, exams: Dict[Any, Dict[str, Any]], fetched: List[Dict[str, Any]]):
+        now = time.monotonic()
+        with self._lock:
+            self.stats['round_trips'] += 1
+            for exam in fetched:
+                self._store(exam['_id'], exam, now)
+                exams[exam['_id']] = exam
+
+    def load(self, exam_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Resolve exam ids to {_id, subject, title} using at most one $in query"""
+        exams, missing = self._lookup_cached(exam_ids)
+        record_exam_round_trips(0)
+        if missing and db is not None:
+            fetched = list(db.exams.find({'_id': {'$in': missing}}, self.PROJECTION))
+            record_exam_round_trips(1)
+            self._store_fetched(exams, fetched)
+        return exams
+
+    async def load_async(self, exam_ids: List[Any], async_db: Any) -> Dict[Any, Dict[str, Any]]:
+        """load() against an async (Motor) database, sharing the same cache"""
+        exams, missing = self._lookup_cached(exam_ids)
+        if missing and async_db is not None:
+            fetched = await async_db.exams.find({'_id': {'$in': missing}}, self.PROJECTION).to_list(length=None)
+            self._store_fetched(exams, fetched)
+        return exams
+
+    def populate(self, exam_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace each result's exam id with its cached exam metadata"""
+        exams = self.load([result['exam'] for result in exam_results if 'exam' in result])
+        for result in exam_results:
+            exam = exams.get(result.get('exam'))
+            if exam:
+                result['exam'] = exam
+        return exam_results
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'cached_exams': len(self._cache)}
+
+
+def record_exam_round_trips(count: int):
+    if has_request_context():
+        g.exam_lookup_round_trips = g.get('exam_lookup_round_trips', 0) + count
+
+
+exam_metadata_loader = ExamMetadataLoader(
+    ttl_seconds=float(os.getenv('EXAM_METADATA_CACHE_TTL_SECONDS', 300)),
+    max_entries=int(os.getenv('EXAM_METADATA_CACHE_SIZE', 5000)),
+)
+
+
+@app.after_request
+def report_exam_lookup_round_trips(response):
+    round_trips = g.get('exam_lookup_round_trips')
+    if round_trips is not None:
+        response.headers['X-Exam-Lookup-Round-Trips'] = str(round_trips)
+        logger.info(f"{request.path} resolved exam metadata in {round_trips} database round trip(s)")
+    return response
+
+
+class RecommendationResultCache:
+    """TTL/LRU cache of /recommend results keyed by a canonical payload hash and the bundle version"""
+
+    # Only these fields are read by main.analyze_submission; anything else (exam title, code,
+    # timestamps) must not split the cache. A missing field and an explicit null read the same.
+    # Nested values such as a question's complexity estimate are hashed whole, with sorted keys.
+    PAYLOAD_FIELDS = ('studentId', 'subject', 'percentage')
+    QUESTION_FIELDS = (
+        'sectionIndex', 'questionIndex', 'language', 'totalCount', 'passedCount', 'visibleTotalCount',
+        'visiblePassedCount', 'hiddenTotalCount', 'hiddenPassedCount', 'errors', 'averageExecutionTimeMs',
+        'maxMemoryKb', 'complexity', 'expectedTimeComplexity', 'expectedSpaceComplexity',
+    )
+    HISTORY_FIELDS = ('subject', 'percentage')
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._bundle_version = None
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'uncacheable': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0 and self.max_bytes > 0
+
+    def make_key(self, payload: Any) -> Optional[str]:
+        """Canonical hash of the output-affecting payload fields, or None when the payload is not cacheable"""
+        if not self.enabled or not isinstance(payload, dict):
+            return None
+        try:
+            canonical = {field: payload.get(field) for field in self.PAYLOAD_FIELDS}
+            canonical['codingQuestions'] = [
+                {field: question.get(field) for field in self.QUESTION_FIELDS}
+                for question in (payload.get('codingQuestions') or [])
+            ]
+            canonical['studentHistory'] = [
+                {field: item.get(field) for field in self.HISTORY_FIELDS}
+                for item in (payload.get('studentHistory') or [])
+            ]
+            encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), allow_nan=False)
+        except (AttributeError, TypeError, ValueError):
+            return None
+        return hashlib.sha256(f"{get_recommendation_bundle_version()}\n{encoded}".encode('utf-8')).hexdigest()
+
+    def _check_bundle_version(self):
+        version = get_recommendation_bundle_version()
+        if version != self._bundle_version:
+            if self._bundle_version is not None:
+                self._clear()
+            self._bundle_version = version
+
+    def _clear(self):
+        if self._cache:
+            self.stats['invalidations'] += 1
+        self._cache.clear()
+        self._bytes = 0
+
+    def _evict(self, key: str):
+        _expires_at, encoded = self._cache.pop(key)
+        self._bytes -= len(encoded)
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            with self._lock:
+                self.stats['uncacheable'] += 1
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            self._check_bundle_version()
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] < now:
+                self._evict(key)
+                self.stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._cache.move_to_end(key)
+            self.stats['hits'] += 1
+        # Stored serialized so callers can never mutate a cached result.
+        return json.loads(entry[1])
+
+    def put(self, key: Optional[str], recommendation: Dict[str, Any]):
+        if key is None:
+            return
+        encoded = json.dumps(recommendation, separators=(',', ':'))
+        if len(encoded) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_bundle_version()
+            if key in self._cache:
+                self._evict(key)
+            self._cache[key] = (time.monotonic() + self.ttl_seconds, encoded)
+            self._bytes += len(encoded)
+            while len(self._cache) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(next(iter(self._cache)))
+                self.stats['evictions'] += 1
+
+    def invalidate(self):
+        """Drop every cached result, e.g. after the model bundle is replaced"""
+        with self._lock:
+            self._clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'enabled': self.enabled,
+                'cached_results': len(self._cache),
+                'cached_bytes': self._bytes,
+                'bundle_version': self._bundle_version,
+            }
+
+
+recommendation_cache = RecommendationResultCache(
+    ttl_seconds=float(os.getenv('RECOMMEND_CACHE_TTL_SECONDS', 600)),
+    max_entries=int(os.getenv('RECOMMEND_CACHE_SIZE', 10000)),
+    max_bytes=int(float(os.getenv('RECOMMEND_CACHE_MAX_MB', 64)) * 1024 * 1024),
+)
+
+
 class CollaborativeFiltering:
-    def __init__(self):
+    # Above this many touched cells a delta is cheaper to apply as a full rebuild.
+    BULK_REBUILD_THRESHOLD = 1000
+    SIMILARITY_MODES = ('auto', 'full', 'row')
+
+    def __init__(self, similarity_mode: str = 'auto', full_similarity_max_users: int = 2000, neighbor_index: str = 'none'):
+        if similarity_mode not in self.SIMILARITY_MODES:
+            raise ValueError(f"similarity_mode must be one of {self.SIMILARITY_MODES}")
+        self.similarity_mode = similarity_mode
+        self.full_similarity_max_users = full_similarity_max_users
+        self.neighbor_index = create_neighbor_index(neighbor_index)
+        self._index_version = -1
+        self._index_columns: tuple = ()
+        self._index_needs_build = True
+        self._dirty_students: set = set()
         self.user_item_matrix: Optional[pd.DataFrame] = None
         self.user_similarity_matrix: Optional[np.ndarray] = None
         self.item_similarity_matrix: Optional[np.ndarray] = None
-        self.nmf_model: Optional[NMF] = None
+        self.nmf_model: Optional['NMF'] = None
         self.user_similarity_df: Optional[pd.DataFrame] = None
-        
+        self.matrix_version = 0
+        self._user_similarity_version = -1
+        self._item_similarity_version = -1
+        self._normalized_vectors: Optional[np.ndarray] = None
+        self._vector_norms: Optional[np.ndarray] = None
+        self._normalized_version = -1
+        self._results: Dict[str, tuple] = {}
+        self._cell_sums: Dict[tuple, float] = {}
+        self._cell_counts: Dict[tuple, int] = {}
+        self._student_cells: Dict[str, int] = {}
+        self._subject_cells: Dict[Any, int] = {}
+        self.lock = threading.RLock()
+
+    @property
+    def result_count(self) -> int:
+        return len(self._results)
+
+    def result_subjects(self) -> List[str]:
+        """Subject of every exam result currently held in the matrix"""
+        with self.lock:
+            return [subject for _student_id, subject, _score in self._results.values()]
+
+    @staticmethod
+    def invalid_result_reason(result: Any) -> Optional[str]:
+        """Why an exam result cannot enter the matrix, or None; results without a score are skipped, not invalid"""
+        if not isinstance(result, dict):
+            return 'result must be an object'
+        exam = result.get('exam')
+        if isinstance(exam, dict) and 'subject' in exam:
+            try:
+                hash(exam['subject'])
+            except TypeError:
+                return 'subject must be a string'
+        percentage = result.get('percentage')
+        if percentage is not None:
+            try:
+                finite = not isinstance(percentage, bool) and math.isfinite(float(percentage))
+            except (TypeError, ValueError):
+                finite = False
+            if not finite:
+                return 'percentage must be a finite number'
+        return None
+
+    @staticmethod
+    def _result_entry(result: Dict[str, Any]) -> Optional[tuple]:
+        exam = result.get('exam')
+        if not isinstance(exam, dict) or 'subject' not in exam or result.get('student') is None or result.get('percentage') is None:
+            return None
+        return (str(result['student']), exam['subject'], float(result['percentage']))
+
+    def reset(self):
+        with self.lock:
+            self._results = {}
+            self._cell_sums = {}
+            self._cell_counts = {}
+            self._student_cells = {}
+            self._subject_cells = {}
+            self.user_item_matrix = None
+            self._index_needs_build = True
+            self.matrix_version += 1
+
+    @staticmethod
+    def _bump(counter: Dict[Any, int], key: Any, delta: int):
+        counter[key] = counter.get(key, 0) + delta
+        if counter[key] <= 0:
+            del counter[key]
+
+    def _adjust_cell(self, entry: tuple, sign: int):
+        cell = (entry[0], entry[1])
+        if cell not in self._cell_counts:
+            self._bump(self._student_cells, cell[0], 1)
+            self._bump(self._subject_cells, cell[1], 1)
+        self._cell_sums[cell] = self._cell_sums.get(cell, 0.0) + (sign * entry[2])
+        self._cell_counts[cell] = self._cell_counts.get(cell, 0) + sign
+        if self._cell_counts[cell] <= 0:
+            del self._cell_sums[cell]
+            del self._cell_counts[cell]
+            self._bump(self._student_cells, cell[0], -1)
+            self._bump(self._subject_cells, cell[1], -1)
+
+    def _cell_value(self, cell: tuple) -> float:
+        count = self._cell_counts.get(cell, 0)
+        return self._cell_sums[cell] / count if count else 0.0
+
+    def _rebuild_matrix(self):
+        self._index_needs_build = True
+        if not self._cell_counts:
+            self.user_item_matrix = None
+            return
+        cells = pd.Series({cell: self._cell_value(cell) for cell in self._cell_counts})
+        cells.index.names = ['student_id', 'subject']
+        self.user_item_matrix = cells.unstack(fill_value=0.0).sort_index().sort_index(axis=1)
+
+    def _update_cells(self, touched: set):
+        # Copy-on-write so readers holding the previous matrix never see a half-applied delta.
+        matrix = self.user_item_matrix.copy()
+        students = {student_id for student_id, _subject in touched}
+        subjects = {subject for _student_id, subject in touched}
+        if (any((student_id in self._student_cells) != (student_id in matrix.index) for student_id in students)
+                or any((subject in self._subject_cells) != (subject in matrix.columns) for subject in subjects)):
+            matrix = matrix.reindex(index=sorted(self._student_cells), columns=sorted(self._subject_cells), fill_value=0.0)
+            matrix.index.name = 'student_id'
+            matrix.columns.name = 'subject'
+        for cell in touched:
+            if cell[0] in matrix.index and cell[1] in matrix.columns:
+                matrix.at[cell[0], cell[1]] = self._cell_value(cell)
+        self.user_item_matrix = matrix
+
+    def apply_exam_results(self, exam_results: List[Dict[str, Any]], deleted_result_ids: Optional[List[Any]] = None) -> int:
+        """Apply new, changed or deleted exam results to the resident user-item matrix"""
+        # Every result is checked before any is applied, so a malformed one leaves the matrix untouched.
+        entries = []
+        for position, result in enumerate(exam_results):
+            reason = self.invalid_result_reason(result)
+            if reason is not None:
+                raise ValueError(f"Exam result at position {position} is invalid: {reason}")
+            entries.append((str(result.get('_id', f'row-{position}')), self._result_entry(result)))
+
+        with self.lock:
+            touched = set()
+            for result_id, entry in entries:
+                previous = self._results.pop(result_id, None)
+                if previous is not None:
+                    self._adjust_cell(previous, -1)
+                    touched.add(previous[:2])
+                if entry is not None:
+                    self._results[result_id] = entry
+                    self._adjust_cell(entry, 1)
+                    touched.add(entry[:2])
+
+            for result_id in deleted_result_ids or []:
+                previous = self._results.pop(str(result_id), None)
+                if previous is not None:
+                    self._adjust_cell(previous, -1)
+                    touched.add(previous[:2])
+
+            if not touched:
+                return 0
+            self._dirty_students.update(student_id for student_id, _subject in touched)
+            if self.user_item_matrix is None or len(touched) > self.BULK_REBUILD_THRESHOLD or not self._cell_counts:
+                self._rebuild_matrix()
+            else:
+                self._update_cells(touched)
+            self.matrix_version += 1
+            return len(touched)
+
     def create_user_item_matrix(self, exam_results: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
         """Create user-item matrix from exam results"""
         if not exam_results:
             return None
-            
-        # Create DataFrame from exam results
-        data = []
-        for result in exam_results:
-            if 'exam' in result and 'subject' in result['exam']:
-                data.append({
-                    'student_id': str(result['student']),
-                    'subject': result['exam']['subject'],
-                    'score': result['percentage']
-                })
-        
-        if not data:
-            return None
-            
-        df = pd.DataFrame(data)
-        
-        # Create pivot table
-        self.user_item_matrix = df.pivot_table(
-            index='student_id', 
-            columns='subject', 
-            values='score', 
-            fill_value=0
-        )
-        
-        return self.user_item_matrix
+
+        with self.lock:
+            self.reset()
+            self.apply_exam_results(exam_results)
+            return self.user_item_matrix
     
+    def uses_full_similarity(self) -> bool:
+        """Whether the dense n x n user similarity matrix should be materialized"""
+        if self.similarity_mode != 'auto':
+            return self.similarity_mode == 'full'
+        return self.user_item_matrix is not None and len(self.user_item_matrix) <= self.full_similarity_max_users
+
+    def _normalized_user_vectors(self) -> Optional[np.ndarray]:
+        """Row-normalized user vectors, cached with their norms until the matrix changes"""
+        with self.lock:
+            if self.user_item_matrix is None:
+                return None
+            if self._normalized_version != self.matrix_version:
+                vectors = self.user_item_matrix.to_numpy(dtype=np.float64)
+                norms = np.linalg.norm(vectors, axis=1)
+                safe_norms = np.where(norms == 0, 1.0, norms)
+                self._normalized_vectors = vectors / safe_norms[:, None]
+                self._vector_norms = norms
+                self._normalized_version = self.matrix_version
+            return self._normalized_vectors
+
+    def user_similarity_row(self, user_id: str) -> Optional[np.ndarray]:
+        """Cosine similarity of one user against every user, without the full matrix"""
+        with self.lock:
+            if self.user_item_matrix is None or user_id not in self.user_item_matrix.index:
+                return None
+            user_idx = self.user_item_matrix.index.get_loc(user_id)
+            if self.uses_full_similarity():
+                self.calculate_user_similarity()
+                return self.user_similarity_matrix[user_idx]
+
+            vectors = self._normalized_user_vectors()
+            return vectors @ vectors[user_idx]
+
+    def _sync_neighbor_index(self):
+        """Bring the neighbor index up to the current matrix version"""
+        matrix = self.user_item_matrix
+        if self._index_version == self.matrix_version:
+            return
+        columns = tuple(matrix.columns)
+        if self._index_needs_build or columns != self._index_columns:
+            self.neighbor_index.build(matrix.index, matrix.to_numpy(dtype=np.float64))
+        else:
+            for student_id in self._dirty_students:
+                if student_id in matrix.index:
+                    self.neighbor_index.upsert(student_id, matrix.loc[student_id].to_numpy(dtype=np.float64))
+                else:
+                    self.neighbor_index.remove(student_id)
+        self._dirty_students.clear()
+        self._index_columns = columns
+        self._index_needs_build = False
+        self._index_version = self.matrix_version
+
+    @staticmethod
+    def top_k_indices(scores: np.ndarray, k: int, exclude_idx: Optional[int] = None) -> np.ndarray:
+        """Indices of the k highest scores in descending order via argpartition"""
+        if exclude_idx is not None:
+            scores = scores.copy()
+            scores[exclude_idx] = -np.inf
+        k = min(k, len(scores) - (1 if exclude_idx is not None else 0))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
     def calculate_user_similarity(self) -> Optional[np.ndarray]:
         """Calculate user similarity matrix using cosine similarity"""
-        if self.user_item_matrix is None:
-            return None
-            
-        similarity = cosine_similarity(self.user_item_matrix)
-        self.user_similarity_matrix = similarity
-        
-        # Also create a DataFrame version for easier access
-        self.user_similarity_df = pd.DataFrame(
-            similarity,
-            index=self.user_item_matrix.index,
-            columns=self.user_item_matrix.index
-        )
-        
-        return self.user_similarity_matrix
+        with self.lock:
+            if self.user_item_matrix is None:
+                return None
+            if not self.uses_full_similarity():
+                # Row mode: only the normalized vectors are kept; rows are computed on demand.
+                self.user_similarity_matrix = None
+                self.user_similarity_df = None
+                self._user_similarity_version = -1
+                self._normalized_user_vectors()
+                return None
+            if self._user_similarity_version == self.matrix_version:
+                return self.user_similarity_matrix
+
+            similarity = load_sklearn('sklearn.metrics.pairwise').cosine_similarity(self.user_item_matrix)
+            self.user_similarity_matrix = similarity
+
+            # Also create a DataFrame version for easier access
+            self.user_similarity_df = pd.DataFrame(
+                similarity,
+                index=self.user_item_matrix.index,
+                columns=self.user_item_matrix.index
+            )
+            self._user_similarity_version = self.matrix_version
+
+            return self.user_similarity_matrix
     
     def calculate_item_similarity(self) -> Optional[np.ndarray]:
         """Calculate item similarity matrix using cosine similarity"""
-        if self.user_item_matrix is None:
-            return None
-            
-        self.item_similarity_matrix = cosine_similarity(self.user_item_matrix.T)
-        return self.item_similarity_matrix
-    
-    def fit_nmf(self, n_components: int = 10) -> Optional[NMF]:
-        """Fit Non-negative Matrix Factorization model"""
-        if self.user_item_matrix is None:
-            return None
-            
-        self.nmf_model = NMF(n_components=n_components, random_state=42)
-        self.nmf_model.fit(self.user_item_matrix)
-        return self.nmf_model
+        with self.lock:
+            if self.user_item_matrix is None:
+                return None
+            if self._item_similarity_version == self.matrix_version:
+                return self.item_similarity_matrix
+
+            self.item_similarity_matrix = load_sklearn('sklearn.metrics.pairwise').cosine_similarity(self.user_item_matrix.T)
+            self._item_similarity_version = self.matrix_version
+            return self.item_similarity_matrix
     
     def get_user_recommendations(self, user_id: str, n_recommendations: int = 5) -> List[Dict[str, Any]]:
         """Get collaborative filtering recommendations for a user"""
-        if (self.user_item_matrix is None or 
-            self.user_similarity_matrix is None or
-            user_id not in self.user_item_matrix.index):
+        similar_users = self.user_similarity_row(user_id)
+        if similar_users is None:
             return []
         
         # Get user's current scores
         user_scores = self.user_item_matrix.loc[user_id]
-        
-        # Find similar users
         user_idx = self.user_item_matrix.index.get_loc(user_id)
-        similar_users = self.user_similarity_matrix[user_idx]
         
         # Get top similar users (excluding self)
-        similar_user_indices = np.argsort(similar_users)[::-1][1:6]
+        similar_user_indices = self.top_k_indices(similar_users, 5, exclude_idx=user_idx)
         if len(similar_user_indices) == 0:
             return []
             
@@ -736,17 +1187,33 @@ class CollaborativeFiltering:
     
     def get_similar_students(self, user_id: str, n_students: int = 5) -> List[Dict[str, Any]]:
         """Get similar students to a given user"""
-        if self.user_similarity_df is None or user_id not in self.user_similarity_df.index:
+        with self.lock:
+            if self.neighbor_index is not None and not self.uses_full_similarity():
+                if self.user_item_matrix is None or user_id not in self.user_item_matrix.index:
+                    return []
+                self._sync_neighbor_index()
+                neighbors = self.neighbor_index.query(
+                    self.user_item_matrix.loc[user_id].to_numpy(dtype=np.float64),
+                    k=n_students,
+                    exclude_id=user_id,
+                )
+                return [
+                    {'student_id': student_id, 'similarity_score': similarity_score}
+                    for student_id, similarity_score in neighbors
+                ]
+        
+        similar_users = self.user_similarity_row(user_id)
+        if similar_users is None:
             return []
         
-        similar_users = self.user_similarity_df[user_id].sort_values(ascending=False)
-        similar_users = similar_users[similar_users.index != user_id]
+        user_idx = self.user_item_matrix.index.get_loc(user_id)
+        student_ids = self.user_item_matrix.index
         
         result = []
-        for student_id, similarity_score in similar_users.head(n_students).items():
+        for idx in self.top_k_indices(similar_users, n_students, exclude_idx=user_idx):
             result.append({
-                'student_id': student_id,
-                'similarity_score': float(similarity_score)
+                'student_id': student_ids[idx],
+                'similarity_score': float(similar_users[idx])
             })
         
         return result
@@ -754,7 +1221,7 @@ class CollaborativeFiltering:
 
 class ContentBasedFiltering:
     def __init__(self):
-        self.tfidf_vectorizer: Optional[TfidfVectorizer] = None
+        self.tfidf_vectorizer: Optional['TfidfVectorizer'] = None
         self.tfidf_matrix: Optional[np.ndarray] = None
         self.item_similarity_df: Optional[pd.DataFrame] = None
         self.item_metadata_df: Optional[pd.DataFrame] = None
@@ -784,10 +1251,10 @@ class ContentBasedFiltering:
             return None
         
         try:
-            self.tfidf_vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
+            self.tfidf_vectorizer = load_sklearn('sklearn.feature_extraction.text').TfidfVectorizer(stop_words='english', max_features=100)
             self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(self.item_metadata_df['features_combined'])
             
-            cosine_sim = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
+            cosine_sim = load_sklearn('sklearn.metrics.pairwise').cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
             
             item_ids = self.item_metadata_df.get('subject', range(len(self.item_metadata_df))).values
             self.item_similarity_df = pd.DataFrame(
@@ -832,26 +1299,22 @@ class ContentBasedFiltering:
 
 
 class PerformanceOptimizationAnalyzer:
-    """Analyzer for code optimization metrics (from notebook)"""
+    """Analyzer for code optimization metrics (formulas shared with main.py in recommender_utils)"""
     
     @staticmethod
     def calculate_s_time(T_opt: float, T_sub: float, alpha: float = 0.5) -> float:
         """Calculate time score (S_time)"""
-        if T_sub == 0:
-            return 0.0 if T_opt > 0 else 1.0
-        return min(1.0, (T_opt / T_sub) ** alpha)
+        return recommender_utils.calculate_s_time(T_opt, T_sub, alpha)
     
     @staticmethod
     def calculate_s_space(M_opt: float, M_sub: float, beta: float = 0.5) -> float:
         """Calculate space score (S_space)"""
-        if M_sub == 0:
-            return 0.0 if M_opt > 0 else 1.0
-        return min(1.0, (M_opt / M_sub) ** beta)
+        return recommender_utils.calculate_s_space(M_opt, M_sub, beta)
     
     @staticmethod
     def calculate_overall_score(S_time: float, S_space: float, W_time: float = 0.6, W_space: float = 0.4) -> float:
         """Calculate overall optimality score"""
-        return (W_time * S_time) + (W_space * S_space)
+        return recommender_utils.calculate_overall_score(S_time, S_space, W_time, W_space)
     
     @staticmethod
     def analyze_submission(T_opt: float, M_opt: float, T_sub: float, M_sub: float, 
@@ -909,97 +1372,418 @@ class PerformanceOptimizationAnalyzer:
         return recommendations[:n_recommendations]
 
 class FaceDetection:
-    def __init__(self):
-        self.known_faces: Dict[str, np.ndarray] = {}
-        self.face_locations: List[tuple] = []
-        self.face_encodings: List[np.ndarray] = []
+    """Face routes' inference; every result is per request and nothing is kept on the instance"""
 
-    @staticmethod
-    def _dependencies_available() -> bool:
-        return face_recognition is not None and cv2 is not None and Image is not None
-        
-    def encode_face_from_base64(self, image_base64: str) -> Optional[np.ndarray]:
-        """Encode face from base64 image"""
+    def __init__(self, pool: FaceInferencePool):
+        self.pool = pool
+
+    def _run(self, function: Any, image_data: bytes, model: str) -> Dict[str, Any]:
+        result = self.pool.run(function, image_data, model, face_inference.DEFAULT_DETECTION_MAX_SIDE)
+        if result.get('metrics') and has_request_context():
+            g.face_inference_metrics = result['metrics']
+        return result
+
+    def encode_face(self, image_data: bytes, model: str = face_inference.DEFAULT_DETECTION_MODEL) -> Optional[np.ndarray]:
+        """Encode the first face in an encoded (JPEG/PNG) image"""
         try:
-            if not self._dependencies_available():
+            result = self._run(face_inference.encode_face, image_data, model)
+            if not result['available']:
                 logger.warning("Face recognition dependencies are unavailable in this runtime.")
                 return None
-            # Decode base64 image
-            image_data = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_data))
-            image_array = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            if len(image_array.shape) == 3:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-            
-            # Find face encodings
-            face_encodings = face_recognition.face_encodings(image_array)
-            
-            if face_encodings:
-                return face_encodings[0]
-            return None
+            return result['encoding']
+        except FaceInferenceBusy:
+            raise
         except Exception as e:
             logger.error(f"Face encoding error: {e}")
             return None
     
-    def detect_faces(self, image_base64: str) -> Dict[str, Any]:
+    def detect_faces(self, image_data: bytes, model: str = face_inference.DEFAULT_DETECTION_MODEL) -> Dict[str, Any]:
         """Detect faces in image and return detection results"""
         try:
-            if not self._dependencies_available():
+            result = self._run(face_inference.detect_faces, image_data, model)
+            if not result['available']:
                 return {'faces_detected': 0, 'face_locations': [], 'confidence': False, 'message': 'Face dependencies unavailable'}
-            # Decode base64 image
-            image_data = base64.b64decode(image_base64)
-            image = Image.open(io.BytesIO(image_data))
-            image_array = np.array(image)
-            
-            # Convert RGB to BGR for OpenCV
-            if len(image_array.shape) == 3:
-                image_array = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
-            
-            # Find face locations and encodings
-            self.face_locations = face_recognition.face_locations(image_array)
-            self.face_encodings = face_recognition.face_encodings(image_array, self.face_locations)
             
             return {
-                'faces_detected': len(self.face_locations),
-                'face_locations': self.face_locations,
-                'confidence': len(self.face_encodings) > 0
+                'faces_detected': len(result['face_locations']),
+                'face_locations': result['face_locations'],
+                'confidence': len(result['face_encodings']) > 0,
+                'model': result['metrics']['model'],
+                'detection_scale': result['metrics']['detection_scale']
             }
+        except FaceInferenceBusy:
+            raise
         except Exception as e:
             logger.error(f"Face detection error: {e}")
             return {'faces_detected': 0, 'face_locations': [], 'confidence': False}
     
-    def verify_student_identity(self, student_image_base64: str, stored_face_encoding: np.ndarray) -> Dict[str, Any]:
+    def verify_student_identity(self, image_data: bytes, stored_face_encoding: np.ndarray, model: str = face_inference.DEFAULT_DETECTION_MODEL) -> Dict[str, Any]:
         """Verify if the detected face matches the stored student face"""
         try:
-            if not self._dependencies_available():
-                return {'verified': False, 'confidence': 0.0, 'message': 'Face dependencies unavailable'}
-            current_face_encoding = self.encode_face_from_base64(student_image_base64)
+            current_face_encoding = self.encode_face(image_data, model)
             
             if current_face_encoding is None or stored_face_encoding is None:
                 return {'verified': False, 'confidence': 0.0}
             
-            # Compare faces
-            matches = face_recognition.compare_faces([stored_face_encoding], current_face_encoding, tolerance=0.6)
-            face_distance = face_recognition.face_distance([stored_face_encoding], current_face_encoding)
-            
-            confidence = 1 - face_distance[0]
+            # Compare faces (euclidean distance, as face_recognition.face_distance)
+            face_distance = float(np.linalg.norm(np.asarray(stored_face_encoding, dtype=np.float64) - current_face_encoding))
             
             return {
-                'verified': matches[0],
-                'confidence': float(confidence),
-                'face_distance': float(face_distance[0])
+                'verified': face_distance <= 0.6,
+                'confidence': 1 - face_distance,
+                'face_distance': face_distance
             }
+        except FaceInferenceBusy:
+            raise
         except Exception as e:
             logger.error(f"Face verification error: {e}")
             return {'verified': False, 'confidence': 0.0}
 
+    def analyze_frame(self, image_data: bytes, model: str = face_inference.DEFAULT_DETECTION_MODEL) -> Optional[Dict[str, Any]]:
+        """Locations and encodings of every face in a proctoring frame; None when dependencies are unavailable"""
+        result = self._run(face_inference.detect_faces, image_data, model)
+        if not result['available']:
+            return None
+        return result
+
+    def identify_student(self, image_data: bytes, roster: 'FaceRoster', max_matches: int = 5, tolerance: float = 0.6,
+                         model: str = face_inference.DEFAULT_DETECTION_MODEL) -> Optional[Dict[str, Any]]:
+        """1:N match of the face in the image against the roster; None when no face is found"""
+        current_face_encoding = self.encode_face(image_data, model)
+        if current_face_encoding is None:
+            return None
+
+        candidates = roster.identify(current_face_encoding, k=max_matches)
+        matches = [
+            {'student_id': student_id, 'face_distance': distance, 'confidence': 1 - distance, 'verified': distance <= tolerance}
+            for student_id, distance in candidates
+        ]
+        best_match = matches[0] if matches and matches[0]['verified'] else None
+        return {
+            'identified': best_match is not None,
+            'student_id': best_match['student_id'] if best_match else None,
+            'confidence': best_match['confidence'] if best_match else 0.0,
+            'matches': matches,
+            'roster_size': len(roster.index),
+        }
+
+
+class FaceRoster:
+    """Registered face encodings of every student, kept in a FaceEncodingIndex and synced from users"""
+
+    PROJECTION = {'studentId': 1, 'faceEncoding': 1, 'faceEncodingUpdatedAt': 1}
+
+    def __init__(self, poll_interval_seconds: float = 10.0, full_resync_seconds: float = 3600.0):
+        self.poll_interval_seconds = poll_interval_seconds
+        self.full_resync_seconds = full_resync_seconds
+        self.index = FaceEncodingIndex()
+        self.last_updated_at: Optional[datetime] = None
+        self.last_poll = 0.0
+        self.last_full_load = 0.0
+        self.lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.stats = {'full_loads': 0, 'delta_polls': 0, 'delta_encodings': 0, 'registrations': 0, 'skipped_documents': 0}
+
+    def _apply(self, index: FaceEncodingIndex, users: List[Dict[str, Any]]):
+        for user in users:
+            updated_at = user.get('faceEncodingUpdatedAt')
+            if isinstance(updated_at, datetime) and (self.last_updated_at is None or updated_at > self.last_updated_at):
+                self.last_updated_at = updated_at
+            try:
+                index.upsert(user['studentId'], user['faceEncoding'])
+            except (KeyError, TypeError, ValueError):
+                self.stats['skipped_documents'] += 1
+
+    def sync(self, force: bool = False) -> int:
+        """Load every registered encoding, or only those registered since the last poll"""
+        if db is None:
+            return 0
+
+        # Lookups only take self.lock, so they keep being served from the current matrix during a read.
+        with self._sync_lock:
+            now = time.monotonic()
+            full_load = self.last_full_load == 0.0 or (now - self.last_full_load) >= self.full_resync_seconds
+            if not force and not full_load and (now - self.last_poll) < self.poll_interval_seconds:
+                return 0
+
+            if full_load:
+                users = list(db.users.find({'studentId': {'$exists': True}, 'faceEncoding': {'$exists': True}}, self.PROJECTION))
+                index = FaceEncodingIndex()
+                self.last_updated_at = None
+                self._apply(index, users)
+                with self.lock:
+                    self.index = index
+                self.last_poll = self.last_full_load = now
+                self.stats['full_loads'] += 1
+                return len(users)
+
+            query = {'faceEncodingUpdatedAt': {'$gte': self.last_updated_at} if self.last_updated_at is not None else {'$exists': True}}
+            users = list(db.users.find(query, self.PROJECTION))
+            with self.lock:
+                self._apply(self.index, users)
+            self.last_poll = now
+            self.stats['delta_polls'] += 1
+            self.stats['delta_encodings'] += len(users)
+            return len(users)
+
+    def register(self, student_id: str, encoding: np.ndarray):
+        with self.lock:
+            self.index.upsert(student_id, encoding)
+            self.stats['registrations'] += 1
+
+    def encoding_for(self, student_id: str) -> Optional[np.ndarray]:
+        self.sync()
+        with self.lock:
+            encoding = self.index.encoding_for(student_id)
+        if encoding is not None or db is None:
+            return encoding
+
+        # Registered by another worker since the last poll, or by a client that does not stamp faceEncodingUpdatedAt.
+        student = db.users.find_one({'studentId': student_id}, self.PROJECTION)
+        if not student or 'faceEncoding' not in student:
+            return None
+        self.register(student_id, student['faceEncoding'])
+        with self.lock:
+            return self.index.encoding_for(student_id)
+
+    def identify(self, encoding: np.ndarray, k: int, tolerance: Optional[float] = None) -> List[tuple]:
+        self.sync()
+        with self.lock:
+            return self.index.identify(encoding, k=k, tolerance=tolerance)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.stats, **self.index.get_stats()}
+
+
+class ExamResultSync:
+    """Keep the resident user-item matrix current by polling exam results by updatedAt/_id"""
+
+    PROJECTION = {'student': 1, 'exam': 1, 'percentage': 1, 'updatedAt': 1}
+
+    def __init__(self, cf: CollaborativeFiltering, poll_interval_seconds: float = 5.0, full_resync_seconds: float = 3600.0):
+        self.cf = cf
+        self.poll_interval_seconds = poll_interval_seconds
+        self.full_resync_seconds = full_resync_seconds
+        self.last_updated_at: Optional[datetime] = None
+        self.last_id: Any = None
+        self.last_poll = 0.0
+        self.last_full_load = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'full_loads': 0, 'delta_polls': 0, 'delta_results': 0, 'ingested_results': 0}
+
+    def _delta_query(self) -> Dict[str, Any]:
+        clauses = []
+        if self.last_updated_at is not None:
+            clauses.append({'updatedAt': {'$gte': self.last_updated_at}})
+        if self.last_id is not None:
+            clauses.append({'_id': {'$gt': self.last_id}})
+        return {'$or': clauses} if clauses else {}
+
+    def _advance_watermarks(self, exam_results: List[Dict[str, Any]]):
+        for result in exam_results:
+            updated_at = result.get('updatedAt')
+            if isinstance(updated_at, datetime) and (self.last_updated_at is None or updated_at > self.last_updated_at):
+                self.last_updated_at = updated_at
+            result_id = result.get('_id')
+            if result_id is not None and (self.last_id is None or result_id > self.last_id):
+                self.last_id = result_id
+
+    def sync(self, force: bool = False) -> int:
+        """Pull results changed since the last poll; returns the number of results read"""
+        if db is None:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            full_load = self.last_full_load == 0.0 or (now - self.last_full_load) >= self.full_resync_seconds
+            if not force and not full_load and (now - self.last_poll) < self.poll_interval_seconds:
+                return 0
+
+            query = {} if full_load else self._delta_query()
+            exam_results = list(db.examresults.find(query, self.PROJECTION))
+            exam_metadata_loader.populate(exam_results)
+            self.last_poll = now
+            valid_results = [result for result in exam_results if self.cf.invalid_result_reason(result) is None]
+            if len(valid_results) < len(exam_results):
+                logger.warning(f"Skipped {len(exam_results) - len(valid_results)} malformed exam results")
+
+            if full_load:
+                self.last_updated_at = None
+                self.last_id = None
+                with self.cf.lock:
+                    self.cf.reset()
+                    self.cf.apply_exam_results(valid_results)
+                self.last_full_load = now
+                self.stats['full_loads'] += 1
+            else:
+                self.cf.apply_exam_results(valid_results)
+                self.stats['delta_polls'] += 1
+                self.stats['delta_results'] += len(exam_results)
+
+            self._advance_watermarks(exam_results)
+            return len(exam_results)
+
+    def ingest(self, exam_results: List[Dict[str, Any]], deleted_result_ids: Optional[List[Any]] = None) -> int:
+        """Apply results pushed by the backend without waiting for the next poll"""
+        pending = [result for result in exam_results if not isinstance(result.get('exam'), dict)]
+        exam_metadata_loader.populate(pending)
+        changed = self.cf.apply_exam_results(exam_results, deleted_result_ids)
+        with self._lock:
+            self.stats['ingested_results'] += len(exam_results) + len(deleted_result_ids or [])
+        return changed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'results_in_matrix': self.cf.result_count,
+            'matrix_version': self.cf.matrix_version,
+            'neighbor_index': self.cf.neighbor_index.get_stats() if self.cf.neighbor_index is not None else None,
+            'last_updated_at': self.last_updated_at.isoformat() if self.last_updated_at else None,
+        }
+
+
+class NMFFactorSnapshot:
+    """Immutable W/H factors from one NMF fit, served by dot product"""
+
+    def __init__(self, version: int, matrix_version: int, student_ids: pd.Index, subjects: pd.Index,
+                 W: np.ndarray, H: np.ndarray, trained_at: float, training_seconds: float):
+        W.setflags(write=False)
+        H.setflags(write=False)
+        self.version = version
+        self.matrix_version = matrix_version
+        self.student_ids = student_ids
+        self.subjects = subjects
+        self.W = W
+        self.H = H
+        self.trained_at = trained_at
+        self.training_seconds = training_seconds
+
+    def predict(self, student_id: str) -> Optional[Dict[str, float]]:
+        """Reconstructed subject scores for one student: a single W row times H"""
+        if student_id not in self.student_ids:
+            return None
+        predicted = self.W[self.student_ids.get_loc(student_id)] @ self.H
+        return {str(subject): float(score) for subject, score in zip(self.subjects, predicted)}
+
+
+class NMFTrainer:
+    """Refit NMF in a background thread and publish versioned factor snapshots"""
+
+    def __init__(self, cf: CollaborativeFiltering, n_components: int = 10, min_interval_seconds: float = 60.0):
+        self.cf = cf
+        self.n_components = n_components
+        self.min_interval_seconds = min_interval_seconds
+        self.snapshot: Optional[NMFFactorSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def train_once(self) -> Optional[NMFFactorSnapshot]:
+        # The matrix is replaced copy-on-write, so the reference taken here stays consistent.
+        with self.cf.lock:
+            matrix = self.cf.user_item_matrix
+            matrix_version = self.cf.matrix_version
+        if matrix is None or matrix.empty:
+            return None
+        if self.snapshot is not None and self.snapshot.matrix_version == matrix_version:
+            return self.snapshot
+
+        started = time.perf_counter()
+        n_components = max(1, min(self.n_components, *matrix.shape))
+        model = load_sklearn('sklearn.decomposition').NMF(n_components=n_components, random_state=42)
+        W = model.fit_transform(matrix.to_numpy(dtype=np.float64))
+        H = model.components_.copy()
+        previous_version = self.snapshot.version if self.snapshot is not None else 0
+        self.snapshot = NMFFactorSnapshot(
+            version=previous_version + 1,
+            matrix_version=matrix_version,
+            student_ids=matrix.index,
+            subjects=matrix.columns,
+            W=W,
+            H=H,
+            trained_at=time.time(),
+            training_seconds=time.perf_counter() - started,
+        )
+        self.cf.nmf_model = model
+        return self.snapshot
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.train_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"NMF training error: {e}")
+            time.sleep(self.min_interval_seconds)
+
+    def request_training(self):
+        """Ask the trainer to refit if the matrix moved past the current snapshot; never blocks"""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.matrix_version == self.cf.matrix_version:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='nmf-trainer', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def get_status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return {'model_version': None, 'trained_at': None, 'training_seconds': None,
+                    'staleness_seconds': None, 'matrix_versions_behind': None, 'error': self.last_error}
+        return {
+            'model_version': snapshot.version,
+            'trained_at': datetime.fromtimestamp(snapshot.trained_at).isoformat(),
+            'training_seconds': round(snapshot.training_seconds, 4),
+            'staleness_seconds': round(time.time() - snapshot.trained_at, 1),
+            'matrix_versions_behind': self.cf.matrix_version - snapshot.matrix_version,
+            'error': self.last_error,
+        }
+
+
 # Initialize recommendation and face detection systems
-cf_system = CollaborativeFiltering()
+cf_system = CollaborativeFiltering(
+    similarity_mode=os.getenv('COLLAB_SIMILARITY_MODE', 'auto'),
+    full_similarity_max_users=int(os.getenv('COLLAB_FULL_SIMILARITY_MAX_USERS', 2000)),
+    neighbor_index=os.getenv('COLLAB_NEIGHBOR_INDEX', 'balltree'),
+)
 cb_system = ContentBasedFiltering()
 perf_analyzer = PerformanceOptimizationAnalyzer()
-face_system = FaceDetection()
+face_inference_pool = FaceInferencePool(
+    workers=int(os.getenv('FACE_INFERENCE_WORKERS', 2)),
+    queue_depth=int(os.getenv('FACE_INFERENCE_QUEUE_DEPTH', 8)),
+    timeout_seconds=float(os.getenv('FACE_INFERENCE_TIMEOUT_SECONDS', 10)),
+)
+face_system = FaceDetection(face_inference_pool)
+FACE_IDENTIFY_MAX_MATCHES = int(os.getenv('FACE_IDENTIFY_MAX_MATCHES', 20))
+FACE_UPLOAD_MAX_BYTES = int(float(os.getenv('FACE_UPLOAD_MAX_MB', 10)) * 1024 * 1024)
+proctoring_sessions = ProctoringSessionStore(
+    idle_timeout_seconds=float(os.getenv('PROCTORING_SESSION_IDLE_SECONDS', 900)),
+    max_sessions=int(os.getenv('PROCTORING_MAX_SESSIONS', 5000)),
+)
+PROCTORING_FRAME_DIFF_THRESHOLD = float(os.getenv('PROCTORING_FRAME_DIFF_THRESHOLD', 0.06))
+PROCTORING_REDETECT_EVERY_FRAMES = int(os.getenv('PROCTORING_REDETECT_EVERY_FRAMES', 10))
+PROCTORING_IDENTITY_TOLERANCE = float(os.getenv('PROCTORING_IDENTITY_TOLERANCE', 0.6))
+face_roster = FaceRoster(
+    poll_interval_seconds=float(os.getenv('FACE_ROSTER_SYNC_INTERVAL_SECONDS', 10)),
+    full_resync_seconds=float(os.getenv('FACE_ROSTER_FULL_RESYNC_SECONDS', 3600)),
+)
+exam_result_sync = ExamResultSync(
+    cf_system,
+    poll_interval_seconds=float(os.getenv('COLLAB_SYNC_INTERVAL_SECONDS', 5)),
+    full_resync_seconds=float(os.getenv('COLLAB_FULL_RESYNC_SECONDS', 3600)),
+)
+nmf_trainer = NMFTrainer(
+    cf_system,
+    n_components=int(os.getenv('NMF_COMPONENTS', 10)),
+    min_interval_seconds=float(os.getenv('NMF_TRAIN_INTERVAL_SECONDS', 60)),
+)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -1015,7 +1799,19 @@ def health_check():
             'performance_analyzer': True
         },
         'model_loaded': model_status["model_loaded"],
-        'model_error': model_status["model_error"]
+        'model_error': model_status["model_error"],
+        'topic_label_index': get_recommendation_topic_label_stats(),
+        'similarity_neighbors': get_recommendation_similarity_neighbor_stats(),
+        'solution_partitions': get_recommendation_solution_partition_stats(),
+        'student_ratings': get_recommendation_student_rating_stats(),
+        'exam_metadata_cache': exam_metadata_loader.get_stats(),
+        'recommendation_cache': recommendation_cache.get_stats(),
+        'collaborative_matrix': exam_result_sync.get_stats(),
+        'nmf_model': nmf_trainer.get_status(),
+        'face_roster': face_roster.get_stats(),
+        'face_inference': face_inference_pool.get_stats(),
+        'proctoring': proctoring_sessions.get_stats(),
+        'startup': startup_profile.get_report()
     })
 
 @app.route('/recommendations/<user_id>', methods=['GET'])
@@ -1025,38 +1821,34 @@ def get_recommendations(user_id: str):
         if db is None:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        # Get exam results from MongoDB
-        exam_results = list(db.examresults.find({}).limit(1000))
+        # Apply exam results changed since the last poll to the resident matrix
+        exam_result_sync.sync()
         
-        if not exam_results:
+        if cf_system.result_count == 0:
             return jsonify({'recommendations': [], 'message': 'No exam data available'})
         
-        # Populate exam details
-        for result in exam_results:
-            exam = db.exams.find_one({'_id': result['exam']})
-            if exam:
-                result['exam'] = exam
-        
-        # Create user-item matrix
-        user_item_matrix = cf_system.create_user_item_matrix(exam_results)
-        
-        if user_item_matrix is None:
-            return jsonify({'recommendations': [], 'message': 'Unable to create recommendation matrix'})
-        
-        # Calculate similarities
-        cf_system.calculate_user_similarity()
-        cf_system.calculate_item_similarity()
-        
-        # Fit NMF model
-        cf_system.fit_nmf()
+        with cf_system.lock:
+            if cf_system.user_item_matrix is None:
+                return jsonify({'recommendations': [], 'message': 'Unable to create recommendation matrix'})
+            
+            # Calculate similarities
+            cf_system.calculate_user_similarity()
+            cf_system.calculate_item_similarity()
+            
+            # Get recommendations
+            recommendations = cf_system.get_user_recommendations(user_id, n_recommendations=5)
+            total_exams_analyzed = cf_system.result_count
         
-        # Get recommendations
-        recommendations = cf_system.get_user_recommendations(user_id, n_recommendations=5)
+        # NMF is refit in the background; serve predictions from the latest published factors
+        nmf_trainer.request_training()
+        snapshot = nmf_trainer.snapshot
         
         return jsonify({
             'recommendations': recommendations,
             'user_id': user_id,
-            'total_exams_analyzed': len(exam_results),
+            'total_exams_analyzed': total_exams_analyzed,
+            'predicted_subject_scores': snapshot.predict(user_id) if snapshot is not None else None,
+            'nmf_model_version': snapshot.version if snapshot is not None else None,
             'method': 'collaborative_filtering'
         })
         
@@ -1071,24 +1863,17 @@ def get_similar_students(user_id: str):
         if db is None:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        # Get exam results
-        exam_results = list(db.examresults.find({}).limit(1000))
+        # Apply exam results changed since the last poll to the resident matrix
+        exam_result_sync.sync()
         
-        if not exam_results:
+        if cf_system.result_count == 0:
             return jsonify({'similar_students': [], 'message': 'No exam data available'})
         
-        # Populate exam details
-        for result in exam_results:
-            exam = db.exams.find_one({'_id': result['exam']})
-            if exam:
-                result['exam'] = exam
-        
-        # Create user-item matrix
-        cf_system.create_user_item_matrix(exam_results)
-        cf_system.calculate_user_similarity()
-        
-        # Get similar students
-        similar_students = cf_system.get_similar_students(user_id, n_students=5)
+        with cf_system.lock:
+            cf_system.calculate_user_similarity()
+            
+            # Get similar students
+            similar_students = cf_system.get_similar_students(user_id, n_students=5)
         
         return jsonify({
             'user_id': user_id,
@@ -1111,26 +1896,19 @@ def get_hybrid_recommendations(user_id: str):
         weight_collab = request.args.get('weight_collaborative', 0.5, type=float)
         weight_content = request.args.get('weight_content', 0.5, type=float)
         
-        # Get exam results
-        exam_results = list(db.examresults.find({}).limit(1000))
+        # Apply exam results changed since the last poll to the resident matrix
+        exam_result_sync.sync()
         
-        if not exam_results:
+        if cf_system.result_count == 0:
             return jsonify({'recommendations': [], 'message': 'No exam data available'})
         
-        # Populate exam details
-        for result in exam_results:
-            exam = db.exams.find_one({'_id': result['exam']})
-            if exam:
-                result['exam'] = exam
-        
         # Build collaborative filtering recommendations
-        cf_system.create_user_item_matrix(exam_results)
-        cf_system.calculate_user_similarity()
-        cf_recs = cf_system.get_user_recommendations(user_id, n_recommendations=10)
+        with cf_system.lock:
+            cf_system.calculate_user_similarity()
+            cf_recs = cf_system.get_user_recommendations(user_id, n_recommendations=10)
         
         # Build content-based recommendations
-        items = [{'subject': result.get('exam', {}).get('subject', 'Unknown')} 
-                 for result in exam_results]
+        items = [{'subject': subject} for subject in cf_system.result_subjects()]
         cb_system.prepare_items(items)
         cb_system.calculate_item_similarities()
         
@@ -1166,6 +1944,47 @@ def get_hybrid_recommendations(user_id: str):
         logger.error(f"Hybrid recommendations error: {e}")
         return jsonify({'error': 'Failed to generate hybrid recommendations'}), 500
 
+@app.route('/recommendations/ingest', methods=['POST'])
+def ingest_exam_results():
+    """Apply new, changed or deleted exam results to the collaborative filtering matrix"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        exam_results = data.get('results', [])
+        deleted_ids = data.get('deleted', [])
+        if not isinstance(exam_results, list) or not isinstance(deleted_ids, list):
+            return jsonify({'error': 'results and deleted must be lists'}), 400
+        if any(not isinstance(result, dict) or not result.get('_id') for result in exam_results):
+            return jsonify({'error': 'Each result requires an _id'}), 400
+        if any(result.get('student') is None or result.get('percentage') is None for result in exam_results):
+            return jsonify({'error': 'Each result requires a student and a percentage'}), 400
+        
+        for result in exam_results:
+            if isinstance(result.get('exam'), str) and ObjectId.is_valid(result['exam']):
+                result['exam'] = ObjectId(result['exam'])
+            if result.get('subject') and not isinstance(result.get('exam'), dict):
+                result['exam'] = {'_id': result.get('exam'), 'subject': result['subject']}
+        for position, result in enumerate(exam_results):
+            reason = CollaborativeFiltering.invalid_result_reason(result)
+            if reason is not None:
+                return jsonify({'error': f"Invalid result at position {position}: {reason}"}), 400
+        
+        changed_cells = exam_result_sync.ingest(exam_results, deleted_ids)
+        
+        return jsonify({
+            'applied': len(exam_results),
+            'deleted': len(deleted_ids),
+            'changed_cells': changed_cells,
+            'matrix_version': cf_system.matrix_version,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Exam result ingest error: {e}")
+        return jsonify({'error': 'Failed to ingest exam results'}), 500
+
 @app.route('/performance/analyze-submission', methods=['POST'])
 def analyze_submission():
     """Analyze code submission performance optimization"""
@@ -1210,40 +2029,169 @@ def recommend_submission():
         if not payload:
             return jsonify({'error': 'No payload provided'}), 400
 
-        recommendation = analyze_recommendation_submission(payload)
+        cache_key = recommendation_cache.make_key(payload)
+        recommendation = recommendation_cache.get(cache_key)
+        cache_status = 'hit' if recommendation is not None else 'miss'
+        if recommendation is None:
+            recommendation = analyze_recommendation_submission(payload)
+            recommendation_cache.put(cache_key, recommendation)
         model_status = get_recommendation_model_status()
 
-        return jsonify({
+        response = jsonify({
             **recommendation,
             'timestamp': datetime.now().isoformat(),
             'model_loaded': model_status["model_loaded"],
             'model_error': model_status["model_error"]
         })
+        response.headers['X-Recommendation-Cache'] = cache_status
+        return response
     except Exception as e:
         logger.error(f"Recommendation generation error: {e}")
         return jsonify({'error': 'Failed to generate recommendation'}), 500
 
+RECOMMEND_BATCH_MAX_ITEMS = int(os.getenv('RECOMMEND_BATCH_MAX_ITEMS', 500))
+
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_submission_batch():
+    """Generate coding recommendations for many submitted exams in one request."""
+    try:
+        data = request.get_json(silent=True)
+        payloads = data.get('submissions') if isinstance(data, dict) else data
+        if not isinstance(payloads, list) or not payloads:
+            return jsonify({'error': 'Expected a non-empty list of submissions'}), 400
+        if len(payloads) > RECOMMEND_BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Batch exceeds the limit of {RECOMMEND_BATCH_MAX_ITEMS} submissions'}), 413
+
+        model_status = get_recommendation_model_status()
+        timestamp = datetime.now().isoformat()
+        cache_keys = [recommendation_cache.make_key(payload) for payload in payloads]
+        outcomes = [recommendation_cache.get(cache_key) for cache_key in cache_keys]
+        missing = [index for index, outcome in enumerate(outcomes) if outcome is None]
+        for index, outcome in zip(missing, analyze_recommendation_submissions([payloads[index] for index in missing])):
+            outcomes[index] = outcome
+            if not isinstance(outcome, Exception):
+                recommendation_cache.put(cache_keys[index], outcome)
+
+        results = []
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, ValueError):
+                results.append({'index': index, 'error': str(outcome)})
+            elif isinstance(outcome, Exception):
+                logger.error(f"Batch recommendation error for item {index}: {outcome}")
+                results.append({'index': index, 'error': 'Failed to generate recommendation'})
+            else:
+                results.append({
+                    **outcome,
+                    'index': index,
+                    'timestamp': timestamp,
+                    'model_loaded': model_status["model_loaded"],
+                    'model_error': model_status["model_error"]
+                })
+
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'failed': sum(1 for item in results if 'error' in item),
+            'timestamp': timestamp
+        })
+    except Exception as e:
+        logger.error(f"Batch recommendation error: {e}")
+        return jsonify({'error': 'Failed to generate recommendations'}), 500
+
+class FaceUploadTooLarge(Exception):
+    pass
+
+
+def decode_base64_image(image_base64: str) -> bytes:
+    # Browsers send canvas captures as data URLs
+    if image_base64.startswith('data:'):
+        image_base64 = image_base64.split(',', 1)[-1]
+    try:
+        return base64.b64decode(image_base64)
+    except ValueError:
+        raise ValueError('image must be base64 encoded')
+
+
+def read_face_request() -> tuple:
+    """(fields, image bytes) from multipart/form-data, a raw image/* body, or JSON with a base64 'image'"""
+    if request.content_length is not None and request.content_length > FACE_UPLOAD_MAX_BYTES:
+        raise FaceUploadTooLarge(f"Images are limited to {FACE_UPLOAD_MAX_BYTES} bytes")
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('image')
+        image_data = upload.read(FACE_UPLOAD_MAX_BYTES + 1) if upload else None
+        data, transport = request.form.to_dict(), 'multipart'
+    elif request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        # The body is read from the stream into one buffer; options come from the query string.
+        image_data = request.stream.read(FACE_UPLOAD_MAX_BYTES + 1)
+        data, transport = request.args.to_dict(), 'raw'
+    else:
+        data = request.get_json(silent=True) or {}
+        image_base64 = data.get('image')
+        image_data = decode_base64_image(image_base64) if isinstance(image_base64, str) and image_base64 else None
+        transport = 'base64'
+
+    if image_data is not None and len(image_data) > FACE_UPLOAD_MAX_BYTES:
+        raise FaceUploadTooLarge(f"Images are limited to {FACE_UPLOAD_MAX_BYTES} bytes")
+    g.face_upload = {
+        'transport': transport,
+        'request_bytes': request.content_length or 0,
+        'image_bytes': len(image_data) if image_data else 0,
+    }
+    return data, image_data or None
+
+
+@app.after_request
+def report_face_request_memory(response):
+    upload = g.get('face_upload')
+    if upload is not None:
+        metrics = g.get('face_inference_metrics') or {}
+        width, height = metrics.get('image_size') or (0, 0)
+        peak_memory = metrics.get('peak_memory_mb')
+        logger.info(
+            f"{request.path} {upload['transport']} upload: request {upload['request_bytes']} B, image {upload['image_bytes']} B, "
+            f"decoded {width}x{height} ({width * height * 3 / (1024 * 1024):.1f} MB), "
+            f"worker peak {f'{peak_memory:.1f} MB' if peak_memory is not None else 'n/a'}, status {response.status_code}"
+        )
+    return response
+
+def face_detection_model(data: Dict[str, Any]) -> str:
+    """Per-request 'hog' or 'cnn' face search model, defaulting to FACE_DETECTION_MODEL"""
+    model = str(data.get('model') or face_inference.DEFAULT_DETECTION_MODEL).lower()
+    if model not in face_inference.FACE_DETECTION_MODELS:
+        raise ValueError(f"model must be one of {', '.join(face_inference.FACE_DETECTION_MODELS)}")
+    return model
+
+def face_inference_busy_response(error: FaceInferenceBusy):
+    """503 with Retry-After for shed or timed-out face inference"""
+    return jsonify({'error': str(error)}), 503, {'Retry-After': str(error.retry_after_seconds)}
+
 @app.route('/face-detection/detect', methods=['POST'])
 def detect_faces():
     """Detect faces in uploaded image"""
     try:
-        data = request.get_json()
-        if not data:
+        data, image_data = read_face_request()
+        if not data and image_data is None:
             return jsonify({'error': 'No data provided'}), 400
             
-        image_base64 = data.get('image')
         
-        if not image_base64:
+        if not image_data:
             return jsonify({'error': 'No image provided'}), 400
         
         # Detect faces
-        detection_result = face_system.detect_faces(image_base64)
+        detection_result = face_system.detect_faces(image_data, face_detection_model(data))
         
         return jsonify({
             'detection_result': detection_result,
             'timestamp': datetime.now().isoformat()
         })
         
+    except FaceInferenceBusy as e:
+        return face_inference_busy_response(e)
+    except FaceUploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Face detection error: {e}")
         return jsonify({'error': 'Face detection failed'}), 500
@@ -1255,25 +2203,22 @@ def verify_identity():
         if db is None:
             return jsonify({'error': 'Database connection failed'}), 500
             
-        data = request.get_json()
-        if not data:
+        data, image_data = read_face_request()
+        if not data and image_data is None:
             return jsonify({'error': 'No data provided'}), 400
             
-        image_base64 = data.get('image')
         student_id = data.get('student_id')
         
-        if not image_base64 or not student_id:
+        if not image_data or not student_id:
             return jsonify({'error': 'Image and student_id required'}), 400
         
-        # Get stored face encoding for student
-        student = db.users.find_one({'studentId': student_id})
-        if not student or 'faceEncoding' not in student:
+        # Get stored face encoding for student from the in-memory roster
+        stored_encoding = face_roster.encoding_for(student_id)
+        if stored_encoding is None:
             return jsonify({'error': 'Student face data not found'}), 404
         
-        stored_encoding = np.array(student['faceEncoding'])
-        
         # Verify identity
-        verification_result = face_system.verify_student_identity(image_base64, stored_encoding)
+        verification_result = face_system.verify_student_identity(image_data, stored_encoding, face_detection_model(data))
         
         return jsonify({
             'verification_result': verification_result,
@@ -1281,6 +2226,12 @@ def verify_identity():
             'timestamp': datetime.now().isoformat()
         })
         
+    except FaceInferenceBusy as e:
+        return face_inference_busy_response(e)
+    except FaceUploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Identity verification error: {e}")
         return jsonify({'error': 'Identity verification failed'}), 500
@@ -1292,18 +2243,17 @@ def register_face():
         if db is None:
             return jsonify({'error': 'Database connection failed'}), 500
             
-        data = request.get_json()
-        if not data:
+        data, image_data = read_face_request()
+        if not data and image_data is None:
             return jsonify({'error': 'No data provided'}), 400
             
-        image_base64 = data.get('image')
         student_id = data.get('student_id')
         
-        if not image_base64 or not student_id:
+        if not image_data or not student_id:
             return jsonify({'error': 'Image and student_id required'}), 400
         
         # Encode face
-        face_encoding = face_system.encode_face_from_base64(image_base64)
+        face_encoding = face_system.encode_face(image_data, face_detection_model(data))
         
         if face_encoding is None:
             return jsonify({'error': 'No face detected in image'}), 400
@@ -1311,22 +2261,190 @@ def register_face():
         # Store face encoding in database
         result = db.users.update_one(
             {'studentId': student_id},
-            {'$set': {'faceEncoding': face_encoding.tolist()}}
+            {'$set': {'faceEncoding': face_encoding.tolist(), 'faceEncodingUpdatedAt': datetime.utcnow()}}
         )
         
         if result.modified_count == 0:
             return jsonify({'error': 'Student not found'}), 404
         
+        face_roster.register(student_id, face_encoding)
+        
         return jsonify({
             'message': 'Face registered successfully',
             'student_id': student_id,
             'timestamp': datetime.now().isoformat()
         })
         
+    except FaceInferenceBusy as e:
+        return face_inference_busy_response(e)
+    except FaceUploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Face registration error: {e}")
         return jsonify({'error': 'Face registration failed'}), 500
 
+@app.route('/face-detection/identify', methods=['POST'])
+def identify_student():
+    """Identify a student by matching one face against every registered encoding"""
+    try:
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+            
+        data, image_data = read_face_request()
+        if not data and image_data is None:
+            return jsonify({'error': 'No data provided'}), 400
+            
+        if not image_data:
+            return jsonify({'error': 'No image provided'}), 400
+        
+        max_matches = min(max(int(data.get('max_matches', 5)), 1), FACE_IDENTIFY_MAX_MATCHES)
+        tolerance = float(data.get('tolerance', 0.6))
+        
+        identification_result = face_system.identify_student(
+            image_data, face_roster, max_matches=max_matches, tolerance=tolerance, model=face_detection_model(data)
+        )
+        if identification_result is None:
+            return jsonify({'error': 'No face detected in image'}), 400
+        
+        return jsonify({
+            'identification_result': identification_result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except FaceInferenceBusy as e:
+        return face_inference_busy_response(e)
+    except FaceUploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Face identification error: {e}")
+        return jsonify({'error': 'Face identification failed'}), 500
+
+@app.route('/proctoring/sessions/<session_id>/frames', methods=['POST'])
+def analyze_proctoring_frame(session_id: str):
+    """Analyze one webcam frame of an exam session; detection is skipped on frames that barely changed"""
+    try:
+        data, image_data = read_face_request()
+        if not image_data:
+            return jsonify({'error': 'No image provided'}), 400
+
+        model = face_detection_model(data)
+        session = proctoring_sessions.get_or_create(session_id, data.get('student_id'))
+        events = []
+        with session.lock:
+            thumbnail = proctoring.frame_thumbnail(image_data)
+            analyze, difference = session.needs_analysis(thumbnail, PROCTORING_FRAME_DIFF_THRESHOLD, PROCTORING_REDETECT_EVERY_FRAMES)
+            if analyze:
+                result = face_system.analyze_frame(image_data, model)
+                if result is None:
+                    return jsonify({'error': 'Face dependencies unavailable'}), 503
+                stored_encoding = face_roster.encoding_for(session.student_id) if session.student_id else None
+                status, details = proctoring.classify_faces(result['face_encodings'], stored_encoding, PROCTORING_IDENTITY_TOLERANCE)
+                events = session.record_analysis(thumbnail, result['face_locations'], status, details)
+            proctoring_sessions.count_frame(analyze)
+            summary = session.get_summary()
+
+        return jsonify({
+            'session_id': session_id,
+            'analyzed': analyze,
+            'frame_difference': difference,
+            'status': summary['status'],
+            'face_locations': summary['face_locations'],
+            'events': events,
+            'session': summary,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except FaceInferenceBusy as e:
+        return face_inference_busy_response(e)
+    except FaceUploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Proctoring frame error: {e}")
+        return jsonify({'error': 'Proctoring frame analysis failed'}), 500
+
+@app.route('/proctoring/sessions/<session_id>', methods=['GET', 'DELETE'])
+def proctoring_session(session_id: str):
+    """Events of an exam session; DELETE ends it"""
+    session = proctoring_sessions.end(session_id) if request.method == 'DELETE' else proctoring_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Proctoring session not found'}), 404
+    with session.lock:
+        summary = session.get_summary(include_events=True)
+    return jsonify({**summary, 'ended': request.method == 'DELETE', 'timestamp': datetime.now().isoformat()})
+
+PERFORMANCE_RESULT_PROJECTION = {'exam': 1, 'student': 1, 'percentage': 1, 'createdAt': 1}
+
+
+def summarize_performance_trends(exam_results: List[Dict[str, Any]], exams: Dict[Any, Dict[str, Any]]) -> Dict[str, Any]:
+    # Analyze trends by subject
+    trends = {}
+    for result in exam_results:
+        exam = exams.get(result['exam'])
+        if exam:
+            subject = exam['subject']
+            if subject not in trends:
+                trends[subject] = []
+            trends[subject].append({
+                'score': result['percentage'],
+                'date': result['createdAt'],
+                'student_id': str(result['student'])
+            })
+
+    # Calculate average scores by month for each subject
+    monthly_trends = {}
+    for subject, results in trends.items():
+        df = pd.DataFrame(results)
+        df['date'] = pd.to_datetime(df['date'])
+        df['month'] = df['date'].dt.to_period('M').astype(str)
+
+        monthly_avg = df.groupby('month')['score'].mean().reset_index()
+        monthly_trends[subject] = monthly_avg.to_dict('records')
+
+    return {
+        'monthly_trends': monthly_trends,
+        'total_exams': len(exam_results),
+        'subjects': list(trends.keys())
+    }
+
+
+def summarize_student_performance(student_id: str, student_results: List[Dict[str, Any]], exams: Dict[Any, Dict[str, Any]]) -> Dict[str, Any]:
+    # Populate exam details and aggregate by subject
+    performance_by_subject = {}
+    for result in student_results:
+        exam = exams.get(result['exam'])
+        if exam:
+            subject = exam['subject']
+            if subject not in performance_by_subject:
+                performance_by_subject[subject] = []
+            performance_by_subject[subject].append({
+                'score': result['percentage'],
+                'date': result['createdAt']
+            })
+
+    # Calculate statistics
+    statistics = {}
+    for subject, results in performance_by_subject.items():
+        scores = [r['score'] for r in results]
+        statistics[subject] = {
+            'attempts': len(scores),
+            'average': float(np.mean(scores)),
+            'best': float(np.max(scores)),
+            'worst': float(np.min(scores)),
+            'trend': 'improving' if scores[-1] > np.mean(scores[:-1]) else 'declining'
+        }
+
+    return {
+        'student_id': student_id,
+        'performance': statistics,
+        'total_exams': len(student_results)
+    }
+
 @app.route('/analytics/performance-trends', methods=['GET'])
 def get_performance_trends():
     """Get performance trends and analytics"""
@@ -1335,40 +2453,13 @@ def get_performance_trends():
             return jsonify({'error': 'Database connection failed'}), 500
         
         # Get exam results
-        exam_results = list(db.examresults.find({}))
+        exam_results = list(db.examresults.find({}, PERFORMANCE_RESULT_PROJECTION))
         
         if not exam_results:
             return jsonify({'trends': [], 'message': 'No exam data available'})
         
-        # Analyze trends by subject
-        trends = {}
-        for result in exam_results:
-            exam = db.exams.find_one({'_id': result['exam']})
-            if exam:
-                subject = exam['subject']
-                if subject not in trends:
-                    trends[subject] = []
-                trends[subject].append({
-                    'score': result['percentage'],
-                    'date': result['createdAt'],
-                    'student_id': str(result['student'])
-                })
-        
-        # Calculate average scores by month for each subject
-        monthly_trends = {}
-        for subject, results in trends.items():
-            df = pd.DataFrame(results)
-            df['date'] = pd.to_datetime(df['date'])
-            df['month'] = df['date'].dt.to_period('M')
-            
-            monthly_avg = df.groupby('month')['score'].mean().reset_index()
-            monthly_trends[subject] = monthly_avg.to_dict('records')
-        
-        return jsonify({
-            'monthly_trends': monthly_trends,
-            'total_exams': len(exam_results),
-            'subjects': list(trends.keys())
-        })
+        exams = exam_metadata_loader.load([result['exam'] for result in exam_results])
+        return jsonify(summarize_performance_trends(exam_results, exams))
         
     except Exception as e:
         logger.error(f"Performance trends error: {e}")
@@ -1382,46 +2473,20 @@ def get_student_performance(student_id: str):
             return jsonify({'error': 'Database connection failed'}), 500
         
         # Get all exam results for student
-        student_results = list(db.examresults.find({'student': student_id}))
+        student_results = list(db.examresults.find({'student': student_id}, PERFORMANCE_RESULT_PROJECTION))
         
         if not student_results:
             return jsonify({'performance': {}, 'message': 'No exam data for this student'})
         
-        # Populate exam details and aggregate by subject
-        performance_by_subject = {}
-        for result in student_results:
-            exam = db.exams.find_one({'_id': result['exam']})
-            if exam:
-                subject = exam['subject']
-                if subject not in performance_by_subject:
-                    performance_by_subject[subject] = []
-                performance_by_subject[subject].append({
-                    'score': result['percentage'],
-                    'date': result['createdAt']
-                })
-        
-        # Calculate statistics
-        statistics = {}
-        for subject, results in performance_by_subject.items():
-            scores = [r['score'] for r in results]
-            statistics[subject] = {
-                'attempts': len(scores),
-                'average': float(np.mean(scores)),
-                'best': float(np.max(scores)),
-                'worst': float(np.min(scores)),
-                'trend': 'improving' if scores[-1] > np.mean(scores[:-1]) else 'declining'
-            }
-        
-        return jsonify({
-            'student_id': student_id,
-            'performance': statistics,
-            'total_exams': len(student_results)
-        })
+        exams = exam_metadata_loader.load([result['exam'] for result in student_results])
+        return jsonify(summarize_student_performance(student_id, student_results, exams))
         
     except Exception as e:
         logger.error(f"Student performance error: {e}")
         return jsonify({'error': 'Failed to get student performance'}), 500
 
+startup_profile.mark_ready()
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=True)
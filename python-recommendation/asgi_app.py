@@ -0,0 +1,101 @@
+"""ASGI entry point for the analytics service.
+
+The Mongo-bound analytics routes run natively on an async Motor client, with their pandas/numpy
+work moved to a thread pool, so one process keeps many database requests in flight. Every other
+route is served by the Flask app in app.py through a WSGI bridge, so the URL space is the same.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable
+
+from a2wsgi import WSGIMiddleware
+from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import app as flask_service
+
+logger = flask_service.logger
+
+ASGI_CPU_WORKERS = int(os.getenv('ASGI_CPU_WORKERS', os.cpu_count() or 4))
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 16))
+
+cpu_executor = ThreadPoolExecutor(max_workers=ASGI_CPU_WORKERS, thread_name_prefix='asgi-cpu')
+mongo_client = None
+mongo_db = None
+
+
+async def run_cpu_bound(function: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, function, *args)
+
+
+@asynccontextmanager
+async def lifespan(_app: Starlette):
+    global mongo_client, mongo_db
+    try:
+        mongo_client = AsyncIOMotorClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+        mongo_db = mongo_client['student_analytics']
+        logger.info("Connected to MongoDB (async)")
+    except Exception as e:
+        logger.error(f"Async MongoDB connection error: {e}")
+    yield
+    if mongo_client is not None:
+        mongo_client.close()
+    cpu_executor.shutdown(wait=False)
+
+
+async def get_performance_trends(request):
+    """Get performance trends and analytics"""
+    try:
+        if mongo_db is None:
+            return JSONResponse({'error': 'Database connection failed'}, status_code=500)
+
+        exam_results = await mongo_db.examresults.find({}, flask_service.PERFORMANCE_RESULT_PROJECTION).to_list(length=None)
+        if not exam_results:
+            return JSONResponse({'trends': [], 'message': 'No exam data available'})
+
+        exams = await flask_service.exam_metadata_loader.load_async([result['exam'] for result in exam_results], mongo_db)
+        return JSONResponse(await run_cpu_bound(flask_service.summarize_performance_trends, exam_results, exams))
+
+    except Exception as e:
+        logger.error(f"Performance trends error: {e}")
+        return JSONResponse({'error': 'Failed to generate performance trends'}, status_code=500)
+
+
+async def get_student_performance(request):
+    """Get comprehensive performance analysis for a student"""
+    student_id = request.path_params['student_id']
+    try:
+        if mongo_db is None:
+            return JSONResponse({'error': 'Database connection failed'}, status_code=500)
+
+        student_results = await mongo_db.examresults.find({'student': student_id}, flask_service.PERFORMANCE_RESULT_PROJECTION).to_list(length=None)
+        if not student_results:
+            return JSONResponse({'performance': {}, 'message': 'No exam data for this student'})
+
+        exams = await flask_service.exam_metadata_loader.load_async([result['exam'] for result in student_results], mongo_db)
+        return JSONResponse(await run_cpu_bound(flask_service.summarize_student_performance, student_id, student_results, exams))
+
+    except Exception as e:
+        logger.error(f"Student performance error: {e}")
+        return JSONResponse({'error': 'Failed to get student performance'}, status_code=500)
+
+
+# flask-cors already answers for the bridged routes; only the native ones need the middleware.
+native_route_middleware = [Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+
+app = Starlette(
+    routes=[
+        Route('/analytics/performance-trends', get_performance_trends, methods=['GET'], middleware=native_route_middleware),
+        Route('/analytics/student-performance/{student_id}', get_student_performance, methods=['GET'], middleware=native_route_middleware),
+        Mount('/', app=WSGIMiddleware(flask_service.app, workers=ASGI_WSGI_THREADS)),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,291 @@
+"""Load test the analytics routes: Flask under gunicorn against asgi_app under uvicorn.
+
+Both servers run against the same MongoDB (--mongodb-uri), or by default against an in-memory
+stand-in (mongomock / mongomock-motor) seeded with synthetic exam results, where every query
+waits --latency-ms first so the comparison reflects a database across the network.
+
+    python benchmark_asgi.py --requests 2000 --concurrency 64 --latency-ms 20
+    python benchmark_asgi.py --mongodb-uri mongodb://localhost:27017/ --seed
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+
+SUBJECTS = ["DSA", "Aptitude", "Computer Science"]
+
+
+def synthetic_documents(n_results: int, n_students: int, n_exams: int, seed: int = 42) -> tuple:
+    rng = random.Random(seed)
+    exams = [{"_id": f"exam-{index}", "subject": SUBJECTS[index % len(SUBJECTS)], "title": f"Exam {index}"} for index in range(n_exams)]
+    started = datetime(2026, 1, 1)
+    results = [
+        {
+            "_id": f"result-{index}",
+            "exam": f"exam-{rng.randrange(n_exams)}",
+            "student": f"student-{rng.randrange(n_students)}",
+            "percentage": rng.randint(20, 100),
+            "createdAt": started + timedelta(days=rng.randrange(270)),
+        }
+        for index in range(n_results)
+    ]
+    return exams, results
+
+
+def install_sync_stand_in(latency_seconds: float):
+    import mongomock
+    import pymongo
+
+    original_find = mongomock.collection.Collection.find
+
+    def find_with_latency(self, filter=None, projection=None, *args, **kwargs):
+        time.sleep(latency_seconds)
+        # mongomock edits the projection in place, which races on the app's shared projection dicts.
+        return original_find(self, filter, dict(projection) if isinstance(projection, dict) else projection, *args, **kwargs)
+
+    mongomock.collection.Collection.find = find_with_latency
+    pymongo.MongoClient = mongomock.MongoClient
+
+
+def install_async_stand_in(asgi_module: Any, latency_seconds: float, exams: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    import mongomock_motor
+
+    original_to_list = mongomock_motor.AsyncCursor.to_list
+
+    async def to_list_with_latency(self, *args, **kwargs):
+        await asyncio.sleep(latency_seconds)
+        return await original_to_list(self, *args, **kwargs)
+
+    mongomock_motor.AsyncCursor.to_list = to_list_with_latency
+    client = mongomock_motor.AsyncMongoMockClient()
+
+    async def seed():
+        await client["student_analytics"].exams.insert_many(exams)
+        await client["student_analytics"].examresults.insert_many(results)
+
+    asyncio.run(seed())
+    asgi_module.AsyncIOMotorClient = lambda *_args, **_kwargs: client
+
+
+def serve(args):
+    os.environ["MONGODB_URI"] = args.mongodb_uri or "mongodb://localhost:27017/"
+    exams, results = synthetic_documents(args.results, args.students, args.exams)
+    stand_in = not args.mongodb_uri
+    latency_seconds = args.latency_ms / 1000.0
+
+    if args.server == "flask":
+        if stand_in:
+            install_sync_stand_in(latency_seconds)
+        import app as flask_service
+
+        if stand_in:
+            flask_service.db.exams.insert_many(exams)
+            flask_service.db.examresults.insert_many(results)
+
+        from gunicorn.app.base import BaseApplication
+
+        class FlaskServer(BaseApplication):
+            def load_config(self):
+                self.cfg.set("bind", f"127.0.0.1:{args.port}")
+                self.cfg.set("workers", args.workers)
+                self.cfg.set("threads", args.threads)
+                self.cfg.set("worker_class", "gthread" if args.threads > 1 else "sync")
+                self.cfg.set("loglevel", "warning")
+                self.cfg.set("preload_app", True)
+
+            def load(self):
+                return flask_service.app
+
+        FlaskServer().run()
+        return
+
+    import uvicorn
+
+    import asgi_app
+
+    if stand_in:
+        install_async_stand_in(asgi_app, latency_seconds, exams, results)
+    uvicorn.run(asgi_app.app, host="127.0.0.1", port=args.port, workers=1, log_level="warning")
+
+
+def seed_database(mongodb_uri: str, n_results: int, n_students: int, n_exams: int):
+    import pymongo
+
+    exams, results = synthetic_documents(n_results, n_students, n_exams)
+    database = pymongo.MongoClient(mongodb_uri)["student_analytics"]
+    database.exams.delete_many({"_id": {"$in": [exam["_id"] for exam in exams]}})
+    database.examresults.delete_many({"_id": {"$in": [result["_id"] for result in results]}})
+    database.exams.insert_many(exams)
+    database.examresults.insert_many(results)
+    database.examresults.create_index("student")
+
+
+async def fetch(connection: Dict[str, Any], port: int, path: str) -> int:
+    # Minimal keep-alive HTTP/1.1 GET, so the client side stays cheap next to the server under test.
+    if connection.get("writer") is None:
+        connection["reader"], connection["writer"] = await asyncio.open_connection("127.0.0.1", port)
+    reader, writer = connection["reader"], connection["writer"]
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode())
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    content_length, keep_alive = 0, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            content_length = int(value)
+        elif name.lower() == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    await reader.readexactly(content_length)
+
+    if not keep_alive:
+        writer.close()
+        connection["writer"] = None
+    return status
+
+
+async def drive_load(port: int, paths: List[str], total_requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal issued, errors
+        connection: Dict[str, Any] = {}
+        while issued < total_requests:
+            path = paths[issued % len(paths)]
+            issued += 1
+            started = time.perf_counter()
+            try:
+                if await fetch(connection, port, path) != 200:
+                    errors += 1
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                errors += 1
+                connection["writer"] = None
+            latencies.append(time.perf_counter() - started)
+        if connection.get("writer") is not None:
+            connection["writer"].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples = np.asarray(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p99_ms": round(float(np.percentile(samples, 99)), 2),
+    }
+
+
+def wait_until_ready(port: int, process: subprocess.Popen, timeout_seconds: float = 180.0):
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/analytics/student-performance/student-0", timeout=5.0) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+
+def run_configuration(args, server: str, workers: int, threads: int, port: int, paths: List[str]) -> Dict[str, Any]:
+    command = [
+        sys.executable, os.path.abspath(__file__), "serve",
+        "--server", server, "--port", str(port), "--workers", str(workers), "--threads", str(threads),
+        "--latency-ms", str(args.latency_ms), "--results", str(args.results),
+        "--students", str(args.students), "--exams", str(args.exams),
+    ]
+    if args.mongodb_uri:
+        command += ["--mongodb-uri", args.mongodb_uri]
+
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port, process)
+        asyncio.run(drive_load(port, paths, min(args.requests, 50), min(args.concurrency, 8)))
+        result = asyncio.run(drive_load(port, paths, args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {"server": server, "workers": workers, "threads": threads, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_data_arguments(target):
+        target.add_argument("--mongodb-uri", help="Use this MongoDB instead of the in-memory stand-in")
+        target.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in delay per query")
+        target.add_argument("--results", type=int, default=500)
+        target.add_argument("--students", type=int, default=50)
+        target.add_argument("--exams", type=int, default=12)
+
+    serve_parser = subparsers.add_parser("serve", help="Run one server (used internally by the load test)")
+    serve_parser.add_argument("--server", choices=["flask", "asgi"], required=True)
+    serve_parser.add_argument("--port", type=int, required=True)
+    serve_parser.add_argument("--workers", type=int, default=1)
+    serve_parser.add_argument("--threads", type=int, default=1)
+    add_data_arguments(serve_parser)
+
+    add_data_arguments(parser)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--gunicorn-workers", type=int, default=1)
+    parser.add_argument("--gunicorn-threads", type=int, nargs="+", default=[1, 8], help="One gunicorn run per value")
+    parser.add_argument("--trends-every", type=int, default=10, help="Every Nth request reads the whole collection")
+    parser.add_argument("--seed", action="store_true", help="Insert the synthetic documents into --mongodb-uri first")
+    parser.add_argument("--port", type=int, default=5301)
+    parser.add_argument("--json", help="Write the results to this path")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args)
+        return
+
+    if args.seed and args.mongodb_uri:
+        seed_database(args.mongodb_uri, args.results, args.students, args.exams)
+
+    paths = [
+        "/analytics/performance-trends" if args.trends_every and index % args.trends_every == 0
+        else f"/analytics/student-performance/student-{index % args.students}"
+        for index in range(max(args.students, args.trends_every or 1))
+    ]
+    configurations = [("flask", args.gunicorn_workers, threads) for threads in args.gunicorn_threads] + [("asgi", 1, 1)]
+
+    reports = []
+    print(f"{'server':>8} {'workers':>8} {'threads':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for offset, (server, workers, threads) in enumerate(configurations):
+        report = run_configuration(args, server, workers, threads, args.port + offset, paths)
+        reports.append(report)
+        print(
+            f"{server:>8} {workers:>8} {threads:>8} {report['requests_per_second']:>9.1f} "
+            f"{report['p50_ms']:>9.2f} {report['p99_ms']:>9.2f} {report['errors']:>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump({"latency_ms": args.latency_ms, "concurrency": args.concurrency, "results": reports}, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark code evaluation: a fresh interpreter per submission against the pre-forked worker pool.
+
+Runs the same mix of small submissions both ways and reports per-submission latency and
+throughput, then sends submissions that loop forever, burn CPU, allocate without bound and crash
+their interpreter or cannot be pickled, and prints the pool's utilization, queue wait and recycle
+counters; it exits with status 1 if any worker is left checked out afterwards.
+
+    python benchmark_evaluation_pool.py --submissions 200 --workers 2 --concurrency 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from evaluation_pool import EvaluationPoolBusy, EvaluationWorkerPool, SubmissionError
+
+SUBMISSIONS: List[Tuple[str, str, tuple]] = [
+    ("def solve(n):\n    return sorted(range(n, 0, -1))[:3]\n", 'solve', (5000,)),
+    ("def solve(n):\n    return sum(i * i for i in range(n))\n", 'solve', (20000,)),
+    ("def solve(words):\n    counts = {}\n    for word in words:\n        counts[word] = counts.get(word, 0) + 1\n    return len(counts)\n",
+     'solve', (['a', 'b', 'c', 'a'] * 500,)),
+    ("def solve(n):\n    memo = {0: 0, 1: 1}\n    for i in range(2, n):\n        memo[i] = memo[i - 1] + memo[i - 2]\n    return memo[n - 1] % 1000\n",
+     'solve', (2000,)),
+]
+
+MISBEHAVING_SUBMISSIONS: List[Tuple[str, str, str, tuple]] = [
+    ('wall clock', "import time\ndef solve():\n    time.sleep(3600)\n", 'solve', ()),
+    ('cpu', "def solve():\n    while True:\n        pass\n", 'solve', ()),
+    ('memory', "def solve():\n    blocks = []\n    while True:\n        blocks.append(bytearray(64 * 1024 * 1024))\n", 'solve', ()),
+    ('crash', "import os\ndef solve():\n    os._exit(3)\n", 'solve', ()),
+    ('exception', "def solve():\n    raise ValueError('wrong answer')\n", 'solve', ()),
+    ('pickling', "def solve(callback):\n    return callback()\n", 'solve', (lambda: 1,)),
+]
+
+# Quick, fixed benchmark settings so the comparison measures the evaluation path, not the sampling.
+BENCHMARK_OPTIONS = {'warmup': 1, 'repeats': 5, 'max_repeats': 5, 'min_sample_seconds': 0.001, 'memory_repeats': 1}
+
+
+def run_in_fresh_interpreter(source: str, function_name: str, args: tuple) -> float:
+    script = (
+        "import sys\n"
+        "from recommender_utils import evaluate_user_code\n"
+        f"namespace = {{}}\nexec({source!r}, namespace)\n"
+        f"evaluate_user_code(lambda: namespace[{function_name!r}](*{args!r}), 1.0, 1.0, 0.5, 0.5, 0.6, 0.4, **{BENCHMARK_OPTIONS!r})\n"
+    )
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)), check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def latency_summary(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    samples = np.asarray(latencies) * 1000.0
+    return {
+        'submissions': len(latencies),
+        'per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(samples, 50)), 1),
+        'p95_ms': round(float(np.percentile(samples, 95)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--submissions', type=int, default=200)
+    parser.add_argument('--fresh-submissions', type=int, default=20, help='Submissions for the fresh-interpreter baseline')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-runs-per-worker', type=int, default=50)
+    parser.add_argument('--json', help='Write the results to this path')
+    args = parser.parse_args()
+
+    latencies = []
+    started = time.perf_counter()
+    for index in range(args.fresh_submissions):
+        latencies.append(run_in_fresh_interpreter(*SUBMISSIONS[index % len(SUBMISSIONS)]))
+    fresh = latency_summary(latencies, time.perf_counter() - started)
+    print(f"fresh interpreter: {fresh['per_second']:>7.1f}/s  p50 {fresh['p50_ms']:>7.1f} ms  p95 {fresh['p95_ms']:>7.1f} ms")
+
+    pool = EvaluationWorkerPool(
+        workers=args.workers, max_runs_per_worker=args.max_runs_per_worker, cpu_seconds=1,
+        wall_timeout_seconds=3.0, address_space_mb=512, queue_timeout_seconds=60.0,
+    )
+    try:
+        started = time.perf_counter()
+        pool.start()
+        print(f"pool of {args.workers} started in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        def submit(index: int) -> float:
+            source, function_name, function_args = SUBMISSIONS[index % len(SUBMISSIONS)]
+            submitted = time.perf_counter()
+            pool.evaluate(source, function_name, function_args, **BENCHMARK_OPTIONS)
+            return time.perf_counter() - submitted
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            latencies = list(executor.map(submit, range(args.submissions)))
+        pooled = latency_summary(latencies, time.perf_counter() - started)
+        print(f"worker pool:       {pooled['per_second']:>7.1f}/s  p50 {pooled['p50_ms']:>7.1f} ms  p95 {pooled['p95_ms']:>7.1f} ms  (concurrency {args.concurrency})")
+
+        misbehaving = {}
+        for label, source, function_name, function_args in MISBEHAVING_SUBMISSIONS:
+            submitted = time.perf_counter()
+            try:
+                pool.evaluate(source, function_name, function_args, **BENCHMARK_OPTIONS)
+                outcome = 'completed'
+            except SubmissionError as e:
+                outcome = f"{e.reason}: {e}"
+            except EvaluationPoolBusy as e:
+                outcome = f"busy: {e}"
+            misbehaving[label] = outcome
+            print(f"  {label:<10} {time.perf_counter() - submitted:>6.2f}s  {outcome}")
+
+        stats = pool.get_stats()
+    finally:
+        pool.close()
+    print(json.dumps(stats, indent=2))
+
+    if args.json:
+        with open(args.json, 'w') as report_file:
+            json.dump({'fresh_interpreter': fresh, 'pool': pooled, 'misbehaving': misbehaving, 'pool_stats': stats}, report_file, indent=2)
+
+    # Failed submissions either return their worker or replace it, so none may be left checked out.
+    if stats['idle_workers'] != args.workers:
+        print(f"error: {args.workers - stats['idle_workers']} of {args.workers} workers were not returned to the pool", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
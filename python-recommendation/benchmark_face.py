@@ -0,0 +1,150 @@
+"""Latency and accuracy of face search at several downscale sizes and with the HOG and CNN models.
+
+Every image is first run at full resolution with the HOG model; that run is the reference. Each
+(model, max side) setting is then timed end to end (decode, search, encode on original pixels)
+and compared with the reference: recall of reference boxes (IoU >= 0.5), extra boxes, and the
+euclidean distance between matched encodings, where < 0.6 means the same identity.
+
+    python benchmark_face.py --images ./sample_faces --max-sides 0 1600 1200 800 640 480 320
+    python benchmark_face.py --images ./sample_faces --models hog cnn --json face_benchmark.json
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import face_inference
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+SAME_IDENTITY_DISTANCE = 0.6
+
+
+def load_images(path: str) -> List[tuple]:
+    if os.path.isdir(path):
+        paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    else:
+        paths = sorted(glob.glob(path))
+    images = []
+    for image_path in paths:
+        with open(image_path, 'rb') as image_file:
+            images.append((image_path, image_file.read()))
+    return images
+
+
+def box_iou(first: tuple, second: tuple) -> float:
+    top = max(first[0], second[0])
+    right = min(first[1], second[1])
+    bottom = min(first[2], second[2])
+    left = max(first[3], second[3])
+    intersection = max(0, bottom - top) * max(0, right - left)
+
+    def area(box: tuple) -> int:
+        return max(0, box[2] - box[0]) * max(0, box[1] - box[3])
+
+    union = area(first) + area(second) - intersection
+    return intersection / union if union else 0.0
+
+
+def compare_with_reference(reference: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    matched_distances = []
+    unmatched = list(range(len(result['face_locations'])))
+    for box, encoding in zip(reference['face_locations'], reference['face_encodings']):
+        best_index, best_iou = None, 0.5
+        for index in unmatched:
+            iou = box_iou(box, result['face_locations'][index])
+            if iou >= best_iou:
+                best_index, best_iou = index, iou
+        if best_index is not None:
+            unmatched.remove(best_index)
+            matched_distances.append(float(np.linalg.norm(np.asarray(encoding) - np.asarray(result['face_encodings'][best_index]))))
+    return {
+        'reference_faces': len(reference['face_locations']),
+        'matched_faces': len(matched_distances),
+        'extra_faces': len(unmatched),
+        'encoding_distances': matched_distances,
+    }
+
+
+def run_setting(images: List[tuple], references: Dict[str, Dict[str, Any]], model: str, max_side: int, repeats: int) -> Dict[str, Any]:
+    latencies = []
+    reference_faces = matched_faces = extra_faces = 0
+    distances: List[float] = []
+    for image_path, image_data in images:
+        result = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = face_inference.locate_and_encode(image_data, model=model, max_side=max_side)
+            latencies.append(time.perf_counter() - started)
+        comparison = compare_with_reference(references[image_path], result)
+        reference_faces += comparison['reference_faces']
+        matched_faces += comparison['matched_faces']
+        extra_faces += comparison['extra_faces']
+        distances.extend(comparison['encoding_distances'])
+
+    samples = np.asarray(latencies) * 1000.0
+    return {
+        'model': model,
+        'max_side': max_side,
+        'p50_ms': round(float(np.percentile(samples, 50)), 1),
+        'p95_ms': round(float(np.percentile(samples, 95)), 1),
+        'recall': round(matched_faces / reference_faces, 4) if reference_faces else None,
+        'extra_faces': extra_faces,
+        'mean_encoding_distance': round(float(np.mean(distances)), 4) if distances else None,
+        'max_encoding_distance': round(float(np.max(distances)), 4) if distances else None,
+        'same_identity_rate': round(float(np.mean(np.asarray(distances) < SAME_IDENTITY_DISTANCE)), 4) if distances else None,
+    }
+
+
+def format_value(value: Optional[float], pattern: str) -> str:
+    return '-' if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', required=True, help='Directory or glob of face photos')
+    parser.add_argument('--models', nargs='+', default=['hog'], choices=face_inference.FACE_DETECTION_MODELS)
+    parser.add_argument('--max-sides', nargs='+', type=int, default=[0, 1600, 1200, 800, 640, 480, 320],
+                        help='Longest side of the search image; 0 is full resolution')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', help='Write the results to this path')
+    args = parser.parse_args()
+
+    if face_inference.load_face_dependencies() is None:
+        raise SystemExit('face_recognition and opencv-python are required for this benchmark')
+    images = load_images(args.images)
+    if not images:
+        raise SystemExit(f"No images found in {args.images}")
+
+    references = {
+        image_path: face_inference.locate_and_encode(image_data, model='hog', max_side=0)
+        for image_path, image_data in images
+    }
+    print(f"{len(images)} images, {sum(len(reference['face_locations']) for reference in references.values())} reference faces (hog, full resolution)")
+    print(f"{'model':>5} {'max side':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7} {'extra':>6} {'mean dist':>9} {'max dist':>9} {'same id':>8}")
+
+    rows = []
+    for model in args.models:
+        for max_side in args.max_sides:
+            row = run_setting(images, references, model, max_side, args.repeats)
+            rows.append(row)
+            print(
+                f"{model:>5} {max_side or 'full':>8} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{format_value(row['recall'], '{:.3f}'):>7} {row['extra_faces']:>6} "
+                f"{format_value(row['mean_encoding_distance'], '{:.4f}'):>9} {format_value(row['max_encoding_distance'], '{:.4f}'):>9} "
+                f"{format_value(row['same_identity_rate'], '{:.3f}'):>8}"
+            )
+
+    if args.json:
+        with open(args.json, 'w') as report_file:
+            json.dump({'images': len(images), 'results': rows}, report_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark neighbor indexes for /recommendations/<user_id>/similar-students.
+
+Reports recall@k against exact cosine similarity and p50/p99 query latency for each
+index kind on synthetic student-by-subject score vectors.
+
+    python benchmark_neighbor_index.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from neighbor_index import NEIGHBOR_INDEX_KINDS, create_neighbor_index
+
+
+def generate_student_vectors(n_students: int, n_subjects: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Percentages with a per-student ability offset, and some subjects never attempted (0).
+    ability = rng.normal(65, 15, size=(n_students, 1))
+    scores = np.clip(ability + rng.normal(0, 12, size=(n_students, n_subjects)), 0, 100).round()
+    scores[rng.random((n_students, n_subjects)) < 0.15] = 0
+    return scores
+
+
+def exact_top_scores(normalized: np.ndarray, query_row: int, k: int) -> np.ndarray:
+    scores = normalized @ normalized[query_row]
+    scores[query_row] = -np.inf
+    top = np.partition(-scores, k - 1)[:k]
+    return np.sort(-top)[::-1]
+
+
+def recall_at_k(returned_scores: List[float], exact_scores: np.ndarray, k: int) -> float:
+    # Tie-aware: any neighbour scoring at least the k-th exact score is a correct answer.
+    threshold = exact_scores[k - 1] - 1e-9
+    return sum(1 for score in returned_scores[:k] if score >= threshold) / k
+
+
+def percentile_ms(samples: List[float], percentile: float) -> float:
+    return float(np.percentile(np.asarray(samples) * 1000.0, percentile))
+
+
+def benchmark_size(n_students: int, n_subjects: int, n_queries: int, n_updates: int, k: int, kinds: List[str]) -> Dict[str, Any]:
+    vectors = generate_student_vectors(n_students, n_subjects)
+    ids = [f"student-{row}" for row in range(n_students)]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.where(norms == 0, 1.0, norms)
+    rng = np.random.default_rng(7)
+    query_rows = rng.integers(0, n_students, size=n_queries)
+    exact = {int(row): exact_top_scores(normalized, int(row), k) for row in query_rows}
+
+    report: Dict[str, Any] = {"students": n_students, "subjects": n_subjects, "queries": n_queries, "k": k, "indexes": {}}
+    for kind in kinds:
+        index = create_neighbor_index(kind)
+        started = time.perf_counter()
+        index.build(ids, vectors)
+        build_seconds = time.perf_counter() - started
+
+        latencies, recalls = [], []
+        for row in query_rows:
+            started = time.perf_counter()
+            neighbors = index.query(vectors[row], k=k, exclude_id=ids[row])
+            latencies.append(time.perf_counter() - started)
+            recalls.append(recall_at_k([score for _student_id, score in neighbors], exact[int(row)], k))
+
+        update_latencies = []
+        for row in rng.integers(0, n_students, size=n_updates):
+            started = time.perf_counter()
+            index.upsert(ids[row], np.clip(vectors[row] + rng.normal(0, 5, size=n_subjects), 0, 100))
+            update_latencies.append(time.perf_counter() - started)
+
+        # Queries right after the updates include the buffer of changed rows.
+        post_update_latencies = []
+        for row in query_rows[: max(1, n_queries // 4)]:
+            started = time.perf_counter()
+            index.query(vectors[row], k=k, exclude_id=ids[row])
+            post_update_latencies.append(time.perf_counter() - started)
+
+        report["indexes"][kind] = {
+            "build_seconds": round(build_seconds, 4),
+            f"recall_at_{k}": round(float(np.mean(recalls)), 4),
+            "query_p50_ms": round(percentile_ms(latencies, 50), 4),
+            "query_p99_ms": round(percentile_ms(latencies, 99), 4),
+            "upsert_p50_ms": round(percentile_ms(update_latencies, 50), 4) if update_latencies else None,
+            "post_update_query_p99_ms": round(percentile_ms(post_update_latencies, 99), 4),
+            "stats": index.get_stats(),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--subjects", type=int, default=3, help="Vector dimensions; the exam model defines three subjects")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--indexes", nargs="+", default=list(NEIGHBOR_INDEX_KINDS), choices=NEIGHBOR_INDEX_KINDS)
+    parser.add_argument("--json", help="Write the full report to this path")
+    args = parser.parse_args()
+
+    reports = []
+    print(f"{'students':>10} {'index':>9} {'build s':>9} {'recall@' + str(args.k):>9} {'p50 ms':>9} {'p99 ms':>9} {'upsert ms':>10}")
+    for size in args.sizes:
+        report = benchmark_size(size, args.subjects, args.queries, args.updates, args.k, args.indexes)
+        reports.append(report)
+        for kind, result in report["indexes"].items():
+            print(
+                f"{size:>10} {kind:>9} {result['build_seconds']:>9.3f} {result[f'recall_at_{args.k}']:>9.3f} "
+                f"{result['query_p50_ms']:>9.3f} {result['query_p99_ms']:>9.3f} {result['upsert_p50_ms'] or 0:>10.4f}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(reports, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
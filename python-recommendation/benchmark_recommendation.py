@@ -0,0 +1,467 @@
+"""Benchmark main.analyze_submission against synthetic recommender bundles of growing size.
+
+Each size gets a bundle with the same keys as hybrid_recommender.pkl: solutions with the
+notebook's columns plus subject/topic/difficulty, student ratings, solution and student similarity,
+and the scoring params. Similarity comes from topic-structured embeddings, so solutions of the same
+problem and topic are close and the rest fall off, and is stored as top-k neighbour lists in the
+columnar bundle format (a dense matrix at 100k solutions would need 80 GB).
+
+Every size runs in its own child process that imports main against that bundle, so load time and
+peak RSS belong to that size alone. The child sends a fixed mix of payloads through
+analyze_submission and reports p50/p99 latency, per-stage time (stages are timed inclusive of the
+stages they call), allocation peaks per request, load time and RSS. The JSON report can be
+compared with a stored one; --max-regression makes the run fail when a size got slower or larger.
+
+    python benchmark_recommendation.py --sizes 1000 10000 100000 --json recommendation_benchmark.json
+    python benchmark_recommendation.py --baseline recommendation_benchmark.json --max-regression 0.2
+    python benchmark_recommendation.py --bundle-dir /tmp/bundles --sizes 100000   # reuses generated bundles
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import psutil
+
+from bundle_format import MANIFEST_NAME, export_columnar_bundle
+from recommender_utils import COMPLEXITY_CLASSES, calculate_overall_score_array, calculate_s_space_array, calculate_s_time_array
+
+SUBJECTS = ["DSA", "Aptitude", "Computer Science"]
+LANGUAGES = ["Python", "Java", "C++", "JavaScript"]
+TOPICS = [
+    "arrays", "strings", "hashing", "two pointers", "sliding window", "binary search", "sorting", "stacks",
+    "queues", "linked lists", "trees", "binary search trees", "heaps", "graphs", "breadth first search",
+    "depth first search", "shortest paths", "union find", "greedy", "recursion", "backtracking",
+    "dynamic programming", "bit manipulation", "math", "probability", "percentages", "ratios",
+    "time and work", "operating systems", "dbms", "networks", "oops",
+]
+APPROACHES = ["Brute Force", "Hash Map", "Two Pointers", "Memoization", "Tabulation", "Greedy", "Divide and Conquer"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+PARAMS = {"T_opt": 1.0, "M_opt": 100.0, "alpha": 0.5, "beta": 0.5, "W_time": 0.6, "W_space": 0.4}
+EMBEDDING_NOISE_DIMENSIONS = 16
+COMPLEXITY_SIZES = 8 * 2 ** np.arange(10.0)
+
+# Functions analyze_submission calls, timed per request in the child process.
+STAGES = [
+    "build_submission_signal_profile",
+    "extract_history_profile",
+    "build_model_score_profile",
+    "extract_content_recommendations",
+    "extract_model_insights",
+]
+
+
+class NeighborLists:
+    """Top-k neighbour lists in the CSR layout export_columnar_bundle writes"""
+
+    def __init__(self, labels: List[str], indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def topic_embeddings(topic_codes: np.ndarray, secondary_codes: np.ndarray, rng: np.random.Generator, noise: float) -> np.ndarray:
+    embeddings = np.zeros((len(topic_codes), len(TOPICS) + EMBEDDING_NOISE_DIMENSIONS), dtype=np.float32)
+    rows = np.arange(len(topic_codes))
+    embeddings[rows, topic_codes] = 1.0
+    embeddings[rows, secondary_codes] += 0.5
+    embeddings += rng.normal(0.0, noise, size=embeddings.shape).astype(np.float32)
+    return embeddings
+
+
+def top_k_neighbors(embeddings: np.ndarray, labels: List[str], k: int, block_rows: int = 2048) -> NeighborLists:
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    count = len(normalized)
+    k = max(1, min(k, count))
+    indices = np.zeros((count, k), dtype=np.int32)
+    scores = np.zeros((count, k), dtype=np.float32)
+    # Blocks of rows against all columns, so the full n x n matrix never exists at once.
+    for start in range(0, count, block_rows):
+        block = normalized[start:start + block_rows] @ normalized.T
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k] if k < count else np.tile(np.arange(count), (len(block), 1))
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        indices[start:start + block_rows] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + block_rows] = np.take_along_axis(top_scores, order, axis=1)
+    indptr = np.arange(count + 1, dtype=np.int64) * k
+    return NeighborLists(labels, indptr, indices.reshape(-1), scores.reshape(-1))
+
+
+def synthetic_bundle(n_solutions: int, n_ratings: int, top_k: int = 32, seed: int = 42) -> tuple:
+    rng = np.random.default_rng(seed)
+    # A problem has a few solutions (languages, approaches); similarity follows the problem's topics.
+    n_problems = max(1, n_solutions // 3)
+    problem_topics = rng.integers(0, len(TOPICS), n_problems)
+    problem_secondary = rng.integers(0, len(TOPICS), n_problems)
+    problems = np.sort(rng.integers(0, n_problems, n_solutions))
+    languages = rng.integers(0, len(LANGUAGES), n_solutions)
+    topic_codes, secondary_codes = problem_topics[problems], problem_secondary[problems]
+    topic_names, secondary_names = np.asarray(TOPICS, dtype=object)[topic_codes], np.asarray(TOPICS, dtype=object)[secondary_codes]
+
+    execution_ms = rng.lognormal(3.0, 0.9, n_solutions).round(2)
+    memory_mb = rng.lognormal(3.0, 0.5, n_solutions).round(2)
+    s_time = calculate_s_time_array(PARAMS["T_opt"], execution_ms / 1000.0, PARAMS["alpha"])
+    s_space = calculate_s_space_array(PARAMS["M_opt"], memory_mb, PARAMS["beta"])
+    solution_ids = [f"OPT_P{problem:06d}_{LANGUAGES[language][:2].upper()}{index}" for index, (problem, language) in enumerate(zip(problems, languages))]
+    solutions_df = pd.DataFrame({
+        "OptSolutionID": solution_ids,
+        "Title": [f"{topic.title()} Problem {problem}" for topic, problem in zip(topic_names, problems)],
+        "Language": np.asarray(LANGUAGES, dtype=object)[languages],
+        "ApproachName": np.asarray(APPROACHES, dtype=object)[rng.integers(0, len(APPROACHES), n_solutions)],
+        "ReasonForOptimization": [f"Uses {topic} to cut repeated work" for topic in topic_names],
+        "AvgExecutionTime_ms": execution_ms,
+        "AvgMemoryUsage_MB": memory_mb,
+        "T_sub_seconds": execution_ms / 1000.0,
+        "S_time": s_time,
+        "S_space": s_space,
+        "OS": calculate_overall_score_array(s_time, s_space, PARAMS["W_time"], PARAMS["W_space"]),
+        "subject": np.asarray(SUBJECTS, dtype=object)[topic_codes * len(SUBJECTS) // len(TOPICS)],
+        "topic": [f"{topic} | {secondary}" for topic, secondary in zip(topic_names, secondary_names)],
+        "difficulty": np.asarray(DIFFICULTIES, dtype=object)[rng.integers(0, len(DIFFICULTIES), n_solutions)],
+    })
+    solution_embeddings = topic_embeddings(topic_codes, secondary_codes, rng, noise=0.15)
+    # Solutions of one problem share most of their embedding.
+    solution_embeddings[:, len(TOPICS):] += rng.normal(0.0, 0.6, size=(n_problems, EMBEDDING_NOISE_DIMENSIONS)).astype(np.float32)[problems]
+
+    # Students favour two topics; most of their ratings land there and rate higher.
+    n_students = max(50, n_ratings // 20)
+    student_topics = rng.integers(0, len(TOPICS), (n_students, 2))
+    raters = rng.integers(0, n_students, n_ratings)
+    favourite = rng.random(n_ratings) < 0.7
+    rated_topics = np.where(favourite, student_topics[raters, rng.integers(0, 2, n_ratings)], rng.integers(0, len(TOPICS), n_ratings))
+    # A random solution of each rated topic, or of any topic when the bundle has none for it.
+    by_topic = np.argsort(topic_codes, kind="stable")
+    topic_counts = np.bincount(topic_codes, minlength=len(TOPICS))
+    topic_starts = np.concatenate([[0], np.cumsum(topic_counts)[:-1]])
+    offsets = (rng.random(n_ratings) * topic_counts[rated_topics]).astype(np.int64)
+    rated = np.where(
+        topic_counts[rated_topics] > 0,
+        by_topic[np.minimum(topic_starts[rated_topics] + offsets, n_solutions - 1)],
+        rng.integers(0, n_solutions, n_ratings),
+    )
+    ratings = np.clip(np.round(rng.normal(np.where(favourite, 3.8, 2.6), 0.9)), 1, 5).astype(np.int64)
+    student_ids = [f"student-{index}" for index in range(n_students)]
+    user_ratings_df = pd.DataFrame({
+        "user_id": np.asarray(student_ids, dtype=object)[raters],
+        "OptSolutionID": np.asarray(solution_ids, dtype=object)[rated],
+        "rating": ratings,
+        "subject": solutions_df["subject"].to_numpy()[rated],
+    })
+    student_embeddings = topic_embeddings(student_topics[:, 0], student_topics[:, 1], rng, noise=0.3)
+
+    bundle = {
+        "solutions_df": solutions_df,
+        "user_ratings_df": user_ratings_df,
+        "solution_similarity_df_conceptual": pd.DataFrame(),
+        "user_similarity_df_conceptual": pd.DataFrame(),
+        "params": dict(PARAMS),
+    }
+    neighbors = {
+        "solution_similarity_df_conceptual": top_k_neighbors(solution_embeddings, solution_ids, top_k),
+        "user_similarity_df_conceptual": top_k_neighbors(student_embeddings, student_ids, top_k),
+    }
+    return bundle, neighbors, n_students
+
+
+def ensure_bundle(bundle_root: str, n_solutions: int, n_ratings: int, top_k: int, seed: int) -> Dict[str, Any]:
+    bundle_dir = os.path.join(bundle_root, f"synthetic-{n_solutions}-{n_ratings}-k{top_k}-seed{seed}")
+    info_path = os.path.join(bundle_dir, "synthetic.json")
+    if os.path.exists(os.path.join(bundle_dir, MANIFEST_NAME)) and os.path.exists(info_path):
+        with open(info_path) as info_file:
+            return {**json.load(info_file), "bundle_dir": bundle_dir, "generated": False}
+
+    started = time.perf_counter()
+    bundle, neighbors, n_students = synthetic_bundle(n_solutions, n_ratings, top_k, seed)
+    manifest = export_columnar_bundle(bundle, neighbors, bundle_dir, include_dense=False)
+    info = {
+        "solutions": n_solutions,
+        "ratings": n_ratings,
+        "students": n_students,
+        "top_k": top_k,
+        "seed": seed,
+        "bundle_mb": round(sum(item["size"] for item in manifest["files"].values()) / (1024 * 1024), 1),
+        "generate_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(info_path, "w") as info_file:
+        json.dump(info, info_file)
+    return {**info, "bundle_dir": bundle_dir, "generated": True}
+
+
+def synthetic_payloads(count: int, n_students: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for index in range(count):
+        # Students the bundle knows and ones it does not; known and unknown subjects and languages.
+        student = f"student-{rng.integers(0, n_students)}" if rng.random() < 0.8 else f"new-student-{index}"
+        subject = rng.choice(SUBJECTS + ["dsa", "Computer_Science", "Discrete Math"], p=[0.3, 0.25, 0.25, 0.08, 0.06, 0.06])
+        questions = []
+        for question_index in range(int(rng.integers(1, 4))):
+            total = int(rng.integers(3, 12))
+            passed = int(rng.integers(0, total + 1))
+            question = {
+                "sectionIndex": 0,
+                "questionIndex": question_index,
+                "language": str(rng.choice(LANGUAGES + ["Go"])).lower(),
+                "passedCount": passed,
+                "totalCount": total,
+                "visiblePassedCount": min(passed, 2),
+                "visibleTotalCount": 2,
+                "hiddenPassedCount": max(0, passed - 2),
+                "hiddenTotalCount": total - 2,
+                "errors": ["Traceback: IndexError"] if rng.random() < 0.2 else [],
+                "averageExecutionTimeMs": float(rng.lognormal(4.0, 1.0)),
+                "maxMemoryKb": float(rng.lognormal(9.5, 0.7)),
+            }
+            if rng.random() < 0.3:
+                # Raw measurements as estimate_complexity reports them; the service refits them.
+                time_class, memory_class = str(rng.choice(["n", "n log n", "n^2"])), str(rng.choice(["1", "n"]))
+                noise = rng.lognormal(0.0, 0.03, (2, len(COMPLEXITY_SIZES)))
+                question["complexity"] = {
+                    "sizes": COMPLEXITY_SIZES.tolist(),
+                    "seconds": (1e-7 * COMPLEXITY_CLASSES[time_class](COMPLEXITY_SIZES) * noise[0]).tolist(),
+                    "memory_bytes": (512 + 64 * COMPLEXITY_CLASSES[memory_class](COMPLEXITY_SIZES) * noise[1]).tolist(),
+                    "time": {"class": time_class},
+                    "memory": {"class": memory_class},
+                }
+            questions.append(question)
+        payloads.append({
+            "studentId": student,
+            "subject": str(subject),
+            "percentage": float(rng.integers(10, 100)),
+            "timeTaken": float(rng.integers(300, 3600)),
+            "studentHistory": [
+                {"subject": str(rng.choice(SUBJECTS)), "percentage": float(rng.integers(20, 100))}
+                for _ in range(int(rng.integers(0, 6)))
+            ],
+            "codingQuestions": questions,
+        })
+    return payloads
+
+
+def peak_rss_mb() -> float:
+    # VmHWM starts over at exec; ru_maxrss on Linux carries over the parent's peak from before the fork.
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile_ms(samples: List[float], percentile: float) -> float:
+    return round(float(np.percentile(np.asarray(samples) * 1000.0, percentile)), 3)
+
+
+def run_child(bundle_dir: str, n_students: int, n_payloads: int, n_requests: int, warmup: int, memory_requests: int) -> Dict[str, Any]:
+    # Runs in the child process: import main against the bundle and time analyze_submission.
+    os.environ["RECOMMENDER_BUNDLE_DIR"] = bundle_dir
+    os.environ["RECOMMENDER_BUNDLE_FORMAT"] = "columnar"
+    process = psutil.Process()
+    rss_before = process.memory_info().rss / (1024 * 1024)
+    started = time.perf_counter()
+    import main as recommender
+    load_seconds = time.perf_counter() - started
+    if recommender.MODEL_LOAD_ERROR is not None:
+        raise SystemExit(f"Could not load {bundle_dir}: {recommender.MODEL_LOAD_ERROR}")
+    rss_after_load = process.memory_info().rss / (1024 * 1024)
+
+    stage_seconds: Dict[str, float] = {}
+
+    def timed(name: str, function: Any) -> Any:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            stage_started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stage_seconds[name] = stage_seconds.get(name, 0.0) + time.perf_counter() - stage_started
+        return wrapper
+
+    for stage in STAGES:
+        setattr(recommender, stage, timed(stage, getattr(recommender, stage)))
+
+    payloads = synthetic_payloads(n_payloads, n_students)
+    first_request_seconds = None
+    for index in range(warmup):
+        request_started = time.perf_counter()
+        recommender.analyze_submission(payloads[index % len(payloads)])
+        if first_request_seconds is None:
+            first_request_seconds = time.perf_counter() - request_started
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for index in range(n_requests):
+        stage_seconds.clear()
+        request_started = time.perf_counter()
+        recommender.analyze_submission(payloads[(warmup + index) % len(payloads)])
+        latencies.append(time.perf_counter() - request_started)
+        for stage in STAGES:
+            stages[stage].append(stage_seconds.get(stage, 0.0))
+
+    # Allocation peaks are traced on a separate pass; tracemalloc would distort the timings.
+    allocation_peaks = []
+    tracemalloc.start()
+    for index in range(memory_requests):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        recommender.analyze_submission(payloads[index % len(payloads)])
+        allocation_peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    tracemalloc.stop()
+
+    return {
+        "load_seconds": round(load_seconds, 3),
+        "requests": n_requests,
+        "first_request_ms": round(first_request_seconds * 1000.0, 3) if first_request_seconds is not None else None,
+        "p50_ms": percentile_ms(latencies, 50),
+        "p99_ms": percentile_ms(latencies, 99),
+        "mean_ms": round(float(np.mean(latencies)) * 1000.0, 3),
+        "requests_per_second": round(n_requests / sum(latencies), 1),
+        "stages": {
+            stage: {"p50_ms": percentile_ms(samples, 50), "p99_ms": percentile_ms(samples, 99), "mean_ms": round(float(np.mean(samples)) * 1000.0, 3)}
+            for stage, samples in stages.items()
+        },
+        "request_peak_alloc_kb_p50": round(float(np.median(allocation_peaks)), 1) if allocation_peaks else None,
+        "request_peak_alloc_kb_max": round(float(np.max(allocation_peaks)), 1) if allocation_peaks else None,
+        "rss_before_import_mb": round(rss_before, 1),
+        "rss_after_load_mb": round(rss_after_load, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def benchmark_size(bundle: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    # One child per size, so module-level state and ru_maxrss start fresh.
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", bundle["bundle_dir"],
+        "--students", str(bundle["students"]), "--payloads", str(args.payloads), "--requests", str(args.requests),
+        "--warmup", str(args.warmup), "--memory-requests", str(args.memory_requests),
+    ]
+    completed = subprocess.run(command, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"Benchmark child for {bundle['solutions']} solutions failed:\n{completed.stderr.strip()}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "solutions": bundle["solutions"],
+        "ratings": bundle["ratings"],
+        "students": bundle["students"],
+        "top_k": bundle["top_k"],
+        "bundle_mb": bundle["bundle_mb"],
+        "generate_seconds": bundle["generate_seconds"],
+        **result,
+    }
+
+
+COMPARED_METRICS = ("p50_ms", "p99_ms", "peak_rss_mb", "load_seconds")
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> List[str]:
+    """Print each size's change against the baseline; returns the regressions past max_regression"""
+    baseline_sizes = {(entry["solutions"], entry["ratings"]): entry for entry in baseline.get("sizes", [])}
+    regressions = []
+    print(f"\nagainst {baseline.get('created_at', 'baseline')}:")
+    if baseline.get("settings") != report["settings"]:
+        print(f"  settings differ from the baseline's {baseline.get('settings')}; latencies are not directly comparable")
+    for entry in report["sizes"]:
+        previous = baseline_sizes.get((entry["solutions"], entry["ratings"]))
+        if previous is None:
+            print(f"  {entry['solutions']:>8} solutions: not in baseline")
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            if not previous.get(metric):
+                continue
+            change = entry[metric] / previous[metric] - 1.0
+            changes.append(f"{metric} {change:+.1%}")
+            if max_regression is not None and change > max_regression:
+                regressions.append(f"{entry['solutions']} solutions: {metric} {previous[metric]} -> {entry[metric]} ({change:+.1%})")
+        print(f"  {entry['solutions']:>8} solutions: {', '.join(changes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Solutions per bundle")
+    parser.add_argument("--ratings-per-solution", type=float, default=1.0)
+    parser.add_argument("--top-k", type=int, default=32, help="Neighbours stored per similarity row")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--payloads", type=int, default=200, help="Distinct payloads, cycled through the requests")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memory-requests", type=int, default=50, help="Requests traced for allocation peaks")
+    parser.add_argument("--bundle-dir", help="Keep generated bundles here and reuse them on later runs")
+    parser.add_argument("--json", help="Write the results to this path")
+    parser.add_argument("--baseline", help="Earlier --json report to compare with")
+    parser.add_argument("--max-regression", type=float, help="Exit with status 1 when a compared metric grew by more than this fraction")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--students", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.students, args.payloads, args.requests, args.warmup, args.memory_requests)))
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "ratings_per_solution": args.ratings_per_solution,
+            "top_k": args.top_k,
+            "seed": args.seed,
+            "payloads": args.payloads,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as temporary_root:
+        bundle_root = args.bundle_dir or temporary_root
+        print(f"{'solutions':>10} {'ratings':>9} {'bundle MB':>10} {'load s':>8} {'first ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'peak RSS MB':>12}")
+        for size in args.sizes:
+            bundle = ensure_bundle(bundle_root, size, int(size * args.ratings_per_solution), args.top_k, args.seed)
+            entry = benchmark_size(bundle, args)
+            report["sizes"].append(entry)
+            print(
+                f"{entry['solutions']:>10} {entry['ratings']:>9} {entry['bundle_mb']:>10.1f} {entry['load_seconds']:>8.2f} "
+                f"{entry['first_request_ms'] or 0:>9.2f} {entry['p50_ms']:>8.3f} {entry['p99_ms']:>8.3f} "
+                f"{entry['requests_per_second']:>8.0f} {entry['peak_rss_mb']:>12.1f}"
+            )
+            slowest = sorted(entry["stages"].items(), key=lambda item: item[1]["mean_ms"], reverse=True)
+            print("           " + ", ".join(f"{stage} {stats['p50_ms']:.3f}/{stats['p99_ms']:.3f} ms" for stage, stats in slowest))
+
+    if args.json:
+        with open(args.json, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    if baseline is not None:
+        regressions = compare_with_baseline(report, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions past the allowed " + f"{args.max_regression:.0%}:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark optimality scoring: the notebook's row-wise df.apply against the vectorized path.
+
+Scores the same synthetic submissions both ways and checks that they agree, then runs
+score_submissions.py in a child process on a generated file, once in --chunk-rows chunks and once
+as a single chunk, and reports each run's time and peak RSS.
+
+    python benchmark_scoring.py --rows 1000000 --apply-rows 200000
+    python benchmark_scoring.py --rows 5000000 --format parquet --json scoring_benchmark.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from recommender_utils import calculate_overall_score, calculate_s_space, calculate_s_time
+from score_submissions import SCORE_COLUMNS, ChunkWriter, score_frame
+
+T_OPT, M_OPT, ALPHA, BETA, W_TIME, W_SPACE = 1.0, 100.0, 0.5, 0.5, 0.6, 0.4
+
+
+def synthetic_submissions(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # Log-normal run times and memory, with a few zero measurements to exercise the zero rule.
+    times = rng.lognormal(mean=0.0, sigma=0.8, size=n_rows)
+    memory = rng.lognormal(mean=4.5, sigma=0.6, size=n_rows)
+    times[rng.random(n_rows) < 0.001] = 0.0
+    memory[rng.random(n_rows) < 0.001] = 0.0
+    return pd.DataFrame({
+        'OptSolutionID': np.arange(n_rows),
+        'Language': rng.choice(['python', 'java', 'cpp', 'javascript'], size=n_rows),
+        'T_sub_seconds': times.round(6),
+        'AvgMemoryUsage_MB': memory.round(3),
+    })
+
+
+def score_with_apply(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.copy()
+    frame['S_time'] = frame.apply(lambda row: calculate_s_time(T_OPT, row['T_sub_seconds'], ALPHA), axis=1)
+    frame['S_space'] = frame.apply(lambda row: calculate_s_space(M_OPT, row['AvgMemoryUsage_MB'], BETA), axis=1)
+    frame['OS'] = frame.apply(lambda row: calculate_overall_score(row['S_time'], row['S_space'], W_TIME, W_SPACE), axis=1)
+    return frame
+
+
+def compare_in_memory(n_rows: int) -> Dict[str, Any]:
+    frame = synthetic_submissions(n_rows)
+    started = time.perf_counter()
+    applied = score_with_apply(frame)
+    apply_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    vectorized = score_frame(frame, T_OPT, M_OPT, ALPHA, BETA, W_TIME, W_SPACE)
+    vectorized_seconds = time.perf_counter() - started
+
+    max_difference = max(float(np.max(np.abs(applied[column].to_numpy() - vectorized[column].to_numpy()))) for column in SCORE_COLUMNS)
+    return {
+        'rows': n_rows,
+        'apply_seconds': round(apply_seconds, 3),
+        'vectorized_seconds': round(vectorized_seconds, 4),
+        'speedup': round(apply_seconds / vectorized_seconds, 1),
+        'max_abs_difference': max_difference,
+    }
+
+
+def write_input_file(path: str, n_rows: int, chunk_rows: int = 500000):
+    writer = ChunkWriter(path)
+    for start in range(0, n_rows, chunk_rows):
+        chunk = synthetic_submissions(min(chunk_rows, n_rows - start), seed=start)
+        chunk['OptSolutionID'] += start
+        writer.write(chunk)
+    writer.close()
+
+
+def run_cli(input_path: str, output_path: str, chunk_rows: int) -> Dict[str, Any]:
+    # One child per run, so ru_maxrss is that run's own high-water mark.
+    script = (
+        "import json, resource\n"
+        "from score_submissions import score_file\n"
+        f"report = score_file({input_path!r}, {output_path!r}, chunk_rows={chunk_rows})\n"
+        "report['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024\n"
+        "print(json.dumps(report))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    report['peak_rss_mb'] = round(report['peak_rss_mb'], 1)
+    report['chunk_rows'] = chunk_rows
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows in the generated file for the streaming runs')
+    parser.add_argument('--apply-rows', type=int, default=200000, help='Rows for the df.apply comparison')
+    parser.add_argument('--chunk-rows', type=int, default=250000)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--json', help='Write the results to this path')
+    args = parser.parse_args()
+
+    in_memory = compare_in_memory(args.apply_rows)
+    print(
+        f"{in_memory['rows']} rows: df.apply {in_memory['apply_seconds']:.2f}s, vectorized {in_memory['vectorized_seconds'] * 1000:.1f}ms "
+        f"({in_memory['speedup']:.0f}x), max |difference| {in_memory['max_abs_difference']:.2e}"
+    )
+
+    streaming = []
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, f"submissions.{args.format}")
+        output_path = os.path.join(directory, f"scored.{args.format}")
+        write_input_file(input_path, args.rows)
+        print(f"{args.rows} rows in {args.format} ({os.path.getsize(input_path) / (1024 * 1024):.0f} MB)")
+        for chunk_rows in (args.chunk_rows, args.rows):
+            report = run_cli(input_path, output_path, chunk_rows)
+            streaming.append(report)
+            print(f"  chunk rows {chunk_rows:>9}: {report['seconds']:>7.2f}s, {report['chunks']:>4} chunks, peak RSS {report['peak_rss_mb']:>7.1f} MB")
+
+    if args.json:
+        with open(args.json, 'w') as report_file:
+            json.dump({'in_memory': in_memory, 'format': args.format, 'streaming': streaming}, report_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Columnar on-disk format for the hybrid recommender bundle.
+
+A bundle directory holds a JSON manifest, Parquet files for the DataFrames and .npy
+files for the similarity data, so every worker can memory-map the arrays and share
+them through the page cache instead of unpickling a private copy.
+
+    python bundle_format.py export --source hybrid_recommender.pkl --output hybrid_recommender_bundle
+    python bundle_format.py verify --bundle hybrid_recommender_bundle
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+FRAME_KEYS = ("solutions_df", "user_ratings_df")
+SIMILARITY_KEYS = {
+    "solution_similarity_df_conceptual": "solution_similarity",
+    "user_similarity_df_conceptual": "user_similarity",
+}
+
+
+class BundleFormatError(Exception):
+    pass
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _json_default(value: Any):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _write_json(path: str, value: Any):
+    with open(path, "w") as handle:
+        json.dump(value, handle, default=_json_default)
+
+
+def _read_json(path: str) -> Any:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def export_columnar_bundle(bundle: Dict[str, Any], neighbors: Dict[str, Any], output_dir: str, include_dense: bool = True) -> Dict[str, Any]:
+    """Write bundle frames, top-k neighbour lists and (optionally) dense matrices to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    files: Dict[str, str] = {}
+
+    def add_file(name: str) -> str:
+        files[name] = os.path.join(output_dir, name)
+        return files[name]
+
+    for key in FRAME_KEYS:
+        frame = bundle.get(key)
+        if isinstance(frame, pd.DataFrame):
+            frame.to_parquet(add_file(f"{key}.parquet"))
+
+    for key, stem in SIMILARITY_KEYS.items():
+        neighbor_lists = neighbors.get(key)
+        if neighbor_lists is not None and len(neighbor_lists):
+            _write_json(add_file(f"{stem}.labels.json"), list(neighbor_lists.labels))
+            np.save(add_file(f"{stem}.indptr.npy"), np.asarray(neighbor_lists.indptr, dtype=np.int64))
+            np.save(add_file(f"{stem}.indices.npy"), np.asarray(neighbor_lists.indices, dtype=np.int32))
+            np.save(add_file(f"{stem}.scores.npy"), np.asarray(neighbor_lists.scores, dtype=np.float32))
+
+        dense = bundle.get(key)
+        if include_dense and isinstance(dense, pd.DataFrame) and not dense.empty:
+            np.save(add_file(f"{stem}.dense.npy"), dense.to_numpy())
+            _write_json(add_file(f"{stem}.dense_axes.json"), {"index": list(dense.index), "columns": list(dense.columns)})
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "keys": list(bundle.keys()),
+        "params": bundle.get("params", {}),
+        "neighbor_top_k": {key: int(neighbors[key].indptr[1] - neighbors[key].indptr[0]) if key in neighbors and len(neighbors[key]) else 0 for key in SIMILARITY_KEYS},
+        "files": {
+            name: {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+            for name, path in files.items()
+        },
+    }
+    # The manifest is written last so a partially exported directory is never picked up.
+    _write_json(os.path.join(output_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def verify_columnar_bundle(bundle_dir: str, manifest: Optional[Dict[str, Any]] = None, checksums: bool = True):
+    manifest = manifest or _read_json(os.path.join(bundle_dir, MANIFEST_NAME))
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise BundleFormatError(f"Unsupported bundle format version {manifest.get('format_version')}")
+    for name, expected in manifest.get("files", {}).items():
+        path = os.path.join(bundle_dir, name)
+        if not os.path.isfile(path):
+            raise BundleFormatError(f"Bundle file missing: {name}")
+        if os.path.getsize(path) != expected["size"]:
+            raise BundleFormatError(f"Bundle file size mismatch: {name}")
+        if checksums and file_sha256(path) != expected["sha256"]:
+            raise BundleFormatError(f"Bundle file checksum mismatch: {name}")
+    return manifest
+
+
+def load_columnar_bundle(bundle_dir: str, load_dense: bool = False, verify_checksums: bool = False) -> Dict[str, Any]:
+    """Load a bundle directory; arrays are memory-mapped read-only"""
+    manifest = verify_columnar_bundle(bundle_dir, checksums=verify_checksums)
+    files = manifest.get("files", {})
+
+    def path_of(name: str) -> str:
+        return os.path.join(bundle_dir, name)
+
+    bundle: Dict[str, Any] = {key: None for key in manifest.get("keys", [])}
+    bundle["params"] = manifest.get("params", {})
+
+    for key in FRAME_KEYS:
+        name = f"{key}.parquet"
+        if name in files:
+            bundle[key] = pd.read_parquet(path_of(name))
+
+    for key, stem in SIMILARITY_KEYS.items():
+        if f"{stem}.indptr.npy" in files:
+            bundle[f"{stem}_neighbors"] = {
+                "labels": _read_json(path_of(f"{stem}.labels.json")),
+                "indptr": np.load(path_of(f"{stem}.indptr.npy"), mmap_mode="r"),
+                "indices": np.load(path_of(f"{stem}.indices.npy"), mmap_mode="r"),
+                "scores": np.load(path_of(f"{stem}.scores.npy"), mmap_mode="r"),
+            }
+        if load_dense and f"{stem}.dense.npy" in files:
+            axes = _read_json(path_of(f"{stem}.dense_axes.json"))
+            values = np.load(path_of(f"{stem}.dense.npy"), mmap_mode="r")
+            bundle[key] = pd.DataFrame(values, index=axes["index"], columns=axes["columns"], copy=False)
+
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Convert a pickled bundle to the columnar format")
+    export_parser.add_argument("--source", help="Pickled bundle to convert (defaults to MODEL_PATH in main.py)")
+    export_parser.add_argument("--output", help="Output directory (defaults to RECOMMENDER_BUNDLE_DIR in main.py)")
+    export_parser.add_argument("--top-k", type=int, help="Neighbours kept per similarity row (defaults to SIMILARITY_TOP_K)")
+    export_parser.add_argument("--no-dense", action="store_true", help="Skip the dense similarity matrices")
+
+    verify_parser = subparsers.add_parser("verify", help="Check sizes and checksums of a bundle directory")
+    verify_parser.add_argument("--bundle", help="Bundle directory (defaults to RECOMMENDER_BUNDLE_DIR in main.py)")
+    args = parser.parse_args()
+
+    # main loads its bundle at import; force the pickle path and keep the dense frames for export.
+    os.environ["RECOMMENDER_BUNDLE_FORMAT"] = "pickle"
+    os.environ["KEEP_DENSE_SIMILARITY"] = "1"
+    if getattr(args, "source", None):
+        os.environ["RECOMMENDER_MODEL_PATH"] = os.path.abspath(args.source)
+    if getattr(args, "top_k", None):
+        os.environ["SIMILARITY_TOP_K"] = str(args.top_k)
+    import main as recommender
+
+    if args.command == "verify":
+        bundle_dir = args.bundle or recommender.BUNDLE_DIR
+        manifest = verify_columnar_bundle(bundle_dir)
+        print(f"{bundle_dir}: {len(manifest['files'])} files verified")
+        return
+
+    if recommender.MODEL_LOAD_ERROR is not None:
+        raise SystemExit(f"Could not load {recommender.MODEL_PATH}: {recommender.MODEL_LOAD_ERROR}")
+
+    output_dir = args.output or recommender.BUNDLE_DIR
+    manifest = export_columnar_bundle(
+        recommender.RECOMMENDER_BUNDLE,
+        {
+            "solution_similarity_df_conceptual": recommender.SOLUTION_NEIGHBORS,
+            "user_similarity_df_conceptual": recommender.USER_NEIGHBORS,
+        },
+        output_dir,
+        include_dense=not args.no_dense,
+    )
+    total_bytes = sum(item["size"] for item in manifest["files"].values())
+    print(f"Exported {len(manifest['files'])} files ({total_bytes / (1024 * 1024):.1f} MB) to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
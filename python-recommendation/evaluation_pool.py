@@ -0,0 +1,378 @@
+"""Evaluation of submitted Python code in a pool of reusable, resource-limited worker processes.
+
+Workers are forked from a fork server that has already imported numpy and recommender_utils, so
+a replacement is ready in milliseconds rather than paying for a fresh interpreter per submission.
+Each worker runs many submissions and is replaced after max_runs_per_worker runs, when its RSS
+grows past recycle_rss_mb, or after a submission fails in a way that may have left it damaged.
+Every submission runs under RLIMIT_CPU and RLIMIT_AS, and the parent kills a worker that exceeds
+the wall-clock timeout. estimate_complexity runs one submission over generated inputs of growing
+size inside the same limits and fits its growth class.
+
+The limits contain runaway or greedy code; they are not a security boundary. There is no
+filesystem, network or syscall isolation, and a submission can change module state that later
+submissions on the same worker see until the worker is recycled.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import resource
+import signal
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import psutil
+
+from recommender_utils import estimate_complexity, evaluate_user_code
+
+logger = logging.getLogger(__name__)
+
+WORKER_PRELOAD_MODULES = ['numpy', 'recommender_utils']
+
+# Built-in inputs for complexity estimation: each returns the positional arguments for size n.
+INPUT_GENERATORS = {
+    'int': lambda n, rng: (n,),
+    'list': lambda n, rng: (rng.integers(0, max(n, 1), n).tolist(),),
+    'sorted_list': lambda n, rng: (np.sort(rng.integers(0, max(n, 1), n)).tolist(),),
+    'string': lambda n, rng: (''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), n)),),
+}
+
+
+class EvaluationPoolBusy(Exception):
+    """No worker became free within the queue timeout; the caller should retry later"""
+
+    def __init__(self, message: str, retry_after_seconds: int = 1):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class SubmissionError(Exception):
+    """The submission raised, or was stopped by a limit ('error', 'timeout', 'cpu_limit', 'memory_limit', 'crashed')"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _transportable(value: Any) -> Any:
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        return repr(value)
+
+
+def _load_function(source: str, function_name: str, filename: str = '<submission>'):
+    namespace = {'__name__': '__submission__'}
+    exec(compile(source, filename, 'exec'), namespace)
+    function = namespace.get(function_name)
+    if not callable(function):
+        raise NameError(f"{filename} does not define a function named {function_name!r}")
+    return function
+
+
+def _estimate_submission_complexity(task: Dict[str, Any]) -> Dict[str, Any]:
+    function = _load_function(task['source'], task['function_name'])
+    if task['input_source'] is not None:
+        make_input = _load_function(task['input_source'], 'make_input', '<input generator>')
+    else:
+        generator, rng = INPUT_GENERATORS[task['input_kind']], np.random.default_rng(task['seed'])
+        make_input = lambda n: generator(n, rng)
+
+    def call_at_size(n: int):
+        args = tuple(make_input(n))
+        return lambda: function(*args)
+
+    estimate = estimate_complexity(call_at_size, task['sizes'], task['time_budget_seconds'], **task['benchmark_options'])
+    estimate['input_kind'] = task['input_kind'] if task['input_source'] is None else 'custom'
+    return estimate
+
+
+def _run_submission(task: Dict[str, Any]) -> Dict[str, Any]:
+    if task.get('kind') == 'complexity':
+        return _estimate_submission_complexity(task)
+    function = _load_function(task['source'], task['function_name'])
+    args, kwargs = task['args'], task['kwargs']
+    evaluation = evaluate_user_code(
+        lambda: function(*args, **kwargs),
+        task['T_opt'], task['M_opt'], task['alpha'], task['beta'], task['W_time'], task['W_space'],
+        **task['benchmark_options'],
+    )
+    evaluation['result'] = _transportable(evaluation['result'])
+    return evaluation
+
+
+def _worker_main(connection, cpu_seconds: int, max_runs: int, address_space_mb: int):
+    # Submissions' output must not end up in the service's logs.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    process = psutil.Process()
+
+    # RLIMIT_CPU counts the whole life of the process and a hard limit can only be lowered, so the
+    # hard limit covers every run this worker may serve and each run raises the soft limit by its share.
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    hard_cpu = int(math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds * max_runs)) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (hard_cpu, hard_cpu))
+    address_space = process.memory_info().vms + address_space_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft_cpu = min(hard_cpu, int(math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)))
+        resource.setrlimit(resource.RLIMIT_CPU, (soft_cpu, hard_cpu))
+
+        try:
+            response = ('ok', _run_submission(task), None)
+        except MemoryError:
+            response = ('memory_limit', 'Memory limit exceeded', None)
+        except BaseException as e:
+            response = ('error', f"{type(e).__name__}: {e}", None)
+        try:
+            connection.send((*response[:2], process.memory_info().rss / (1024 * 1024)))
+        except MemoryError:
+            connection.send(('memory_limit', 'Memory limit exceeded', None))
+
+
+class _Worker:
+    def __init__(self, process: multiprocessing.Process, connection):
+        self.process = process
+        self.connection = connection
+        self.runs = 0
+
+
+class EvaluationWorkerPool:
+    """Pre-forked workers reused across submissions, with per-run limits and recycling"""
+
+    def __init__(self, workers: int = 2, max_runs_per_worker: int = 50, recycle_rss_mb: float = 512.0,
+                 cpu_seconds: int = 10, wall_timeout_seconds: float = 20.0, address_space_mb: int = 1024,
+                 queue_timeout_seconds: float = 5.0):
+        self.workers = workers
+        self.max_runs_per_worker = max_runs_per_worker
+        self.recycle_rss_mb = recycle_rss_mb
+        self.cpu_seconds = cpu_seconds
+        self.wall_timeout_seconds = wall_timeout_seconds
+        self.address_space_mb = address_space_mb
+        self.queue_timeout_seconds = queue_timeout_seconds
+        # Idle workers are reused most recently returned first, so a light load keeps one warm worker;
+        # waiting callers are served oldest first, so a returning caller cannot starve the others.
+        self._idle: List[_Worker] = []
+        self._waiters: deque = deque()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._closed = False
+        self._queue_waits: deque = deque(maxlen=1000)
+        self._busy_seconds = 0.0
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'shed': 0, 'workers_started': 0}
+        self.recycles = {'max_runs': 0, 'memory_growth': 0, 'timeout': 0, 'cpu_limit': 0, 'memory_limit': 0, 'crashed': 0}
+
+        methods = multiprocessing.get_all_start_methods()
+        # Under `python app.py` the workers re-import app.py as __mp_main__; gunicorn and uvicorn do not.
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        if 'forkserver' in methods:
+            self._context.set_forkserver_preload(WORKER_PRELOAD_MODULES)
+
+    def _start_worker(self) -> _Worker:
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_connection, self.cpu_seconds, self.max_runs_per_worker, self.address_space_mb),
+            name='evaluation-worker',
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+        worker = _Worker(process, parent_connection)
+        with self._lock:
+            self._all.add(worker)
+            self.stats['workers_started'] += 1
+        return worker
+
+    def _acquire(self, timeout: float) -> Optional[_Worker]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            waiter = {'ready': threading.Event(), 'worker': None}
+            self._waiters.append(waiter)
+        waiter['ready'].wait(timeout)
+        with self._lock:
+            if waiter['worker'] is None:
+                self._waiters.remove(waiter)
+            return waiter['worker']
+
+    def _release(self, worker: _Worker):
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter['worker'] = worker
+                waiter['ready'].set()
+            else:
+                self._idle.append(worker)
+
+    def start(self):
+        with self._lock:
+            if self._started_at is not None:
+                return
+            self._started_at = time.monotonic()
+        for _ in range(self.workers):
+            self._release(self._start_worker())
+
+    def _stop_worker(self, worker: _Worker):
+        with self._lock:
+            self._all.discard(worker)
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.connection.close()
+
+    def _recycle(self, worker: _Worker, reason: str):
+        self._stop_worker(worker)
+        logger.info(f"Recycled evaluation worker after {worker.runs} runs ({reason})")
+        with self._lock:
+            self.recycles[reason] += 1
+            closed = self._closed
+        if not closed:
+            self._release(self._start_worker())
+
+    def evaluate(self, source: str, function_name: str, args: Sequence[Any] = (), kwargs: Optional[Dict[str, Any]] = None,
+                 T_opt: float = 1.0, M_opt: float = 1.0, alpha: float = 0.5, beta: float = 0.5,
+                 W_time: float = 0.6, W_space: float = 0.4, **benchmark_options: Any) -> Dict[str, Any]:
+        """evaluate_user_code(function_name(*args, **kwargs)) for the function defined by source, in a worker
+
+        The benchmark's max_seconds defaults to half the CPU limit and must stay below both limits, so
+        slow submissions are sampled less rather than killed.
+        """
+        if benchmark_options.get('max_seconds') is None:
+            benchmark_options['max_seconds'] = min(self.cpu_seconds, self.wall_timeout_seconds) / 2
+        if benchmark_options['max_seconds'] >= min(self.cpu_seconds, self.wall_timeout_seconds):
+            raise ValueError(f"max_seconds must be below the {min(self.cpu_seconds, self.wall_timeout_seconds):g}s run limit")
+        return self._run({
+            'source': source, 'function_name': function_name, 'args': tuple(args), 'kwargs': dict(kwargs or {}),
+            'T_opt': T_opt, 'M_opt': M_opt, 'alpha': alpha, 'beta': beta, 'W_time': W_time, 'W_space': W_space,
+            'benchmark_options': benchmark_options,
+        })
+
+    def estimate_complexity(self, source: str, function_name: str, input_kind: str = 'list', input_source: Optional[str] = None,
+                            sizes: Optional[Sequence[int]] = None, time_budget_seconds: Optional[float] = None, seed: int = 0,
+                            **benchmark_options: Any) -> Dict[str, Any]:
+        """recommender_utils.estimate_complexity for function_name over generated inputs, in a worker
+
+        Inputs come from INPUT_GENERATORS[input_kind], or from a make_input(n) function defined by
+        input_source that returns the positional arguments. The budget defaults to half the CPU limit
+        and must leave room under both limits for the last size and the fit.
+        """
+        if input_source is None and input_kind not in INPUT_GENERATORS:
+            raise ValueError(f"Unknown input kind {input_kind!r}; expected one of {', '.join(INPUT_GENERATORS)}")
+        if time_budget_seconds is None:
+            time_budget_seconds = min(self.cpu_seconds, self.wall_timeout_seconds) / 2
+        if time_budget_seconds >= min(self.cpu_seconds, self.wall_timeout_seconds):
+            raise ValueError(f"time_budget_seconds must be below the {min(self.cpu_seconds, self.wall_timeout_seconds):g}s run limit")
+        return self._run({
+            'kind': 'complexity', 'source': source, 'function_name': function_name, 'input_kind': input_kind,
+            'input_source': input_source, 'sizes': list(sizes) if sizes is not None else None,
+            'time_budget_seconds': time_budget_seconds, 'seed': seed, 'benchmark_options': benchmark_options,
+        })
+
+    def _run(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        # Pickle before taking a worker so arguments that cannot cross the pipe never hold one.
+        try:
+            payload = pickle.dumps(task, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise SubmissionError('error', f"Submission arguments cannot be sent to a worker: {type(e).__name__}: {e}")
+        self.start()
+        waiting_since = time.monotonic()
+        worker = self._acquire(self.queue_timeout_seconds)
+        if worker is None:
+            with self._lock:
+                self.stats['shed'] += 1
+            raise EvaluationPoolBusy('All evaluation workers are busy', retry_after_seconds=int(self.queue_timeout_seconds) or 1)
+        running_since = time.monotonic()
+        with self._lock:
+            self._queue_waits.append(running_since - waiting_since)
+            self.stats['submitted'] += 1
+
+        recycle_reason = None
+        try:
+            worker.connection.send_bytes(payload)
+            if not worker.connection.poll(self.wall_timeout_seconds):
+                recycle_reason = 'timeout'
+                raise SubmissionError('timeout', f"Submission exceeded the {self.wall_timeout_seconds:g}s time limit")
+            status, body, rss_mb = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            if worker.process.exitcode == -signal.SIGXCPU:
+                recycle_reason = 'cpu_limit'
+                raise SubmissionError('cpu_limit', f"Submission exceeded the {self.cpu_seconds}s CPU limit")
+            recycle_reason = 'crashed'
+            raise SubmissionError('crashed', f"Evaluation worker exited with code {worker.process.exitcode}")
+        except BaseException:
+            # The worker may be mid-task with the pipe in an unknown state, so it is never handed out again.
+            if recycle_reason is None:
+                recycle_reason = 'crashed'
+            raise
+        finally:
+            worker.runs += 1
+            if recycle_reason is not None:
+                with self._lock:
+                    self.stats['failed'] += 1
+                    self._busy_seconds += time.monotonic() - running_since
+                self._recycle(worker, recycle_reason)
+
+        if status == 'memory_limit':
+            recycle_reason = 'memory_limit'
+        elif rss_mb is not None and rss_mb > self.recycle_rss_mb:
+            recycle_reason = 'memory_growth'
+        elif worker.runs >= self.max_runs_per_worker:
+            recycle_reason = 'max_runs'
+        with self._lock:
+            self.stats['completed' if status == 'ok' else 'failed'] += 1
+            self._busy_seconds += time.monotonic() - running_since
+        if recycle_reason is None:
+            self._release(worker)
+        else:
+            self._recycle(worker, recycle_reason)
+
+        if status != 'ok':
+            raise SubmissionError(status, body)
+        return body
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+        for worker in workers:
+            self._stop_worker(worker)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+            waits = np.asarray(self._queue_waits) * 1000.0
+            finished = self.stats['completed'] + self.stats['failed']
+            recycled = sum(self.recycles.values())
+            return {
+                **self.stats,
+                'workers': self.workers,
+                'idle_workers': len(self._idle),
+                'waiting': len(self._waiters),
+                'utilization': round(self._busy_seconds / (elapsed * self.workers), 4) if elapsed and self.workers else None,
+                'queue_wait_ms_mean': round(float(waits.mean()), 2) if len(waits) else None,
+                'queue_wait_ms_p95': round(float(np.percentile(waits, 95)), 2) if len(waits) else None,
+                'recycles': dict(self.recycles),
+                'recycle_rate': round(recycled / finished, 4) if finished else None,
+                'limits': {
+                    'cpu_seconds': self.cpu_seconds,
+                    'wall_timeout_seconds': self.wall_timeout_seconds,
+                    'address_space_mb': self.address_space_mb,
+                    'max_runs_per_worker': self.max_runs_per_worker,
+                    'recycle_rss_mb': self.recycle_rss_mb,
+                },
+            }
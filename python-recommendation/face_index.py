@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FACE_ENCODING_DIMENSIONS = 128
+
+
+class FaceEncodingIndex:
+    """Registered face encodings in one contiguous float32 matrix with an id -> row map"""
+
+    # Distances are euclidean, as in face_recognition.face_distance. A query against the whole
+    # roster is one matrix-vector product: |e - q|^2 = |e|^2 - 2 e.q + |q|^2, with |e|^2 kept per row.
+
+    def __init__(self, dimensions: int = FACE_ENCODING_DIMENSIONS, initial_capacity: int = 1024):
+        self.dimensions = dimensions
+        self._ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._encodings = np.zeros((0, dimensions), dtype=np.float32)
+        self._squared_norms = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._initial_capacity = initial_capacity
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, student_id: Any) -> bool:
+        return student_id in self._row_of
+
+    def _as_encoding(self, encoding: Any) -> np.ndarray:
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(-1)
+        if len(encoding) != self.dimensions:
+            raise ValueError(f"Expected a {self.dimensions}-dimensional face encoding, got {len(encoding)}")
+        return encoding
+
+    def _ensure_capacity(self, rows: int):
+        capacity = len(self._encodings)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, self._initial_capacity)
+        encodings = np.zeros((new_capacity, self.dimensions), dtype=np.float32)
+        squared_norms = np.zeros(new_capacity, dtype=np.float32)
+        alive = np.zeros(new_capacity, dtype=bool)
+        encodings[:self._size] = self._encodings[:self._size]
+        squared_norms[:self._size] = self._squared_norms[:self._size]
+        alive[:self._size] = self._alive[:self._size]
+        self._encodings = encodings
+        self._squared_norms = squared_norms
+        self._alive = alive
+
+    def build(self, student_ids: Iterable[Any], encodings: Any):
+        """Replace the index contents; a repeated id keeps its last encoding"""
+        student_ids = list(student_ids)
+        encodings = np.asarray(encodings, dtype=np.float32).reshape(len(student_ids), self.dimensions)
+        self._ids = []
+        self._row_of = {}
+        self._size = 0
+        self._encodings = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._squared_norms = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._ensure_capacity(len(student_ids))
+        for student_id, encoding in zip(student_ids, encodings):
+            self.upsert(student_id, encoding)
+
+    def upsert(self, student_id: Any, encoding: Any) -> int:
+        """Insert or replace one encoding; returns its row"""
+        encoding = self._as_encoding(encoding)
+        row = self._row_of.get(student_id)
+        if row is None:
+            row = self._size
+            self._ensure_capacity(row + 1)
+            self._ids.append(student_id)
+            self._row_of[student_id] = row
+            self._size += 1
+        self._encodings[row] = encoding
+        self._squared_norms[row] = encoding @ encoding
+        self._alive[row] = True
+        return row
+
+    def remove(self, student_id: Any) -> Optional[int]:
+        row = self._row_of.pop(student_id, None)
+        if row is not None:
+            self._alive[row] = False
+        return row
+
+    def encoding_for(self, student_id: Any) -> Optional[np.ndarray]:
+        row = self._row_of.get(student_id)
+        return None if row is None else self._encodings[row].copy()
+
+    def distance(self, student_id: Any, encoding: Any) -> Optional[float]:
+        """Euclidean distance between one registered encoding and encoding, or None if unregistered"""
+        row = self._row_of.get(student_id)
+        if row is None:
+            return None
+        return float(np.linalg.norm(self._encodings[row] - self._as_encoding(encoding)))
+
+    def distances(self, encoding: Any) -> np.ndarray:
+        """Distance from encoding to every row; removed rows are inf"""
+        query = self._as_encoding(encoding)
+        squared = self._squared_norms[:self._size] - 2.0 * (self._encodings[:self._size] @ query) + query @ query
+        distances = np.sqrt(np.maximum(squared, 0.0))
+        distances[~self._alive[:self._size]] = np.inf
+        return distances
+
+    def identify(self, encoding: Any, k: int = 5, tolerance: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """The k closest registered ids, nearest first, optionally only those within tolerance"""
+        if self._size == 0 or k <= 0:
+            return []
+        distances = self.distances(encoding)
+        k = min(k, len(distances))
+        order = np.argpartition(distances, k - 1)[:k]
+        order = order[np.argsort(distances[order], kind="stable")]
+        matches = []
+        for row in order:
+            distance = float(distances[row])
+            if not np.isfinite(distance) or (tolerance is not None and distance > tolerance):
+                break
+            matches.append((self._ids[row], distance))
+        return matches
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self),
+            "dimensions": self.dimensions,
+            "capacity": len(self._encodings),
+            "matrix_mb": round(self._encodings.nbytes / (1024 * 1024), 2),
+        }
@@ -0,0 +1,231 @@
+"""Face inference (dlib through face_recognition) in a bounded pool of worker processes.
+
+Request threads submit encoded image bytes and wait for per-request results with a timeout. When
+every worker is busy and the queue is full, new work is refused at once with FaceInferenceBusy,
+which the routes turn into a 503, so a burst of proctoring frames cannot take over the threads
+that serve the rest of the API. The worker functions only import this module, never app.py.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from startup_profile import startup_profile
+
+logger = logging.getLogger(__name__)
+
+FACE_DEPENDENCY_MODULES = ('face_recognition', 'cv2')
+FACE_DETECTION_MODELS = ('hog', 'cnn')
+DEFAULT_DETECTION_MODEL = os.getenv('FACE_DETECTION_MODEL', 'hog')
+# Face search runs on a copy no larger than this; 0 searches the full-resolution image.
+DEFAULT_DETECTION_MAX_SIDE = int(os.getenv('FACE_DETECTION_MAX_SIDE', 800))
+
+
+class FaceInferenceBusy(Exception):
+    """Face inference was shed or timed out; the caller should retry later"""
+
+    def __init__(self, message: str, retry_after_seconds: int = 1):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+def load_face_dependencies() -> Optional[tuple]:
+    """(face_recognition, cv2), or None when either is unavailable"""
+    modules = []
+    for name in FACE_DEPENDENCY_MODULES:
+        module = startup_profile.lazy_import(name, 'face recognition')
+        if module is None:
+            return None
+        modules.append(module)
+    return tuple(modules)
+
+
+def decode_image(image_data: bytes, cv2: Any) -> np.ndarray:
+    """Decode JPEG/PNG/... bytes straight into one BGR array"""
+    # BGR without EXIF rotation is the layout registered encodings were computed on (PIL + RGB2BGR).
+    image_array = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image_array is None:
+        raise ValueError('Unsupported or corrupt image')
+    return image_array
+
+
+def downscale_for_detection(image_array: np.ndarray, max_side: Optional[int], cv2: Any) -> tuple:
+    """(image, scale): image shrunk so its longer side is at most max_side; scale is 1.0 when unchanged"""
+    height, width = image_array.shape[:2]
+    longest_side = max(height, width)
+    if not max_side or longest_side <= max_side:
+        return image_array, 1.0
+    scale = max_side / float(longest_side)
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image_array, size, interpolation=cv2.INTER_AREA), scale
+
+
+def scale_face_locations(face_locations: List[tuple], scale: float, height: int, width: int) -> List[tuple]:
+    """Map (top, right, bottom, left) boxes found on a downscaled image back to original pixels"""
+    if scale == 1.0:
+        return [tuple(int(value) for value in location) for location in face_locations]
+    return [
+        (
+            max(0, int(round(top / scale))),
+            min(width, int(round(right / scale))),
+            min(height, int(round(bottom / scale))),
+            max(0, int(round(left / scale))),
+        )
+        for top, right, bottom, left in face_locations
+    ]
+
+
+def locate_and_encode(image_data: bytes, model: str = DEFAULT_DETECTION_MODEL, max_side: Optional[int] = DEFAULT_DETECTION_MAX_SIDE) -> Optional[Dict[str, Any]]:
+    """Decode once, search for faces on a downscaled copy and encode them on the original pixels"""
+    dependencies = load_face_dependencies()
+    if dependencies is None:
+        return None
+    face_recognition, cv2 = dependencies
+
+    # A worker process runs one task at a time, so traced memory there is this image's; in-process
+    # (FACE_INFERENCE_WORKERS=0) tracing would count every other request thread as well.
+    trace_memory = multiprocessing.parent_process() is not None
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        image_array = decode_image(image_data, cv2)
+        height, width = image_array.shape[:2]
+        detection_array, scale = downscale_for_detection(image_array, max_side, cv2)
+        face_locations = scale_face_locations(face_recognition.face_locations(detection_array, model=model), scale, height, width)
+        face_encodings = face_recognition.face_encodings(image_array, known_face_locations=face_locations) if face_locations else []
+        peak_bytes = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        'face_locations': face_locations,
+        'face_encodings': face_encodings,
+        'metrics': {
+            'image_size': (width, height),
+            'detection_scale': scale,
+            'model': model,
+            'seconds': round(time.perf_counter() - started, 4),
+            'peak_memory_mb': round(peak_bytes / (1024 * 1024), 2) if peak_bytes is not None else None,
+        },
+    }
+
+
+def encode_face(image_data: bytes, model: str = DEFAULT_DETECTION_MODEL, max_side: Optional[int] = DEFAULT_DETECTION_MAX_SIDE) -> Dict[str, Any]:
+    """Encoding of the first face in the image (runs in a worker process)"""
+    result = locate_and_encode(image_data, model, max_side)
+    if result is None:
+        return {'available': False, 'encoding': None}
+    return {'available': True, 'encoding': result['face_encodings'][0] if result['face_encodings'] else None, 'metrics': result['metrics']}
+
+
+def detect_faces(image_data: bytes, model: str = DEFAULT_DETECTION_MODEL, max_side: Optional[int] = DEFAULT_DETECTION_MAX_SIDE) -> Dict[str, Any]:
+    """Locations and encodings of every face in the image (runs in a worker process)"""
+    result = locate_and_encode(image_data, model, max_side)
+    if result is None:
+        return {'available': False, 'face_locations': [], 'face_encodings': []}
+    return {'available': True, **result}
+
+
+class FaceInferencePool:
+    """Bounded process pool with a queue depth limit, per-task timeouts and load shedding"""
+
+    def __init__(self, workers: int = 2, queue_depth: int = 8, timeout_seconds: float = 10.0):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout_seconds = timeout_seconds
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_depth)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'shed': 0, 'timeouts': 0, 'failures': 0, 'pool_restarts': 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn: the workers must not inherit the web worker's threads, locks or Mongo client.
+                    # (Under `python app.py` they re-import app.py as __mp_main__; gunicorn and uvicorn do not.)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='face-inference')
+            return self._executor
+
+    def _restart(self, broken_executor, terminate: bool = False):
+        with self._lock:
+            if self._executor is broken_executor:
+                self._executor = None
+                self.stats['pool_restarts'] += 1
+        if terminate and isinstance(broken_executor, ProcessPoolExecutor):
+            # A running task cannot be cancelled, so its worker is killed; the pool's other tasks fail as broken.
+            for process in list((broken_executor._processes or {}).values()):
+                process.terminate()
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def run(self, function: Callable[..., Dict[str, Any]], image_data: bytes, *args: Any) -> Dict[str, Any]:
+        """Run function(image_data, *args) on the pool; raises FaceInferenceBusy when shed or too slow"""
+        if not self._slots.acquire(blocking=False):
+            self._count('shed')
+            raise FaceInferenceBusy('Face inference queue is full')
+
+        executor = self._get_executor()
+        try:
+            future: Future = executor.submit(function, image_data, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._restart(executor)
+            self._count('failures')
+            raise FaceInferenceBusy('Face inference workers restarted')
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the task finishes or its workers are replaced, whichever comes first.
+        slot_held = threading.Lock()
+
+        def release_slot(_future=None):
+            if slot_held.acquire(blocking=False):
+                self._slots.release()
+
+        future.add_done_callback(release_slot)
+        self._count('submitted')
+
+        try:
+            result = future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            if not future.cancel():
+                self._restart(executor, terminate=True)
+                release_slot()
+            self._count('timeouts')
+            raise FaceInferenceBusy('Face inference timed out', retry_after_seconds=int(self.timeout_seconds) or 1)
+        except BrokenProcessPool:
+            self._restart(executor)
+            self._count('failures')
+            raise FaceInferenceBusy('Face inference workers restarted')
+        except Exception:
+            self._count('failures')
+            raise
+
+        self._count('completed')
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'timeout_seconds': self.timeout_seconds,
+                'started': self._executor is not None,
+            }
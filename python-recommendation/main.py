@@ -1,20 +1,42 @@
+import hashlib
+import heapq
 import os
 import pickle
 import re
 import sys
+import threading
+import time
 import types
-from typing import Any, Dict, List
+from collections import OrderedDict
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
 
-from recommender_utils import calculate_overall_score, calculate_s_space, calculate_s_time
+from bundle_format import MANIFEST_NAME, file_sha256, load_columnar_bundle
+from recommender_utils import (
+    COMPLEXITY_RANK,
+    calculate_overall_score,
+    calculate_overall_score_array,
+    calculate_s_space,
+    calculate_s_space_array,
+    calculate_s_time,
+    calculate_s_time_array,
+    fit_complexity,
+)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_PATH = os.path.join(BASE_DIR, "hybrid_recommender.pkl")
+MODEL_PATH = os.getenv("RECOMMENDER_MODEL_PATH", os.path.join(BASE_DIR, "hybrid_recommender.pkl"))
+BUNDLE_DIR = os.getenv("RECOMMENDER_BUNDLE_DIR", os.path.join(BASE_DIR, "hybrid_recommender_bundle"))
+# auto: use the columnar bundle when its manifest exists, otherwise unpickle MODEL_PATH.
+RECOMMENDER_BUNDLE_FORMAT = os.getenv("RECOMMENDER_BUNDLE_FORMAT", "auto").lower()
+VERIFY_BUNDLE_CHECKSUMS = os.getenv("VERIFY_BUNDLE_CHECKSUMS", "").lower() in ("1", "true", "yes")
 
 MODEL_LOAD_ERROR = None
+BUNDLE_LOAD_INFO: Dict[str, Any] = {"format": None, "version": None, "load_seconds": None, "warnings": []}
 
 
 def normalize_text(value: Any) -> str:
@@ -56,7 +78,7 @@ def _find_column(df: pd.DataFrame, *candidates: str) -> str:
     return ""
 
 
-def format_solution_label(row: pd.Series) -> str:
+def format_solution_label(row: Any) -> str:
     title = str(row.get("Title") or row.get("title") or row.get("problem_title") or "").strip()
     approach = str(row.get("ApproachName") or row.get("approach") or row.get("approach_name") or "").strip()
     language = str(row.get("Language") or row.get("language") or row.get("programming_language") or "").strip()
@@ -72,35 +94,500 @@ def format_solution_label(row: pd.Series) -> str:
     return str(row.get("OptSolutionID") or row.get("optsolutionid") or "").strip()
 
 
-def humanize_topic_label(topic: Any) -> str:
-    raw_topic = str(topic or "").strip()
-    if not raw_topic:
-        return ""
+TOPIC_LABEL_CACHE_SIZE = int(os.getenv("TOPIC_LABEL_CACHE_SIZE", "4096"))
+
+
+class TopicLabelIndex:
+    def __init__(self, solutions_df: pd.DataFrame, cache_size: int = TOPIC_LABEL_CACHE_SIZE):
+        self.exact_ids: Dict[str, str] = {}
+        self.normalized_ids: Dict[str, str] = {}
+        self.normalized_titles: Dict[str, str] = {}
+        self.cache_size = max(0, int(cache_size))
+        self._unseen: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"index_hits": 0, "index_misses": 0, "cache_hits": 0, "cache_evictions": 0}
+
+        if not isinstance(solutions_df, pd.DataFrame) or solutions_df.empty:
+            return
+
+        id_column = _find_column(solutions_df, "OptSolutionID", "solution_id", "solutionid")
+        title_column = _find_column(solutions_df, "Title", "problem_title", "title")
+        if not id_column and not title_column:
+            return
+
+        # First matching row wins, mirroring the row order the DataFrame scans used.
+        for record in solutions_df.to_dict("records"):
+            label = None
+            if id_column:
+                raw_id = str(record.get(id_column))
+                label = format_solution_label(record)
+                self.exact_ids.setdefault(raw_id, label)
+                self.normalized_ids.setdefault(normalize_text(raw_id), label)
+            if title_column:
+                label = label if label is not None else format_solution_label(record)
+                self.normalized_titles.setdefault(normalize_text(str(record.get(title_column))), label)
+
+    def __len__(self) -> int:
+        return len(self.exact_ids) + len(self.normalized_titles)
+
+    def _lookup(self, raw_topic: str) -> str:
+        # Called with self._lock held, like every other update to self.stats.
+        normalized_topic = normalize_text(raw_topic)
+        label = self.normalized_ids.get(normalized_topic)
+        if label is None:
+            label = self.normalized_titles.get(normalized_topic)
+        if label is None:
+            self.stats["index_misses"] += 1
+            return raw_topic
+        self.stats["index_hits"] += 1
+        return label
+
+    def label_for(self, raw_topic: str) -> str:
+        """resolve() without touching the stats or the unseen-label cache"""
+        label = self.exact_ids.get(raw_topic)
+        if label is None:
+            normalized_topic = normalize_text(raw_topic)
+            label = self.normalized_ids.get(normalized_topic)
+            if label is None:
+                label = self.normalized_titles.get(normalized_topic, raw_topic)
+        return label
+
+    def resolve(self, raw_topic: str) -> str:
+        label = self.exact_ids.get(raw_topic)
+        with self._lock:
+            if label is not None:
+                self.stats["index_hits"] += 1
+                return label
+
+            cached = self._unseen.get(raw_topic)
+            if cached is not None:
+                self._unseen.move_to_end(raw_topic)
+                self.stats["cache_hits"] += 1
+                return cached
+
+            label = self._lookup(raw_topic)
+            if self.cache_size:
+                self._unseen[raw_topic] = label
+                if len(self._unseen) > self.cache_size:
+                    self._unseen.popitem(last=False)
+                    self.stats["cache_evictions"] += 1
+            return label
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "indexed_labels": len(self),
+                "cached_labels": len(self._unseen),
+                "cache_size": self.cache_size,
+            }
+
+
+SOLUTION_LANGUAGE_COLUMNS = ["language", "programming_language", "lang"]
+SOLUTION_CANDIDATE_COLUMNS = ["topic", "topics", "tag", "tags", "category", "categories", "title", "problem_title", "difficulty"]
+SOLUTION_PARTITION_ROWS = 40
+
+
+def split_candidate_values(value: str) -> tuple:
+    parts = (part.strip() for part in re.split(r"[|,/;]", value))
+    return tuple((part, frozenset(tokenize(part))) for part in parts if part)
+
+
+def sorted_membership(sorted_values: np.ndarray, values: np.ndarray) -> tuple:
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool), np.zeros(len(values), dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[positions] == values, positions
+
+
+class ContentPartition:
+    # Distinct candidate ids plus every label with the ordinal of its first occurrence, kept both
+    # in label order (for lookups) and in first-occurrence order (for ties, like dict insertion).
+    def __init__(self, candidates: np.ndarray, labels: np.ndarray, firsts: np.ndarray):
+        order = np.lexsort((firsts, labels))
+        labels, firsts = labels[order], firsts[order]
+        unique_labels, first_positions = np.unique(labels, return_index=True)
+        self.candidates = np.unique(candidates).astype(np.int32)
+        self.sorted_labels = unique_labels.astype(np.int32)
+        self.sorted_firsts = firsts[first_positions].astype(np.int64)
+        rank = np.argsort(self.sorted_firsts, kind="stable")
+        self.ranked_labels = self.sorted_labels[rank]
+        self.ranked_firsts = self.sorted_firsts[rank]
+
+    @classmethod
+    def merge(cls, partitions: List["ContentPartition"]) -> "ContentPartition":
+        return cls(
+            np.concatenate([partition.candidates for partition in partitions]),
+            np.concatenate([partition.sorted_labels for partition in partitions]),
+            np.concatenate([partition.sorted_firsts for partition in partitions]),
+        )
 
-    if not isinstance(SOLUTIONS_DF, pd.DataFrame) or SOLUTIONS_DF.empty:
-        return raw_topic
+    def __len__(self) -> int:
+        return len(self.sorted_labels)
+
+class SolutionPartitionIndex:
+    # Partitions are keyed by (subject, language column, language), with None for "any". Each holds
+    # the first rows_per_column non-null (row, split candidates) entries of every candidate column
+    # and a ContentPartition over all of its rows for the inverted token index.
+    def __init__(self, solutions_df: pd.DataFrame, label_index: Any = None, rows_per_column: int = SOLUTION_PARTITION_ROWS):
+        self.rows_per_column = rows_per_column
+        self.language_columns: List[str] = []
+        self.partitions: Dict[tuple, Dict[str, List[tuple]]] = {}
+        self.content_partitions: Dict[tuple, ContentPartition] = {}
+        self.labels: List[str] = []
+        self.label_ids: Dict[str, int] = {}
+        self.token_ids: Dict[str, int] = {}
+        self.posting_indptr = np.zeros(1, dtype=np.int64)
+        self.posting_candidates = np.zeros(0, dtype=np.int32)
+        self.candidate_labels = np.zeros(0, dtype=np.int32)
+        self._entries: Dict[str, List[Any]] = {}
+
+        if not isinstance(solutions_df, pd.DataFrame) or solutions_df.empty:
+            return
+
+        row_count = len(solutions_df)
+        for column in SOLUTION_CANDIDATE_COLUMNS:
+            if column not in solutions_df.columns:
+                continue
+            present = solutions_df[column].notna().to_numpy()
+            texts = solutions_df[column].astype(str).tolist()
+            self._entries[column] = [split_candidate_values(texts[row]) if present[row] else None for row in range(row_count)]
+
+        occurrence_rows, occurrence_candidates, candidate_labels = self._build_token_index(label_index)
+
+        all_rows = list(range(row_count))
+        groups: Dict[tuple, List[int]] = {(None, None, None): all_rows}
+        subjects: List[Any] = [None] * row_count
+        if "subject" in solutions_df.columns:
+            subjects = solutions_df["subject"].astype(str).map(normalize_text).tolist()
+            for row, subject in enumerate(subjects):
+                groups.setdefault((subject, None, None), []).append(row)
+
+        self.language_columns = [column for column in SOLUTION_LANGUAGE_COLUMNS if column in solutions_df.columns]
+        for column in self.language_columns:
+            languages = solutions_df[column].astype(str).map(normalize_text).tolist()
+            for row, (subject, language) in enumerate(zip(subjects, languages)):
+                groups.setdefault((None, column, language), []).append(row)
+                if subject is not None:
+                    groups.setdefault((subject, column, language), []).append(row)
+
+        in_partition = np.zeros(row_count, dtype=bool)
+        for key, rows in groups.items():
+            self.partitions[key] = self._collect(rows)
+            in_partition[:] = False
+            in_partition[rows] = True
+            ordinals = np.flatnonzero(in_partition[occurrence_rows])
+            candidates = occurrence_candidates[ordinals]
+            self.content_partitions[key] = ContentPartition(candidates, candidate_labels[candidates], ordinals)
+        self.candidate_labels = candidate_labels
+        # Only the bounded per-partition heads are needed at request time.
+        self._entries = {}
+
+    def _build_token_index(self, label_index: Any) -> tuple:
+        # Occurrences are numbered in column, row, part order: the order the candidate scan used to
+        # insert labels, so the lowest ordinal of a label reproduces its tie-breaking position.
+        candidate_ids: Dict[str, int] = {}
+        candidate_tokens: List[frozenset] = []
+        occurrence_rows: List[int] = []
+        occurrence_candidates: List[int] = []
+        for entries in self._entries.values():
+            for row, parts in enumerate(entries):
+                for candidate, tokens in parts or ():
+                    candidate_id = candidate_ids.get(candidate)
+                    if candidate_id is None:
+                        candidate_id = candidate_ids[candidate] = len(candidate_tokens)
+                        candidate_tokens.append(tokens)
+                    occurrence_rows.append(row)
+                    occurrence_candidates.append(candidate_id)
+
+        candidate_labels = np.zeros(len(candidate_ids), dtype=np.int32)
+        for candidate, candidate_id in candidate_ids.items():
+            label = label_index.label_for(candidate) if label_index is not None else candidate
+            if label not in self.label_ids:
+                self.label_ids[label] = len(self.labels)
+                self.labels.append(label)
+            candidate_labels[candidate_id] = self.label_ids[label]
+
+        posting_tokens: List[int] = []
+        posting_candidates: List[int] = []
+        for candidate_id, tokens in enumerate(candidate_tokens):
+            for token in tokens:
+                posting_tokens.append(self.token_ids.setdefault(token, len(self.token_ids)))
+                posting_candidates.append(candidate_id)
+        posting_tokens_array = np.asarray(posting_tokens, dtype=np.int64)
+        order = np.argsort(posting_tokens_array, kind="stable")
+        self.posting_candidates = np.asarray(posting_candidates, dtype=np.int32)[order]
+        self.posting_indptr = np.zeros(len(self.token_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_tokens_array, minlength=len(self.token_ids)), out=self.posting_indptr[1:])
+
+        return np.asarray(occurrence_rows, dtype=np.int64), np.asarray(occurrence_candidates, dtype=np.int32), candidate_labels
+
+    def _collect(self, rows: List[int]) -> Dict[str, List[tuple]]:
+        collected: Dict[str, List[tuple]] = {}
+        for column, entries in self._entries.items():
+            head = []
+            for row in rows:
+                if entries[row] is not None:
+                    head.append((row, entries[row]))
+                    if len(head) >= self.rows_per_column:
+                        break
+            collected[column] = head
+        return collected
+
+    def __len__(self) -> int:
+        return len(self.partitions)
+
+    def _resolve_keys(self, subject: str, languages: Any) -> List[tuple]:
+        # Mirrors the DataFrame filters: a filter that matches nothing is skipped.
+        scope = subject if subject and (subject, None, None) in self.partitions else None
+        if languages:
+            for column in self.language_columns:
+                keys = [(scope, column, language) for language in languages if (scope, column, language) in self.partitions]
+                if keys:
+                    return keys
+        return [(scope, None, None)]
+
+    def select(self, subject: str, languages: Any) -> Dict[str, List[tuple]]:
+        """Candidate entries for the rows matching subject and languages, in DataFrame row order"""
+        matched = [self.partitions[key] for key in self._resolve_keys(subject, languages) if key in self.partitions]
+        if len(matched) == 1:
+            return matched[0]
+        if not matched:
+            return {}
+        return {
+            column: list(islice(heapq.merge(*(partition[column] for partition in matched), key=itemgetter(0)), self.rows_per_column))
+            for column in matched[0]
+        }
+
+    def content_scores(self, subject: str, languages: Any, seed_tokens: Any, limit: int, include: Any = ()) -> Dict[str, float]:
+        """Best `limit` candidate labels scored 1 + 0.4 * seed token overlap, plus any `include` labels
+        present in the partition, in first-occurrence order"""
+        matched = [self.content_partitions[key] for key in self._resolve_keys(subject, languages) if key in self.content_partitions]
+        if not matched:
+            return {}
+        partition = matched[0] if len(matched) == 1 else ContentPartition.merge(matched)
+
+        # Posting-list merge: each candidate appears once per distinct seed token it contains.
+        token_ids = [self.token_ids[token] for token in seed_tokens if token in self.token_ids]
+        postings = [self.posting_candidates[self.posting_indptr[token_id]:self.posting_indptr[token_id + 1]] for token_id in token_ids]
+        hits, overlaps = np.unique(np.concatenate(postings), return_counts=True) if postings else (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64))
+        found, _positions = sorted_membership(partition.candidates, hits)
+        hits, overlaps = hits[found], overlaps[found]
+
+        # A label scores its best candidate; labels without a hit score 1.0.
+        hit_labels = self.candidate_labels[hits]
+        order = np.lexsort((-overlaps, hit_labels))
+        hit_labels, first_positions = np.unique(hit_labels[order], return_index=True)
+        hit_scores = 1.0 + (0.4 * overlaps[order][first_positions])
+        _found, label_positions = sorted_membership(partition.sorted_labels, hit_labels)
+        hit_firsts = partition.sorted_firsts[label_positions]
+
+        best_hits = np.lexsort((hit_firsts, -hit_scores))[:limit]
+        selected = {int(hit_labels[position]): (int(hit_firsts[position]), float(hit_scores[position])) for position in best_hits}
+        if len(selected) < limit:
+            leading = partition.ranked_labels[:limit + len(hit_labels)]
+            leading_firsts = partition.ranked_firsts[:limit + len(hit_labels)]
+            unscored = ~np.isin(leading, hit_labels)
+            for label_id, first in list(zip(leading[unscored], leading_firsts[unscored]))[:limit - len(selected)]:
+                selected[int(label_id)] = (int(first), 1.0)
+
+        hit_score_of = dict(zip(hit_labels.tolist(), hit_scores.tolist()))
+        for label in include:
+            label_id = self.label_ids.get(label)
+            if label_id is None or label_id in selected:
+                continue
+            label_found, position = sorted_membership(partition.sorted_labels, np.asarray([label_id]))
+            if label_found[0]:
+                selected[label_id] = (int(partition.sorted_firsts[position[0]]), hit_score_of.get(label_id, 1.0))
+
+        return {self.labels[label_id]: score for label_id, (_first, score) in sorted(selected.items(), key=lambda item: item[1][0])}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "partitions": len(self),
+            "candidate_columns": list(next(iter(self.partitions.values()), {}).keys()),
+            "language_columns": list(self.language_columns),
+            "rows_per_column": self.rows_per_column,
+            "indexed_candidates": len(self.candidate_labels),
+            "indexed_labels": len(self.labels),
+            "indexed_tokens": len(self.token_ids),
+        }
+
+
+class StudentTopicRatings:
+    # Topic mean ratings per student and per (student, normalized subject), weakest first, so the
+    # request path is a dict lookup instead of a scan and groupby over the whole ratings table.
+    def __init__(self, ratings_df: pd.DataFrame):
+        self.by_student: Dict[str, tuple] = {}
+        self.by_student_subject: Dict[tuple, tuple] = {}
+        if not isinstance(ratings_df, pd.DataFrame) or ratings_df.empty:
+            return
 
-    id_column = _find_column(SOLUTIONS_DF, "OptSolutionID", "solution_id", "solutionid")
-    title_column = _find_column(SOLUTIONS_DF, "Title", "problem_title", "title")
+        normalized_columns = {normalize_text(column): column for column in ratings_df.columns}
+        student_column = normalized_columns.get("student id") or normalized_columns.get("student_id") or normalized_columns.get("studentid") or normalized_columns.get("user id") or normalized_columns.get("user_id")
+        subject_column = normalized_columns.get("subject")
+        topic_column = normalized_columns.get("topic") or normalized_columns.get("topics") or normalized_columns.get("category") or normalized_columns.get("optsolutionid")
+        rating_column = normalized_columns.get("rating") or normalized_columns.get("score")
+        if not (student_column and topic_column and rating_column):
+            return
 
-    if id_column:
-        matches = SOLUTIONS_DF[SOLUTIONS_DF[id_column].astype(str) == raw_topic]
-        if not matches.empty:
-            return format_solution_label(matches.iloc[0])
+        frame = pd.DataFrame({
+            "student": ratings_df[student_column].astype(str).to_numpy(),
+            "topic": ratings_df[topic_column].to_numpy(),
+            "rating": ratings_df[rating_column].to_numpy(),
+        })
+        self.by_student = self._aggregate(frame, ["student"])
+        if subject_column:
+            subject_codes, subjects = pd.factorize(ratings_df[subject_column].astype(str), use_na_sentinel=False)
+            frame["subject"] = np.asarray([normalize_text(subject) for subject in subjects], dtype=object)[subject_codes]
+            self.by_student_subject = self._aggregate(frame, ["student", "subject"])
+
+    @staticmethod
+    def _aggregate(frame: pd.DataFrame, key_columns: List[str]) -> Dict[Any, tuple]:
+        means = frame.groupby(key_columns + ["topic"], sort=True)["rating"].mean()
+        empty = (np.zeros(0, dtype=object), np.zeros(0, dtype=np.float64))
+        # Keys whose rows all lack a topic still count as having ratings, as the row scan did.
+        unique_keys = frame[key_columns].drop_duplicates()
+        groups: Dict[Any, tuple] = dict.fromkeys(
+            zip(*(unique_keys[column].tolist() for column in key_columns)) if len(key_columns) > 1 else unique_keys[key_columns[0]].tolist(),
+            empty,
+        )
+        if means.empty:
+            return groups
+
+        index = means.index
+        group_codes = np.zeros(len(means), dtype=np.int64)
+        for level in range(len(key_columns)):
+            group_codes = group_codes * len(index.levels[level]) + index.codes[level]
+        boundaries = np.flatnonzero(np.diff(group_codes)) + 1
+        starts = np.concatenate(([0], boundaries))
+        keys = index.droplevel("topic")[starts].tolist()
+        topics = index.get_level_values("topic").to_numpy()
+        values = means.to_numpy(dtype=np.float64)
+        has_missing = bool(np.isnan(values).any())
+        for key, start, end in zip(keys, starts.tolist(), np.append(boundaries, len(values)).tolist()):
+            group_values = values[start:end]
+            # Same ordering as Series.sort_values(): quicksort over rated topics, unrated (NaN) last.
+            if has_missing:
+                missing = np.isnan(group_values)
+                rated = np.flatnonzero(~missing)
+                order = np.concatenate((rated[group_values[rated].argsort(kind="quicksort")], np.flatnonzero(missing)))
+            else:
+                order = group_values.argsort(kind="quicksort")
+            groups[key] = (topics[start:end][order], group_values[order])
+        return groups
+
+    def weakest(self, student_id: str, subject: Any, limit: int) -> List[tuple]:
+        """(topic, mean rating) pairs for the student's lowest-rated topics, narrowed to subject when rated"""
+        entry = self.by_student.get(student_id)
+        if entry is None:
+            return []
+        if subject:
+            entry = self.by_student_subject.get((student_id, normalize_text(subject)), entry)
+        topics, means = entry
+        return list(zip(topics[:limit].tolist(), means[:limit].tolist()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "students": len(self.by_student),
+            "student_subjects": len(self.by_student_subject),
+        }
+
+
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "32"))
+KEEP_DENSE_SIMILARITY = os.getenv("KEEP_DENSE_SIMILARITY", "").lower() in ("1", "true", "yes")
+
+
+class SimilarityNeighbors:
+    # CSR layout: the neighbours of row i are indices[indptr[i]:indptr[i + 1]], best first.
+    def __init__(self, labels: List[Any], indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray):
+        self.labels = list(labels)
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.normalized_labels = [normalize_text(label) for label in self.labels]
+        # Later duplicates win, matching a dict built over the DataFrame index.
+        self.positions = {label: position for position, label in enumerate(self.labels)}
+        self.normalized_positions = {normalized: position for position, normalized in enumerate(self.normalized_labels)}
+        self._fuzzy_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dense(cls, similarity_df: pd.DataFrame, k: int, by_column: bool = False, block_rows: int = 1024) -> "SimilarityNeighbors":
+        if not isinstance(similarity_df, pd.DataFrame) or similarity_df.empty:
+            return cls([], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+
+        values = similarity_df.to_numpy(dtype=np.float64)
+        labels = list(similarity_df.columns if by_column else similarity_df.index)
+        neighbor_labels = list(similarity_df.index if by_column else similarity_df.columns)
+        if by_column:
+            values = values.T
+        if neighbor_labels != labels:
+            known_labels = set(labels)
+            labels = labels + [label for label in neighbor_labels if label not in known_labels]
+
+        label_positions = {label: position for position, label in enumerate(labels)}
+        column_positions = np.array([label_positions[label] for label in neighbor_labels], dtype=np.int32)
+        row_count, column_count = values.shape
+        k = max(1, min(k, column_count))
+
+        indices = np.zeros((row_count, k), dtype=np.int32)
+        scores = np.zeros((row_count, k), dtype=np.float32)
+        for start in range(0, row_count, block_rows):
+            block = np.nan_to_num(values[start:start + block_rows], nan=-np.inf)
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k] if k < column_count else np.tile(np.arange(column_count), (len(block), 1))
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            indices[start:start + block_rows] = column_positions[np.take_along_axis(top, order, axis=1)]
+            scores[start:start + block_rows] = np.take_along_axis(top_scores, order, axis=1)
+
+        indptr = np.zeros(len(labels) + 1, dtype=np.int64)
+        indptr[1:row_count + 1] = np.arange(1, row_count + 1) * k
+        indptr[row_count + 1:] = row_count * k
+        return cls(labels, indptr, indices.reshape(-1), scores.reshape(-1))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.indptr.nbytes + self.indices.nbytes + self.scores.nbytes)
+
+    def find(self, normalized: str) -> Any:
+        position = self.normalized_positions.get(normalized)
+        if position is not None or not normalized:
+            return position
+
+        with self._lock:
+            if normalized in self._fuzzy_cache:
+                self._fuzzy_cache.move_to_end(normalized)
+                return self._fuzzy_cache[normalized]
+
+        position = next(
+            (candidate for norm, candidate in self.normalized_positions.items() if normalized in norm or norm in normalized),
+            None,
+        )
+        with self._lock:
+            self._fuzzy_cache[normalized] = position
+            if len(self._fuzzy_cache) > TOPIC_LABEL_CACHE_SIZE:
+                self._fuzzy_cache.popitem(last=False)
+        return position
 
-    normalized_topic = normalize_text(raw_topic)
+    def neighbors(self, position: int, limit: int) -> List[tuple]:
+        start = self.indptr[position]
+        end = min(self.indptr[position + 1], start + limit)
+        return [
+            (self.labels[index], float(score), self.normalized_labels[index])
+            for index, score in zip(self.indices[start:end], self.scores[start:end])
+        ]
 
-    if id_column:
-        id_matches = SOLUTIONS_DF[SOLUTIONS_DF[id_column].astype(str).map(normalize_text) == normalized_topic]
-        if not id_matches.empty:
-            return format_solution_label(id_matches.iloc[0])
 
-    if title_column:
-        title_matches = SOLUTIONS_DF[SOLUTIONS_DF[title_column].astype(str).map(normalize_text) == normalized_topic]
-        if not title_matches.empty:
-            return format_solution_label(title_matches.iloc[0])
+def humanize_topic_label(topic: Any) -> str:
+    raw_topic = str(topic or "").strip()
+    if not raw_topic:
+        return ""
 
-    return raw_topic
+    return TOPIC_LABEL_INDEX.resolve(raw_topic)
 
 
 def add_weighted_score(score_map: Dict[str, float], topic: str, weight: float):
@@ -154,7 +641,18 @@ class CompatibilityUnpickler(pickle.Unpickler):
 
 
 def load_recommender_bundle():
+    if RECOMMENDER_BUNDLE_FORMAT != "pickle" and os.path.isfile(os.path.join(BUNDLE_DIR, MANIFEST_NAME)):
+        try:
+            bundle = load_columnar_bundle(BUNDLE_DIR, load_dense=KEEP_DENSE_SIMILARITY, verify_checksums=VERIFY_BUNDLE_CHECKSUMS)
+            BUNDLE_LOAD_INFO["format"] = "columnar"
+            return bundle
+        except Exception as bundle_error:
+            if RECOMMENDER_BUNDLE_FORMAT == "columnar":
+                raise
+            BUNDLE_LOAD_INFO["warnings"].append(f"Columnar bundle skipped, falling back to pickle: {bundle_error}")
+
     register_pickle_compatibility_aliases()
+    BUNDLE_LOAD_INFO["format"] = "pickle"
 
     try:
         return joblib.load(MODEL_PATH)
@@ -163,6 +661,7 @@ def load_recommender_bundle():
             return CompatibilityUnpickler(model_file).load()
 
 
+bundle_load_started = time.perf_counter()
 try:
     RECOMMENDER_BUNDLE = load_recommender_bundle()
 except Exception as model_load_error:
@@ -181,11 +680,50 @@ except Exception as model_load_error:
             "W_space": 0.4,
         },
     }
+BUNDLE_LOAD_INFO["load_seconds"] = round(time.perf_counter() - bundle_load_started, 4)
+
+
+def compute_bundle_version() -> str:
+    # Identifies the loaded model for result caches; the top-k cut-off changes outputs too.
+    if MODEL_LOAD_ERROR is not None:
+        source = f"unavailable:{MODEL_LOAD_ERROR}"
+    elif BUNDLE_LOAD_INFO["format"] == "columnar":
+        source = f"columnar:{file_sha256(os.path.join(BUNDLE_DIR, MANIFEST_NAME))}"
+    else:
+        model_stat = os.stat(MODEL_PATH)
+        source = f"pickle:{os.path.abspath(MODEL_PATH)}:{model_stat.st_size}:{model_stat.st_mtime_ns}"
+    return hashlib.sha256(f"{source}|top_k={SIMILARITY_TOP_K}".encode()).hexdigest()[:16]
+
+
+BUNDLE_LOAD_INFO["version"] = compute_bundle_version()
 
 SOLUTIONS_DF = RECOMMENDER_BUNDLE.get("solutions_df", pd.DataFrame())
 USER_RATINGS_DF = RECOMMENDER_BUNDLE.get("user_ratings_df", pd.DataFrame())
 SOLUTION_SIMILARITY_DF = RECOMMENDER_BUNDLE.get("solution_similarity_df_conceptual", pd.DataFrame())
 USER_SIMILARITY_DF = RECOMMENDER_BUNDLE.get("user_similarity_df_conceptual", pd.DataFrame())
+TOPIC_LABEL_INDEX = TopicLabelIndex(SOLUTIONS_DF)
+SOLUTION_PARTITIONS = SolutionPartitionIndex(SOLUTIONS_DF, TOPIC_LABEL_INDEX)
+STUDENT_TOPIC_RATINGS = StudentTopicRatings(USER_RATINGS_DF)
+
+# Columnar bundles ship precomputed neighbour lists; pickled bundles are converted here.
+solution_neighbor_arrays = RECOMMENDER_BUNDLE.pop("solution_similarity_neighbors", None)
+user_neighbor_arrays = RECOMMENDER_BUNDLE.pop("user_similarity_neighbors", None)
+SOLUTION_NEIGHBORS = (
+    SimilarityNeighbors(**solution_neighbor_arrays) if solution_neighbor_arrays is not None
+    else SimilarityNeighbors.from_dense(SOLUTION_SIMILARITY_DF, SIMILARITY_TOP_K)
+)
+USER_NEIGHBORS = (
+    SimilarityNeighbors(**user_neighbor_arrays) if user_neighbor_arrays is not None
+    else SimilarityNeighbors.from_dense(USER_SIMILARITY_DF, SIMILARITY_TOP_K, by_column=True)
+)
+
+if not KEEP_DENSE_SIMILARITY:
+    # The request path only reads the top-k lists; release the O(n^2) frames.
+    SOLUTION_SIMILARITY_DF = pd.DataFrame()
+    USER_SIMILARITY_DF = pd.DataFrame()
+    for similarity_key, neighbors in (("solution_similarity_df_conceptual", SOLUTION_NEIGHBORS), ("user_similarity_df_conceptual", USER_NEIGHBORS)):
+        if similarity_key in RECOMMENDER_BUNDLE:
+            RECOMMENDER_BUNDLE[similarity_key] = neighbors
 
 PARAMS = RECOMMENDER_BUNDLE.get("params", {})
 T_OPT = safe_number(PARAMS.get("T_opt"), 1.0)
@@ -194,6 +732,12 @@ ALPHA = safe_number(PARAMS.get("alpha"), 0.5)
 BETA = safe_number(PARAMS.get("beta"), 0.5)
 W_TIME = safe_number(PARAMS.get("W_time"), 0.6)
 W_SPACE = safe_number(PARAMS.get("W_space"), 0.4)
+EXPECTED_TIME_COMPLEXITY = PARAMS.get("expected_time_complexity") if PARAMS.get("expected_time_complexity") in COMPLEXITY_RANK else "n log n"
+EXPECTED_SPACE_COMPLEXITY = PARAMS.get("expected_space_complexity") if PARAMS.get("expected_space_complexity") in COMPLEXITY_RANK else "n"
+# Estimates whose best fit misses the measurements by more than this (RMS relative error) are reported but not judged.
+COMPLEXITY_MAX_RELATIVE_RMSE = safe_number(os.getenv("COMPLEXITY_MAX_RELATIVE_RMSE"), 0.25)
+# estimate_complexity measures well under this many sizes; longer series are not refitted.
+COMPLEXITY_MAX_SIZES = 64
 
 
 def get_model_status() -> Dict[str, Any]:
@@ -208,6 +752,36 @@ def get_bundle_metadata() -> Dict[str, Any]:
         "available_keys": list(RECOMMENDER_BUNDLE.keys()),
         "total_solutions": len(SOLUTIONS_DF) if isinstance(SOLUTIONS_DF, pd.DataFrame) else 0,
         "total_user_ratings": len(USER_RATINGS_DF) if isinstance(USER_RATINGS_DF, pd.DataFrame) else 0,
+        "bundle_format": BUNDLE_LOAD_INFO["format"],
+        "bundle_version": BUNDLE_LOAD_INFO["version"],
+        "bundle_load_seconds": BUNDLE_LOAD_INFO["load_seconds"],
+        "bundle_warnings": list(BUNDLE_LOAD_INFO["warnings"]),
+    }
+
+
+def get_bundle_version() -> str:
+    return BUNDLE_LOAD_INFO["version"]
+
+
+def get_topic_label_stats() -> Dict[str, Any]:
+    return TOPIC_LABEL_INDEX.get_stats()
+
+
+def get_student_rating_stats() -> Dict[str, Any]:
+    return STUDENT_TOPIC_RATINGS.get_stats()
+
+
+def get_solution_partition_stats() -> Dict[str, Any]:
+    return SOLUTION_PARTITIONS.get_stats()
+
+
+def get_similarity_neighbor_stats() -> Dict[str, Any]:
+    return {
+        "top_k": SIMILARITY_TOP_K,
+        "dense_matrices_kept": KEEP_DENSE_SIMILARITY,
+        "solution_labels": len(SOLUTION_NEIGHBORS),
+        "user_labels": len(USER_NEIGHBORS),
+        "neighbor_bytes": SOLUTION_NEIGHBORS.nbytes + USER_NEIGHBORS.nbytes,
     }
 
 
@@ -242,10 +816,130 @@ def collect_runtime_metrics(coding_questions: List[Dict[str, Any]]) -> Dict[str,
         "optimalityScore": round(optimality_score, 3),
         "timeScore": round(time_score, 3),
         "spaceScore": round(space_score, 3),
+        "complexity": collect_complexity_signals(coding_questions),
+    }
+
+
+def complexity_fit(estimate: Any, sizes: Any = None, values: Any = None, noise_floor: float = 0.0) -> Optional[Dict[str, Any]]:
+    # The class and its fit quality are recomputed from the raw measurements sent with the estimate;
+    # a class reported without them is passed through but never judged.
+    try:
+        sizes = np.asarray(sizes, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        measured = bool(
+            sizes.ndim == values.ndim == 1 and 3 <= len(sizes) == len(values) <= COMPLEXITY_MAX_SIZES
+            and np.all(np.isfinite(sizes)) and np.all(sizes > 0) and np.all(np.isfinite(values)) and np.all(values >= 0)
+        )
+    except (TypeError, ValueError):
+        measured = False
+    if measured:
+        estimate = fit_complexity(sizes, values, noise_floor=noise_floor)
+    if not isinstance(estimate, dict) or estimate.get("class") not in COMPLEXITY_RANK:
+        return None
+    relative_rmse = safe_number(estimate.get("relative_rmse"), np.inf)
+    return {
+        "class": estimate["class"],
+        "r2": round(safe_number(estimate.get("r2")), 3),
+        "relativeRmse": round(relative_rmse, 3) if np.isfinite(relative_rmse) else None,
+        "measured": measured,
+        "reliable": measured and relative_rmse <= COMPLEXITY_MAX_RELATIVE_RMSE,
+    }
+
+
+def collect_complexity_signals(coding_questions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    questions = []
+    for question in coding_questions:
+        complexity = question.get("complexity")
+        if not isinstance(complexity, dict):
+            continue
+        time_fit = complexity_fit(complexity.get("time"), complexity.get("sizes"), complexity.get("seconds"))
+        memory_fit = complexity_fit(complexity.get("memory"), complexity.get("sizes"), complexity.get("memory_bytes"), noise_floor=1024)
+        if time_fit is None and memory_fit is None:
+            continue
+        expected_time = question.get("expectedTimeComplexity") if question.get("expectedTimeComplexity") in COMPLEXITY_RANK else EXPECTED_TIME_COMPLEXITY
+        expected_space = question.get("expectedSpaceComplexity") if question.get("expectedSpaceComplexity") in COMPLEXITY_RANK else EXPECTED_SPACE_COMPLEXITY
+        questions.append({
+            "sectionIndex": question.get("sectionIndex"),
+            "questionIndex": question.get("questionIndex"),
+            "time": time_fit,
+            "memory": memory_fit,
+            "expectedTime": expected_time,
+            "expectedSpace": expected_space,
+            "exceedsTime": bool(time_fit and time_fit["reliable"] and COMPLEXITY_RANK[time_fit["class"]] > COMPLEXITY_RANK[expected_time]),
+            "exceedsSpace": bool(memory_fit and memory_fit["reliable"] and COMPLEXITY_RANK[memory_fit["class"]] > COMPLEXITY_RANK[expected_space]),
+        })
+    if not questions:
+        return None
+
+    def worst(kind: str) -> Optional[str]:
+        classes = [question[kind]["class"] for question in questions if question[kind] and question[kind]["reliable"]]
+        return max(classes, key=COMPLEXITY_RANK.get) if classes else None
+
+    return {
+        "timeComplexity": worst("time"),
+        "spaceComplexity": worst("memory"),
+        "reliableEstimates": sum(1 for question in questions if any(question[kind] and question[kind]["reliable"] for kind in ("time", "memory"))),
+        "questions": questions,
     }
 
 
-def build_submission_signal_profile(payload: Dict[str, Any]) -> Dict[str, Any]:
+SUBMISSION_COUNT_FIELDS = ("totalCount", "passedCount", "visibleTotalCount", "visiblePassedCount", "hiddenTotalCount", "hiddenPassedCount")
+
+
+def collect_batch_submission_signals(payloads: List[Dict[str, Any]]) -> tuple:
+    owners: List[int] = []
+    counts: List[List[float]] = []
+    times: List[float] = []
+    memories: List[float] = []
+    for position, payload in enumerate(payloads):
+        for question in payload.get("codingQuestions", []) or []:
+            owners.append(position)
+            counts.append([safe_number(question.get(field)) for field in SUBMISSION_COUNT_FIELDS])
+            times.append(safe_number(question.get("averageExecutionTimeMs")) if question.get("averageExecutionTimeMs") is not None else np.nan)
+            memories.append(safe_number(question.get("maxMemoryKb")) if question.get("maxMemoryKb") is not None else np.nan)
+
+    payload_count = len(payloads)
+    owner_array = np.asarray(owners, dtype=np.int64)
+    count_array = np.asarray(counts, dtype=np.float64).reshape(-1, len(SUBMISSION_COUNT_FIELDS))
+    totals = np.column_stack([
+        np.bincount(owner_array, weights=count_array[:, column], minlength=payload_count)
+        for column in range(len(SUBMISSION_COUNT_FIELDS))
+    ]) if payload_count else np.zeros((0, len(SUBMISSION_COUNT_FIELDS)))
+
+    time_array = np.asarray(times, dtype=np.float64)
+    has_time = ~np.isnan(time_array)
+    time_counts = np.bincount(owner_array[has_time], minlength=payload_count)
+    time_sums = np.bincount(owner_array[has_time], weights=time_array[has_time], minlength=payload_count)
+    avg_time_ms = np.divide(time_sums, time_counts, out=np.zeros(payload_count), where=time_counts > 0)
+
+    memory_array = np.asarray(memories, dtype=np.float64)
+    has_memory = ~np.isnan(memory_array)
+    peak_memory_kb = np.full(payload_count, -np.inf)
+    np.maximum.at(peak_memory_kb, owner_array[has_memory], memory_array[has_memory])
+    peak_memory_kb[np.bincount(owner_array[has_memory], minlength=payload_count) == 0] = 0.0
+
+    submitted_time_seconds = np.where(avg_time_ms != 0, avg_time_ms / 1000.0, T_OPT)
+    submitted_memory_mb = np.where(peak_memory_kb != 0, peak_memory_kb / 1024.0, M_OPT)
+    time_scores = calculate_s_time_array(T_OPT, submitted_time_seconds, ALPHA)
+    space_scores = calculate_s_space_array(M_OPT, submitted_memory_mb, BETA)
+    optimality_scores = calculate_overall_score_array(time_scores, space_scores, W_TIME, W_SPACE)
+
+    test_totals = [dict(zip(SUBMISSION_COUNT_FIELDS, row.tolist())) for row in totals]
+    runtime_metrics = [
+        {
+            "averageExecutionTimeMs": round(float(avg_time_ms[position]), 2) if avg_time_ms[position] else 0.0,
+            "peakMemoryKb": round(float(peak_memory_kb[position]), 2) if peak_memory_kb[position] else 0.0,
+            "optimalityScore": round(float(optimality_scores[position]), 3),
+            "timeScore": round(float(time_scores[position]), 3),
+            "spaceScore": round(float(space_scores[position]), 3),
+            "complexity": collect_complexity_signals(payloads[position].get("codingQuestions", []) or []),
+        }
+        for position in range(payload_count)
+    ]
+    return test_totals, runtime_metrics
+
+
+def build_submission_signal_profile(payload: Dict[str, Any], test_totals: Optional[Dict[str, float]] = None, runtime_metrics: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     coding_questions = payload.get("codingQuestions", []) or []
     percentage = safe_number(payload.get("percentage"))
 
@@ -256,15 +950,18 @@ def build_submission_signal_profile(payload: Dict[str, Any]) -> Dict[str, Any]:
     def add_topic(topic: str, weight: float):
         add_weighted_score(topic_scores, topic, weight)
 
-    total_tests = sum(safe_number(question.get("totalCount")) for question in coding_questions)
-    passed_tests = sum(safe_number(question.get("passedCount")) for question in coding_questions)
-    visible_total = sum(safe_number(question.get("visibleTotalCount")) for question in coding_questions)
-    visible_passed = sum(safe_number(question.get("visiblePassedCount")) for question in coding_questions)
-    hidden_total = sum(safe_number(question.get("hiddenTotalCount")) for question in coding_questions)
-    hidden_passed = sum(safe_number(question.get("hiddenPassedCount")) for question in coding_questions)
+    if test_totals is None:
+        test_totals = {field: sum(safe_number(question.get(field)) for question in coding_questions) for field in SUBMISSION_COUNT_FIELDS}
+    total_tests = test_totals["totalCount"]
+    passed_tests = test_totals["passedCount"]
+    visible_total = test_totals["visibleTotalCount"]
+    visible_passed = test_totals["visiblePassedCount"]
+    hidden_total = test_totals["hiddenTotalCount"]
+    hidden_passed = test_totals["hiddenPassedCount"]
     errors = [error for question in coding_questions for error in (question.get("errors", []) or []) if error]
     languages = dedupe([question.get("language", "") for question in coding_questions if question.get("language")])
-    runtime_metrics = collect_runtime_metrics(coding_questions)
+    if runtime_metrics is None:
+        runtime_metrics = collect_runtime_metrics(coding_questions)
 
     if total_tests > 0 and passed_tests == total_tests:
         strengths.append({
@@ -326,7 +1023,29 @@ def build_submission_signal_profile(payload: Dict[str, Any]) -> Dict[str, Any]:
             "detail": f"You attempted coding in {', '.join(languages)}, which is useful for implementation confidence.",
         })
 
-    if runtime_metrics["optimalityScore"] < 0.65:
+    complexity = runtime_metrics.get("complexity")
+    if complexity and complexity["reliableEstimates"]:
+        # Growth measured over generated input sizes says more than one run against the global T_OPT.
+        slow = [question for question in complexity["questions"] if question["exceedsTime"]]
+        heavy = [question for question in complexity["questions"] if question["exceedsSpace"]]
+        if slow:
+            weaknesses.append({
+                "title": "Time complexity",
+                "detail": f"Runtime grows as O({slow[0]['time']['class']}) with input size where O({slow[0]['expectedTime']}) is expected, so larger inputs will slow down faster than the reference solution.",
+            })
+            add_topic("time complexity optimization", 1.8)
+        if heavy:
+            weaknesses.append({
+                "title": "Space complexity",
+                "detail": f"Memory grows as O({heavy[0]['memory']['class']}) with input size where O({heavy[0]['expectedSpace']}) is expected.",
+            })
+            add_topic("memory optimization", 1.2)
+        if not slow and not heavy:
+            strengths.append({
+                "title": "Execution profile",
+                "detail": "Runtime and memory grow with input size no faster than the expected complexity.",
+            })
+    elif runtime_metrics["optimalityScore"] < 0.65:
         weaknesses.append({
             "title": "Runtime efficiency",
             "detail": "The measured execution profile is weaker than the model reference optimum, so optimization work should follow correctness fixes.",
@@ -367,62 +1086,62 @@ def extract_history_profile(payload: Dict[str, Any]) -> Dict[str, float]:
     }
 
 
-def extract_model_topic_candidates(payload: Dict[str, Any], limit: int = 12) -> List[str]:
-    if not isinstance(SOLUTIONS_DF, pd.DataFrame) or SOLUTIONS_DF.empty:
-        return []
-
+def submission_filters(payload: Dict[str, Any]) -> tuple:
     subject = normalize_text(payload.get("subject"))
-    languages = {
+    languages = frozenset(
         normalize_text(question.get("language"))
         for question in (payload.get("codingQuestions", []) or [])
         if question.get("language")
-    }
-    filtered_df = SOLUTIONS_DF.copy()
+    )
+    return subject, languages
+
+
+def memoized(memo: Optional[Dict[tuple, Any]], key: tuple, compute: Callable[[], Any]) -> Any:
+    # Batch requests share one memo so payloads with the same subject/languages/seeds reuse lookups.
+    if memo is None:
+        return compute()
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def extract_model_topic_candidates(payload: Dict[str, Any], limit: int = 12, memo: Optional[Dict[tuple, Any]] = None) -> List[str]:
+    if not isinstance(SOLUTIONS_DF, pd.DataFrame) or SOLUTIONS_DF.empty:
+        return []
 
-    if subject and "subject" in filtered_df.columns:
-        subject_mask = filtered_df["subject"].astype(str).map(normalize_text) == subject
-        if subject_mask.any():
-            filtered_df = filtered_df[subject_mask]
+    subject, languages = submission_filters(payload)
+    return list(memoized(memo, ("model_topics", subject, languages, limit), lambda: collect_model_topic_candidates(subject, languages, limit)))
 
-    for language_column in ["language", "programming_language", "lang"]:
-        if languages and language_column in filtered_df.columns:
-            language_mask = filtered_df[language_column].astype(str).map(normalize_text).isin(languages)
-            if language_mask.any():
-                filtered_df = filtered_df[language_mask]
-                break
+
+def collect_model_topic_candidates(subject: str, languages: frozenset, limit: int) -> List[str]:
+    partition = SOLUTION_PARTITIONS.select(subject, languages)
 
     candidates: List[str] = []
     for column in ["topic", "topics", "tag", "tags", "category", "categories", "title", "problem_title"]:
-        if column not in filtered_df.columns:
-            continue
-        for value in filtered_df[column].dropna().astype(str).head(40):
-            candidates.extend([part.strip() for part in re.split(r"[|,/;]", value) if part.strip()])
+        for _row, parts in partition.get(column, [])[:40]:
+            candidates.extend(candidate for candidate, _tokens in parts)
 
     return dedupe(candidates)[:limit]
 
 
-def infer_similarity_topics(seed_terms: List[str], max_items: int = 5) -> List[str]:
-    if not isinstance(SOLUTION_SIMILARITY_DF, pd.DataFrame) or SOLUTION_SIMILARITY_DF.empty:
+def infer_similarity_topics(seed_terms: List[str], max_items: int = 5, memo: Optional[Dict[tuple, Any]] = None) -> List[str]:
+    if not len(SOLUTION_NEIGHBORS):
         return []
+    return list(memoized(memo, ("similarity_topics", tuple(seed_terms), max_items), lambda: collect_similarity_topics(seed_terms, max_items)))
+
+
+def collect_similarity_topics(seed_terms: List[str], max_items: int) -> List[str]:
 
     scores: Dict[str, float] = {}
-    normalized_index = {normalize_text(label): label for label in SOLUTION_SIMILARITY_DF.index}
 
     for term in seed_terms:
         normalized = normalize_text(term)
-        label = normalized_index.get(normalized)
-        if label is None:
-            matching_labels = [
-                original for norm, original in normalized_index.items()
-                if normalized and (normalized in norm or norm in normalized)
-            ]
-            label = matching_labels[0] if matching_labels else None
-        if label is None:
+        position = SOLUTION_NEIGHBORS.find(normalized)
+        if position is None:
             continue
 
-        row = SOLUTION_SIMILARITY_DF.loc[label].sort_values(ascending=False).head(max_items + 1)
-        for related_label, related_score in row.items():
-            if normalize_text(related_label) == normalized:
+        for related_label, related_score, related_normalized in SOLUTION_NEIGHBORS.neighbors(position, max_items + 1):
+            if related_normalized == normalized:
                 continue
             resolved_label = humanize_topic_label(related_label)
             scores[resolved_label] = max(scores.get(resolved_label, 0.0), safe_number(related_score))
@@ -430,27 +1149,25 @@ def infer_similarity_topics(seed_terms: List[str], max_items: int = 5) -> List[s
     return [item[0] for item in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:max_items]]
 
 
-def build_model_score_profile(payload: Dict[str, Any], history_profile: Dict[str, float]) -> Dict[str, Any]:
+def build_model_score_profile(payload: Dict[str, Any], history_profile: Dict[str, float], memo: Optional[Dict[tuple, Any]] = None) -> Dict[str, Any]:
     score_map: Dict[str, float] = {}
     insights: List[str] = []
-    seed_topics = extract_model_topic_candidates(payload)
+    seed_topics = extract_model_topic_candidates(payload, memo=memo)
 
     for index, topic in enumerate(seed_topics):
         add_weighted_score(score_map, topic, max(0.9, 2.4 - (index * 0.12)))
 
-    for related_topic in infer_similarity_topics(seed_topics, max_items=8):
+    for related_topic in infer_similarity_topics(seed_topics, max_items=8, memo=memo):
         add_weighted_score(score_map, related_topic, 1.8)
 
     student_id = str(payload.get("studentId", "") or "").strip()
-    if isinstance(USER_SIMILARITY_DF, pd.DataFrame) and student_id and student_id in USER_SIMILARITY_DF.index:
-        similar_users = (
-            USER_SIMILARITY_DF[student_id]
-            .sort_values(ascending=False)
-            .drop(labels=[student_id], errors="ignore")
-            .head(5)
-        )
-        if not similar_users.empty:
-            mean_similarity = float(similar_users.mean())
+    if student_id and student_id in USER_NEIGHBORS.positions:
+        similar_users = [
+            score for label, score, _normalized in USER_NEIGHBORS.neighbors(USER_NEIGHBORS.positions[student_id], 6)
+            if label != student_id
+        ][:5]
+        if similar_users:
+            mean_similarity = float(np.mean(similar_users))
             for subject, average_score in history_profile.items():
                 if average_score < 75:
                     for topic in map_subject_to_topics(subject):
@@ -459,37 +1176,14 @@ def build_model_score_profile(payload: Dict[str, Any], history_profile: Dict[str
                 f"Trained similarity model contributed peer-pattern weights from {len(similar_users)} similar learners."
             )
 
-    if isinstance(USER_RATINGS_DF, pd.DataFrame) and not USER_RATINGS_DF.empty:
-        ratings_df = USER_RATINGS_DF.copy()
-        normalized_columns = {normalize_text(column): column for column in ratings_df.columns}
-
-        student_column = normalized_columns.get("student id") or normalized_columns.get("student_id") or normalized_columns.get("studentid") or normalized_columns.get("user id") or normalized_columns.get("user_id")
-        subject_column = normalized_columns.get("subject")
-        topic_column = normalized_columns.get("topic") or normalized_columns.get("topics") or normalized_columns.get("category") or normalized_columns.get("optsolutionid")
-        rating_column = normalized_columns.get("rating") or normalized_columns.get("score")
-
-        if student_column and topic_column and rating_column:
-            student_rows = ratings_df[ratings_df[student_column].astype(str) == student_id]
-            if subject_column and payload.get("subject"):
-                narrowed_rows = student_rows[
-                    student_rows[subject_column].astype(str).map(normalize_text) == normalize_text(payload.get("subject"))
-                ]
-                if not narrowed_rows.empty:
-                    student_rows = narrowed_rows
-
-            if not student_rows.empty:
-                aggregated = (
-                    student_rows.groupby(topic_column)[rating_column]
-                    .mean()
-                    .sort_values(ascending=True)
-                    .head(8)
-                )
-                max_rating = max(float(aggregated.max()), 1.0) if not aggregated.empty else 1.0
-                for topic, rating_value in aggregated.items():
-                    difficulty_gap = 1.0 - (safe_number(rating_value) / max_rating)
-                    add_weighted_score(score_map, str(topic), 2.6 + max(0.0, difficulty_gap))
-                if not aggregated.empty:
-                    insights.append("Student-specific trained ratings were used as the primary weakness signal.")
+    weakest_topics = STUDENT_TOPIC_RATINGS.weakest(student_id, payload.get("subject"), limit=8)
+    if weakest_topics:
+        rated = [rating_value for _topic, rating_value in weakest_topics if not np.isnan(rating_value)]
+        max_rating = max(max(rated), 1.0) if rated else 1.0
+        for topic, rating_value in weakest_topics:
+            difficulty_gap = 1.0 - (safe_number(rating_value) / max_rating)
+            add_weighted_score(score_map, str(topic), 2.6 + max(0.0, difficulty_gap))
+        insights.append("Student-specific trained ratings were used as the primary weakness signal.")
 
     if history_profile:
         weakest_subject = min(history_profile.items(), key=lambda item: item[1])
@@ -506,58 +1200,40 @@ def build_model_score_profile(payload: Dict[str, Any], history_profile: Dict[str
     }
 
 
-def extract_content_recommendations(payload: Dict[str, Any], seed_topics: List[str]) -> List[str]:
+def extract_content_recommendations(payload: Dict[str, Any], seed_topics: List[str], memo: Optional[Dict[tuple, Any]] = None) -> List[str]:
     if not isinstance(SOLUTIONS_DF, pd.DataFrame) or SOLUTIONS_DF.empty:
         return []
 
-    matching_df = SOLUTIONS_DF.copy()
-    subject = normalize_text(payload.get("subject"))
-    languages = {normalize_text(question.get("language")) for question in (payload.get("codingQuestions", []) or []) if question.get("language")}
-
-    if subject and "subject" in matching_df.columns:
-        filtered = matching_df[matching_df["subject"].astype(str).map(normalize_text) == subject]
-        if not filtered.empty:
-            matching_df = filtered
+    subject, languages = submission_filters(payload)
+    return list(memoized(memo, ("content", subject, languages, tuple(seed_topics)), lambda: collect_content_recommendations(subject, languages, seed_topics, memo)))
 
-    for language_column in ["language", "programming_language", "lang"]:
-        if languages and language_column in matching_df.columns:
-            filtered = matching_df[matching_df[language_column].astype(str).map(normalize_text).isin(languages)]
-            if not filtered.empty:
-                matching_df = filtered
-                break
 
-    candidate_columns = ["topic", "topics", "tag", "tags", "category", "categories", "title", "problem_title", "difficulty"]
-    scores: Dict[str, float] = {}
+def collect_content_recommendations(subject: str, languages: frozenset, seed_topics: List[str], memo: Optional[Dict[tuple, Any]] = None) -> List[str]:
     seed_tokens = set(token for topic in seed_topics for token in tokenize(topic))
+    related_topics = [humanize_topic_label(related_topic) for related_topic in infer_similarity_topics(seed_topics, memo=memo)]
+    scores = SOLUTION_PARTITIONS.content_scores(subject, languages, seed_tokens, limit=6, include=related_topics)
 
-    for column in candidate_columns:
-        if column not in matching_df.columns:
-            continue
-        for value in matching_df[column].dropna().astype(str).head(25):
-            for raw_item in re.split(r"[|,/;]", value):
-                candidate = raw_item.strip()
-                if not candidate:
-                    continue
-                overlap = len(seed_tokens.intersection(tokenize(candidate)))
-                resolved_candidate = humanize_topic_label(candidate)
-                scores[resolved_candidate] = max(scores.get(resolved_candidate, 0.0), 1.0 + (0.4 * overlap))
-
-    for related_topic in infer_similarity_topics(seed_topics):
-        resolved_related = humanize_topic_label(related_topic)
+    for resolved_related in related_topics:
         scores[resolved_related] = max(scores.get(resolved_related, 0.0), 1.1)
 
     return [item[0] for item in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:6]]
 
 
-def extract_model_insights(payload: Dict[str, Any], seed_topics: List[str], runtime_metrics: Dict[str, float], history_profile: Dict[str, float]) -> List[str]:
+def extract_model_insights(payload: Dict[str, Any], seed_topics: List[str], runtime_metrics: Dict[str, float], history_profile: Dict[str, float], memo: Optional[Dict[tuple, Any]] = None) -> List[str]:
     insights: List[str] = []
 
     if runtime_metrics.get("optimalityScore", 0) > 0:
         insights.append(
             f"Hybrid model optimality score: {runtime_metrics['optimalityScore']:.2f} using time weight {W_TIME:.2f} and space weight {W_SPACE:.2f}."
         )
+    complexity = runtime_metrics.get("complexity")
+    if complexity and complexity["timeComplexity"]:
+        insights.append(
+            f"Estimated growth across generated input sizes: time O({complexity['timeComplexity']})"
+            + (f", memory O({complexity['spaceComplexity']})." if complexity["spaceComplexity"] else ".")
+        )
 
-    content_topics = extract_content_recommendations(payload, seed_topics)
+    content_topics = extract_content_recommendations(payload, seed_topics, memo)
     if content_topics:
         insights.append(f"Content model matches for this submission include: {', '.join(content_topics[:3])}.")
 
@@ -573,10 +1249,10 @@ def extract_model_insights(payload: Dict[str, Any], seed_topics: List[str], runt
     return dedupe(insights)
 
 
-def analyze_submission(payload: Dict[str, Any]) -> Dict[str, Any]:
-    signal_profile = build_submission_signal_profile(payload)
+def analyze_submission(payload: Dict[str, Any], memo: Optional[Dict[tuple, Any]] = None, signal_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    signal_profile = signal_profile or build_submission_signal_profile(payload)
     history_profile = extract_history_profile(payload)
-    model_profile = build_model_score_profile(payload, history_profile)
+    model_profile = build_model_score_profile(payload, history_profile, memo)
 
     combined_topic_scores: Dict[str, float] = {}
     for topic, score in model_profile["topicScores"].items():
@@ -584,7 +1260,7 @@ def analyze_submission(payload: Dict[str, Any]) -> Dict[str, Any]:
     for topic, score in signal_profile["topicScores"].items():
         add_weighted_score(combined_topic_scores, topic, score * 0.18)
 
-    content_topics = extract_content_recommendations(payload, list(model_profile["seedTopics"]) or list(combined_topic_scores.keys()))
+    content_topics = extract_content_recommendations(payload, list(model_profile["seedTopics"]) or list(combined_topic_scores.keys()), memo)
     for index, topic in enumerate(content_topics):
         add_weighted_score(combined_topic_scores, topic, max(0.4, 1.0 - (index * 0.1)))
 
@@ -597,6 +1273,7 @@ def analyze_submission(payload: Dict[str, Any]) -> Dict[str, Any]:
         recommended_topics,
         signal_profile["runtimeMetrics"],
         history_profile,
+        memo,
     )
     model_insights.extend(model_profile["insights"])
     model_insights = dedupe(model_insights)
@@ -622,3 +1299,35 @@ def analyze_submission(payload: Dict[str, Any]) -> Dict[str, Any]:
         "runtimeMetrics": signal_profile["runtimeMetrics"],
         "modelDriven": MODEL_LOAD_ERROR is None,
     }
+
+
+def validate_submission_payload(payload: Any):
+    if not isinstance(payload, dict) or not payload:
+        raise ValueError("Submission must be a non-empty JSON object")
+    for field in ("codingQuestions", "studentHistory"):
+        items = payload.get(field, []) or []
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise ValueError(f"{field} must be a list of objects")
+
+
+def analyze_submissions(payloads: List[Any]) -> List[Any]:
+    """analyze_submission over many payloads; each result is a recommendation or the exception it raised"""
+    results: List[Any] = [None] * len(payloads)
+    valid_positions: List[int] = []
+    for position, payload in enumerate(payloads):
+        try:
+            validate_submission_payload(payload)
+            valid_positions.append(position)
+        except ValueError as error:
+            results[position] = error
+
+    valid_payloads = [payloads[position] for position in valid_positions]
+    test_totals, runtime_metrics = collect_batch_submission_signals(valid_payloads)
+    memo: Dict[tuple, Any] = {}
+    for index, position in enumerate(valid_positions):
+        try:
+            signal_profile = build_submission_signal_profile(valid_payloads[index], test_totals[index], runtime_metrics[index])
+            results[position] = analyze_submission(valid_payloads[index], memo=memo, signal_profile=signal_profile)
+        except Exception as error:
+            results[position] = error
+    return results
@@ -0,0 +1,237 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+NEIGHBOR_INDEX_KINDS = ("exact", "balltree")
+
+
+class ExactNeighborIndex:
+    """Cosine nearest-neighbour index that scans every stored vector"""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._ids: List[Any] = []
+        self._row_of: Dict[Any, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._initial_capacity = initial_capacity
+        self.dimensions = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, item_id: Any) -> bool:
+        return item_id in self._row_of
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float64)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _ensure_capacity(self, rows: int):
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, self._initial_capacity)
+        vectors = np.zeros((new_capacity, self.dimensions), dtype=np.float64)
+        alive = np.zeros(new_capacity, dtype=bool)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._vectors = vectors
+        self._alive = alive
+
+    def build(self, ids: Iterable[Any], vectors: np.ndarray):
+        """Replace the index contents with the given ids and vectors"""
+        ids = list(ids)
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(len(ids), -1)
+        self.dimensions = vectors.shape[1]
+        self._ids = ids
+        self._row_of = {item_id: row for row, item_id in enumerate(ids)}
+        self._vectors = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ensure_capacity(len(ids))
+        self._vectors[:len(ids)] = self._normalize(vectors)
+        self._alive[:len(ids)] = True
+        self._size = len(ids)
+
+    def upsert(self, item_id: Any, vector: np.ndarray) -> int:
+        """Insert or replace one vector; returns its row"""
+        vector = self._normalize(np.asarray(vector, dtype=np.float64).reshape(-1))
+        if self._vectors is None:
+            self.dimensions = len(vector)
+        if len(vector) != self.dimensions:
+            raise ValueError(f"Expected a {self.dimensions}-dimensional vector, got {len(vector)}")
+
+        row = self._row_of.get(item_id)
+        if row is None:
+            row = self._size
+            self._ensure_capacity(row + 1)
+            self._ids.append(item_id)
+            self._row_of[item_id] = row
+            self._size += 1
+        self._vectors[row] = vector
+        self._alive[row] = True
+        return row
+
+    def remove(self, item_id: Any) -> Optional[int]:
+        row = self._row_of.pop(item_id, None)
+        if row is not None:
+            self._alive[row] = False
+        return row
+
+    def _normalized_query(self, vector: np.ndarray) -> np.ndarray:
+        return self._normalize(np.asarray(vector, dtype=np.float64).reshape(-1))
+
+    def _top_rows(self, rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[Any, float]]:
+        if k <= 0 or len(rows) == 0:
+            return []
+        k = min(k, len(rows))
+        order = np.argpartition(-scores, k - 1)[:k]
+        order = order[np.argsort(-scores[order], kind="stable")]
+        return [(self._ids[rows[position]], float(scores[position])) for position in order]
+
+    def query(self, vector: np.ndarray, k: int = 5, exclude_id: Any = None) -> List[Tuple[Any, float]]:
+        """The k stored ids most cosine-similar to vector, best first"""
+        if self._size == 0:
+            return []
+        query_vector = self._normalized_query(vector)
+        mask = self._alive[:self._size].copy()
+        exclude_row = self._row_of.get(exclude_id) if exclude_id is not None else None
+        if exclude_row is not None:
+            mask[exclude_row] = False
+        rows = np.flatnonzero(mask)
+        scores = self._vectors[rows] @ query_vector
+        return self._top_rows(rows, scores, k)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"kind": "exact", "size": len(self), "dimensions": self.dimensions}
+
+
+class BallTreeNeighborIndex(ExactNeighborIndex):
+    """Ball tree over unit vectors with an exactly scanned buffer for recent inserts"""
+
+    # Student vectors have one dimension per exam subject, where a ball tree answers cosine
+    # queries exactly in sub-linear time: euclidean distance between unit vectors is monotonic
+    # in cosine similarity. Rows changed since the last build are served from the buffer.
+
+    def __init__(self, leaf_size: int = 40, rebuild_fraction: float = 0.1, min_rebuild_rows: int = 256, initial_capacity: int = 1024):
+        super().__init__(initial_capacity=initial_capacity)
+        self.leaf_size = leaf_size
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild_rows = min_rebuild_rows
+        self._tree = None
+        self._tree_rows = np.zeros(0, dtype=np.int64)
+        self._in_tree = np.zeros(0, dtype=bool)
+        self._stale_in_tree = 0
+        self._buffer_rows: Dict[int, None] = {}
+        self._zero_rows: Dict[int, None] = {}
+        self.rebuilds = 0
+
+    def _ensure_capacity(self, rows: int):
+        super()._ensure_capacity(rows)
+        if len(self._in_tree) < len(self._alive):
+            in_tree = np.zeros(len(self._alive), dtype=bool)
+            in_tree[:len(self._in_tree)] = self._in_tree
+            self._in_tree = in_tree
+
+    def build(self, ids: Iterable[Any], vectors: np.ndarray):
+        super().build(ids, vectors)
+        self._rebuild_tree()
+
+    def _rebuild_tree(self):
+        from sklearn.neighbors import BallTree
+
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        # Zero vectors have no direction; they score 0 against everything and are kept aside.
+        nonzero = np.any(self._vectors[alive_rows] != 0, axis=1)
+        self._tree_rows = alive_rows[nonzero]
+        self._in_tree = np.zeros(len(self._alive), dtype=bool)
+        self._in_tree[self._tree_rows] = True
+        self._tree = BallTree(self._vectors[self._tree_rows], leaf_size=self.leaf_size) if len(self._tree_rows) else None
+        self._stale_in_tree = 0
+        self._buffer_rows = {}
+        self._zero_rows = {int(row): None for row in alive_rows[~nonzero]}
+        self.rebuilds += 1
+
+    def _needs_rebuild(self) -> bool:
+        pending = self._stale_in_tree + len(self._buffer_rows)
+        return pending >= max(self.min_rebuild_rows, self.rebuild_fraction * max(len(self), 1))
+
+    def _retire_from_tree(self, row: int):
+        if self._in_tree[row]:
+            self._in_tree[row] = False
+            self._stale_in_tree += 1
+
+    def upsert(self, item_id: Any, vector: np.ndarray) -> int:
+        row = super().upsert(item_id, vector)
+        self._retire_from_tree(row)
+        self._zero_rows.pop(row, None)
+        self._buffer_rows[row] = None
+        return row
+
+    def remove(self, item_id: Any) -> Optional[int]:
+        row = super().remove(item_id)
+        if row is not None:
+            self._retire_from_tree(row)
+            self._buffer_rows.pop(row, None)
+            self._zero_rows.pop(row, None)
+        return row
+
+    def query(self, vector: np.ndarray, k: int = 5, exclude_id: Any = None) -> List[Tuple[Any, float]]:
+        if self._size == 0 or k <= 0:
+            return []
+        query_vector = self._normalized_query(vector)
+        if not np.any(query_vector):
+            # Every candidate scores 0 against a zero vector; nothing for the tree to prune.
+            return super().query(vector, k, exclude_id)
+        if self._needs_rebuild():
+            self._rebuild_tree()
+
+        exclude_row = self._row_of.get(exclude_id) if exclude_id is not None else None
+        candidate_rows = []
+
+        if self._tree is not None:
+            # Over-fetch by the number of rows the tree still holds but that are no longer current.
+            fetch = min(len(self._tree_rows), k + self._stale_in_tree + 1)
+            _distances, positions = self._tree.query(query_vector.reshape(1, -1), k=fetch)
+            tree_rows = self._tree_rows[positions[0]]
+            candidate_rows.append(tree_rows[self._in_tree[tree_rows]])
+
+        if self._buffer_rows:
+            candidate_rows.append(np.fromiter(self._buffer_rows, dtype=np.int64, count=len(self._buffer_rows)))
+
+        if self._zero_rows:
+            zero_count = min(len(self._zero_rows), k + 1)
+            candidate_rows.append(np.fromiter(self._zero_rows, dtype=np.int64, count=zero_count))
+
+        rows = np.concatenate(candidate_rows) if candidate_rows else np.zeros(0, dtype=np.int64)
+        if exclude_row is not None:
+            rows = rows[rows != exclude_row]
+        scores = self._vectors[rows] @ query_vector
+        return self._top_rows(rows, scores, k)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "kind": "balltree",
+            "size": len(self),
+            "dimensions": self.dimensions,
+            "tree_rows": int(len(self._tree_rows)),
+            "stale_tree_rows": self._stale_in_tree,
+            "buffered_rows": len(self._buffer_rows),
+            "zero_rows": len(self._zero_rows),
+            "rebuilds": self.rebuilds,
+        }
+
+
+def create_neighbor_index(kind: str) -> Optional[ExactNeighborIndex]:
+    kind = (kind or "").strip().lower()
+    if kind in ("", "none"):
+        return None
+    if kind == "exact":
+        return ExactNeighborIndex()
+    if kind == "balltree":
+        return BallTreeNeighborIndex()
+    raise ValueError(f"Unknown neighbor index '{kind}', expected one of {NEIGHBOR_INDEX_KINDS} or 'none'")
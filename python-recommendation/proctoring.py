@@ -0,0 +1,188 @@
+"""Session-scoped proctoring frame streams.
+
+Each exam session keeps a thumbnail of the last frame that went through face detection and what
+was found on it. A new frame is decoded at 1/8 scale in grayscale (libjpeg scales while decoding,
+so this is about a millisecond) and compared cell by cell with that thumbnail; only frames that
+changed, or that are due for the periodic re-check, are sent to the face inference pool.
+Detection results become events when the session's status changes.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from startup_profile import startup_profile
+
+THUMBNAIL_SIZE = (64, 48)
+THUMBNAIL_CELL = 8
+
+STATUS_OK = 'ok'
+STATUS_NO_FACE = 'no_face'
+STATUS_MULTIPLE_FACES = 'multiple_faces'
+STATUS_IDENTITY_MISMATCH = 'identity_mismatch'
+
+
+def frame_thumbnail(image_data: bytes) -> Optional[np.ndarray]:
+    """Small grayscale copy of an encoded frame in 0..1, or None when it cannot be decoded here"""
+    cv2 = startup_profile.lazy_import('cv2', 'proctoring')
+    if cv2 is None:
+        return None
+    reduced = cv2.imdecode(
+        np.frombuffer(image_data, dtype=np.uint8),
+        cv2.IMREAD_REDUCED_GRAYSCALE_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+    )
+    if reduced is None:
+        return None
+    # A fixed size keeps thumbnails comparable if the client changes resolution mid-session.
+    thumbnail = cv2.resize(reduced, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return thumbnail.astype(np.float32) / 255.0
+
+
+def frame_difference(previous: np.ndarray, current: np.ndarray) -> float:
+    """Largest mean absolute change over the thumbnail's cells, 0..1"""
+    # Per cell rather than over the whole frame, so a second face entering a corner is not
+    # averaged away by an otherwise still picture.
+    height, width = current.shape
+    cells = np.abs(current - previous).reshape(
+        height // THUMBNAIL_CELL, THUMBNAIL_CELL, width // THUMBNAIL_CELL, THUMBNAIL_CELL
+    ).mean(axis=(1, 3))
+    return float(cells.max())
+
+
+def classify_faces(face_encodings: List[Any], stored_encoding: Optional[np.ndarray], tolerance: float) -> tuple:
+    """(status, details) for the faces found on one frame"""
+    if len(face_encodings) == 0:
+        return STATUS_NO_FACE, {}
+    if len(face_encodings) > 1:
+        return STATUS_MULTIPLE_FACES, {'faces_detected': len(face_encodings)}
+    if stored_encoding is None:
+        return STATUS_OK, {'identity_checked': False}
+    face_distance = float(np.linalg.norm(np.asarray(stored_encoding, dtype=np.float64) - np.asarray(face_encodings[0], dtype=np.float64)))
+    if face_distance > tolerance:
+        return STATUS_IDENTITY_MISMATCH, {'face_distance': face_distance}
+    return STATUS_OK, {'identity_checked': True, 'face_distance': face_distance}
+
+
+class ProctoringSession:
+    """Frame-stream state of one exam session; callers hold lock while processing a frame"""
+
+    def __init__(self, session_id: str, student_id: Optional[str], max_events: int = 100):
+        self.session_id = session_id
+        self.student_id = student_id
+        self.lock = threading.Lock()
+        self.started_at = datetime.now()
+        self.last_frame_at = time.monotonic()
+        self.thumbnail: Optional[np.ndarray] = None
+        self.face_locations: List[tuple] = []
+        self.status: Optional[str] = None
+        self.frames_received = 0
+        self.frames_analyzed = 0
+        self.frames_since_analysis = 0
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self.event_counts: Dict[str, int] = {}
+
+    def needs_analysis(self, thumbnail: Optional[np.ndarray], difference_threshold: float, redetect_every: int) -> tuple:
+        """(analyze, difference) for a new frame, which is compared with the last analyzed one"""
+        self.frames_received += 1
+        self.last_frame_at = time.monotonic()
+        if thumbnail is None or self.thumbnail is None:
+            return True, None
+        difference = frame_difference(self.thumbnail, thumbnail)
+        if difference >= difference_threshold or self.frames_since_analysis + 1 >= redetect_every:
+            return True, difference
+        self.frames_since_analysis += 1
+        return False, difference
+
+    def record_analysis(self, thumbnail: Optional[np.ndarray], face_locations: List[tuple], status: str,
+                        details: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Store a detection result; returns the events it raised"""
+        self.thumbnail = thumbnail
+        self.face_locations = [tuple(int(value) for value in location) for location in face_locations]
+        self.frames_analyzed += 1
+        self.frames_since_analysis = 0
+
+        previous_status, self.status = self.status, status
+        if status == previous_status or (previous_status is None and status == STATUS_OK):
+            return []
+        event = {'type': status, 'frame': self.frames_received, 'timestamp': datetime.now().isoformat(), **details}
+        self.events.append(event)
+        self.event_counts[status] = self.event_counts.get(status, 0) + 1
+        return [event]
+
+    def get_summary(self, include_events: bool = False) -> Dict[str, Any]:
+        summary = {
+            'session_id': self.session_id,
+            'student_id': self.student_id,
+            'started_at': self.started_at.isoformat(),
+            'status': self.status,
+            'face_locations': self.face_locations,
+            'frames_received': self.frames_received,
+            'frames_analyzed': self.frames_analyzed,
+            'frames_skipped': self.frames_received - self.frames_analyzed,
+            'event_counts': dict(self.event_counts),
+        }
+        if include_events:
+            summary['events'] = list(self.events)
+        return summary
+
+
+class ProctoringSessionStore:
+    """Active sessions by id; idle ones expire and the least recently active is evicted when full"""
+
+    def __init__(self, idle_timeout_seconds: float = 900.0, max_sessions: int = 5000):
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_sessions = max_sessions
+        self._sessions: 'OrderedDict[str, ProctoringSession]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'sessions_started': 0, 'sessions_expired': 0, 'frames_received': 0, 'frames_analyzed': 0}
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.idle_timeout_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_frame_at >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.stats['sessions_expired'] += 1
+
+    def get_or_create(self, session_id: str, student_id: Optional[str] = None) -> ProctoringSession:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ProctoringSession(session_id, student_id)
+                self._sessions[session_id] = session
+                self.stats['sessions_started'] += 1
+            elif student_id and session.student_id and student_id != session.student_id:
+                raise ValueError(f"Session {session_id} belongs to another student")
+            elif student_id and not session.student_id:
+                session.student_id = student_id
+            self._sessions.move_to_end(session_id)
+            self._expire()
+            return session
+
+    def get(self, session_id: str) -> Optional[ProctoringSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def end(self, session_id: str) -> Optional[ProctoringSession]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def count_frame(self, analyzed: bool):
+        with self._lock:
+            self.stats['frames_received'] += 1
+            if analyzed:
+                self.stats['frames_analyzed'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            received = self.stats['frames_received']
+            return {
+                **self.stats,
+                'active_sessions': len(self._sessions),
+                'skip_ratio': round(1 - self.stats['frames_analyzed'] / received, 4) if received else None,
+                'idle_timeout_seconds': self.idle_timeout_seconds,
+            }
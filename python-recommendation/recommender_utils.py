@@ -1,6 +1,10 @@
+import gc
+import math
 import time
-import psutil
-import os
+import tracemalloc
+from statistics import NormalDist
+
+import numpy as np
 
 def calculate_s_time(T_opt, T_sub, alpha):
     if T_sub == 0:
@@ -15,27 +19,252 @@ def calculate_s_space(M_opt, M_sub, beta):
 def calculate_overall_score(S_time, S_space, W_time, W_space):
     return (W_time * S_time) + (W_space * S_space)
 
-def evaluate_user_code(user_function, T_opt, M_opt, alpha, beta, W_time, W_space):
-    process = psutil.Process(os.getpid())
+def calculate_s_time_array(T_opt, T_sub, alpha):
+    # Same zero rule as calculate_s_time; T_opt may be a scalar or a per-row array.
+    T_opt = np.asarray(T_opt, dtype=np.float64)
+    T_sub = np.asarray(T_sub, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        ratio = T_opt / np.where(T_sub == 0, 1.0, T_sub)
+        return np.where(T_sub == 0, np.where(T_opt > 0, 0.0, 1.0), np.minimum(1.0, ratio ** alpha))
+
+def calculate_s_space_array(M_opt, M_sub, beta):
+    M_opt = np.asarray(M_opt, dtype=np.float64)
+    M_sub = np.asarray(M_sub, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        ratio = M_opt / np.where(M_sub == 0, 1.0, M_sub)
+        return np.where(M_sub == 0, np.where(M_opt > 0, 0.0, 1.0), np.minimum(1.0, ratio ** beta))
+
+def calculate_overall_score_array(S_time, S_space, W_time, W_space):
+    return (W_time * np.asarray(S_time)) + (W_space * np.asarray(S_space))
+
+def summarize_samples(samples, confidence=0.95):
+    samples = np.sort(np.asarray(samples, dtype=np.float64))
+    n = len(samples)
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    # Distribution-free interval for the median: order statistics at the binomial(n, 1/2) quantiles,
+    # so a few slow outliers (GC, scheduler, page faults) widen it without moving it.
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(n) / 2
+    lower = max(0, int(math.floor(n / 2 - half_width)) - 1)
+    upper = min(n - 1, int(math.ceil(1 + n / 2 + half_width)) - 1)
+    return {
+        "samples": n,
+        "median": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "iqr": float(q3 - q1),
+        "min": float(samples[0]),
+        "max": float(samples[-1]),
+        "mean": float(samples.mean()),
+        "ci_low": float(samples[lower]),
+        "ci_high": float(samples[upper]),
+        "confidence": confidence,
+    }
+
+def calls_per_sample(user_function, min_sample_seconds):
+    # Very fast code is timed in batches so that one sample is well above the clock resolution.
+    number = 1
+    while number < 1000000:
+        started = time.perf_counter()
+        for _ in range(number):
+            user_function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_sample_seconds:
+            break
+        number = min(1000000, max(number * 2, int(math.ceil(number * min_sample_seconds / elapsed))) if elapsed > 0 else number * 10)
+    return number
+
+def measure_peak_allocation(user_function, repeats=3):
+    # Peak bytes allocated during one call above what was live before it. Traced separately from
+    # the timed runs, which tracemalloc would slow down several times.
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    peaks = []
+    try:
+        for _ in range(repeats):
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            user_function()
+            peaks.append(max(0, tracemalloc.get_traced_memory()[1] - baseline))
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return float(np.median(peaks))
+
+# Fewest timed samples kept when max_seconds runs out, even if that overruns the budget.
+MIN_BUDGET_SAMPLES = 3
 
-    start_time = time.perf_counter()
-    result = user_function()
-    end_time = time.perf_counter()
+def benchmark_user_code(user_function, warmup=2, repeats=15, max_repeats=60, min_sample_seconds=0.002,
+                        target_relative_ci=0.05, confidence=0.95, memory_repeats=3, max_seconds=None):
+    # max_seconds bounds the whole run: slow code skips the rest of its warmup and calibration, and
+    # sampling stops early, leaving room for the traced calls.
+    deadline = time.perf_counter() + max_seconds if max_seconds is not None else math.inf
+    result = None
+    call_seconds = None
+    for index in range(warmup):
+        started = time.perf_counter()
+        result = user_function()
+        call_seconds = time.perf_counter() - started
+        if (warmup - index + MIN_BUDGET_SAMPLES) * call_seconds > deadline - time.perf_counter():
+            break
+    # A warm call that already fills a sample needs no calibration.
+    number = 1 if call_seconds is not None and call_seconds >= min_sample_seconds else calls_per_sample(user_function, min_sample_seconds)
+
+    samples = []
+    timing = None
+    budget_exhausted = False
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        # Keep sampling past `repeats` while the median's interval is wider than target_relative_ci of it.
+        while len(samples) < max_repeats:
+            if len(samples) >= MIN_BUDGET_SAMPLES and (number + 1) * np.median(samples) > deadline - time.perf_counter():
+                budget_exhausted = True
+                break
+            started = time.perf_counter()
+            for _ in range(number):
+                result = user_function()
+            samples.append((time.perf_counter() - started) / number)
+            if len(samples) >= repeats:
+                timing = summarize_samples(samples, confidence)
+                if timing["ci_high"] - timing["ci_low"] <= target_relative_ci * timing["median"]:
+                    break
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    timing = summarize_samples(samples, confidence)
+    timing["calls_per_sample"] = number
+    timing["budget_exhausted"] = budget_exhausted
+    if max_seconds is not None:
+        memory_repeats = max(1, min(memory_repeats, int((deadline - time.perf_counter()) / max(timing["median"], 1e-12))))
+    return {
+        "result": result,
+        "time": timing,
+        "memory_bytes": measure_peak_allocation(user_function, memory_repeats),
+    }
 
-    memory_usage = process.memory_info().rss / (1024 * 1024)
+def evaluate_user_code(user_function, T_opt, M_opt, alpha, beta, W_time, W_space, **benchmark_options):
+    benchmark = benchmark_user_code(user_function, **benchmark_options)
 
-    T_sub = end_time - start_time
-    M_sub = memory_usage
+    # Median seconds per call and peak allocation in MB; code that allocates nothing counts as one byte.
+    T_sub = benchmark["time"]["median"]
+    M_sub = max(benchmark["memory_bytes"], 1.0) / (1024 * 1024)
 
     S_time = calculate_s_time(T_opt, T_sub, alpha)
     S_space = calculate_s_space(M_opt, M_sub, beta)
     OS = calculate_overall_score(S_time, S_space, W_time, W_space)
 
     return {
-        "result": result,
+        "result": benchmark["result"],
         "time": T_sub,
         "memory": M_sub,
+        "time_stats": benchmark["time"],
         "S_time": S_time,
         "S_space": S_space,
         "OS": OS
     }
+
+# Candidate growth classes, simplest first; ties in fit quality go to the simpler class.
+COMPLEXITY_CLASSES = {
+    "1": lambda n: np.ones_like(n),
+    "log n": lambda n: np.log2(n),
+    "n": lambda n: n,
+    "n log n": lambda n: n * np.log2(n),
+    "n^2": lambda n: n ** 2,
+    # Exponential growth with the base fitted from the data, so fib-like phi^n code counts too.
+    "2^n": lambda n, y: np.exp(max(np.polyfit(n[len(n) // 2:], np.log(np.maximum(y[len(n) // 2:], 1e-12)), 1)[0], 0.0) * (n - n.max())),
+}
+COMPLEXITY_RANK = {name: rank for rank, name in enumerate(COMPLEXITY_CLASSES)}
+
+def fit_complexity(sizes, values, tolerance=0.25, noise_floor=0.0, min_growth=0.5):
+    # values ~ a + b * f(n) with b >= 0 for every class, by least squares on relative errors so the
+    # small sizes count as much as the large ones. The simplest class whose RMS relative error is at
+    # most (1 + tolerance) times the best one's, plus 0.01, wins. Variation below noise_floor is constant.
+    n = np.asarray(sizes, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    if len(n) < 3:
+        return {"class": None, "r2": None, "relative_rmse": None, "fits": {}}
+    if np.ptp(y) <= noise_floor:
+        return {"class": "1", "r2": 1.0, "relative_rmse": 0.0, "fits": {}}
+    weights = 1.0 / np.maximum(y, 0.01 * y.max())
+    constant = np.sum(weights ** 2 * y) / np.sum(weights ** 2)
+    total = float(np.sum((y - y.mean()) ** 2))
+    fits = {}
+    for name, growth in COMPLEXITY_CLASSES.items():
+        predicted = np.full_like(y, constant)
+        if name != "1":
+            basis = growth(n, y) if name == "2^n" else growth(n)
+            basis = basis / basis.max()
+            design = np.column_stack([np.ones_like(n), basis])
+            coefficients = np.linalg.lstsq(design * weights[:, None], y * weights, rcond=None)[0]
+            # A curve that grows by less than min_growth over the sizes is noise around a constant.
+            growth_fit = design @ coefficients
+            if coefficients[1] > 0 and growth_fit[np.argmax(n)] >= (1 + min_growth) * growth_fit[np.argmin(n)]:
+                predicted = growth_fit
+        fits[name] = {
+            "relative_rmse": float(np.sqrt(np.mean(((y - predicted) * weights) ** 2))),
+            "r2": float(1.0 - np.sum((y - predicted) ** 2) / total),
+        }
+    best = min(fit["relative_rmse"] for fit in fits.values())
+    chosen = next(name for name, fit in fits.items() if fit["relative_rmse"] <= best * (1 + tolerance) + 0.01)
+    return {"class": chosen, **fits[chosen], "fits": {name: round(fit["relative_rmse"], 4) for name, fit in fits.items()}}
+
+def _extrapolate_seconds(sizes, seconds, next_size):
+    # Power law through the last two sizes, or exponential once growth is steeper than cubic, so the
+    # size schedule does not step off a cliff on exponential code.
+    if len(sizes) < 2 or seconds[-2] <= 0:
+        return seconds[-1] * next_size / sizes[-1]
+    ratio = max(seconds[-1] / seconds[-2], 1.0)
+    exponent = math.log(ratio) / math.log(sizes[-1] / sizes[-2])
+    if exponent <= 3:
+        return seconds[-1] * (next_size / sizes[-1]) ** max(exponent, 1.0)
+    return seconds[-1] * ratio ** ((next_size - sizes[-1]) / (sizes[-1] - sizes[-2]))
+
+def _next_size(sizes, seconds, growth):
+    if len(sizes) >= 2 and seconds[-2] > 0 and seconds[-1] / seconds[-2] > (sizes[-1] / sizes[-2]) ** 3:
+        return sizes[-1] + max(1, sizes[-1] // 8)
+    return max(sizes[-1] + 1, int(sizes[-1] * growth))
+
+COMPLEXITY_BENCHMARK_OPTIONS = {"warmup": 1, "repeats": 5, "max_repeats": 9, "min_sample_seconds": 0.001, "memory_repeats": 1}
+
+def estimate_complexity(call_at_size, sizes=None, time_budget_seconds=2.0, min_size=8, max_size=1 << 16, growth=2.0,
+                        **benchmark_options):
+    # call_at_size(n) builds an input of size n and returns a zero-argument callable that runs the
+    # submission on it. Sizes grow geometrically from min_size (or follow `sizes`) until the next one
+    # is predicted to overrun what is left of the budget.
+    options = {**COMPLEXITY_BENCHMARK_OPTIONS, **benchmark_options}
+    deadline = time.perf_counter() + time_budget_seconds
+    planned = sorted(set(sizes)) if sizes is not None else None
+    measured, seconds, memory, step_seconds = [], [], [], []
+    stopped = "max_size"
+    size = planned.pop(0) if planned else min_size
+    while size is not None:
+        # A size costs its input generation plus every benchmark call; extrapolate from the last one
+        # with half again as margin, since one noisy step is enough to overrun.
+        if measured and time.perf_counter() + 1.5 * step_seconds[-1] * _extrapolate_seconds(measured, seconds, size) / max(seconds[-1], 1e-12) > deadline:
+            stopped = "time_budget"
+            break
+        started = time.perf_counter()
+        benchmark = benchmark_user_code(call_at_size(size), **options)
+        step_seconds.append(time.perf_counter() - started)
+        measured.append(size)
+        seconds.append(benchmark["time"]["median"])
+        memory.append(benchmark["memory_bytes"])
+        if planned is not None:
+            size = planned.pop(0) if planned else None
+            stopped = "sizes"
+        else:
+            size = _next_size(measured, seconds, growth)
+            size = size if size <= max_size else None
+
+    return {
+        "sizes": measured,
+        "seconds": seconds,
+        "memory_bytes": memory,
+        "time": fit_complexity(measured, seconds),
+        "memory": fit_complexity(measured, memory, noise_floor=1024),
+        "stopped": stopped,
+        "elapsed_seconds": round(time_budget_seconds - (deadline - time.perf_counter()), 3),
+    }
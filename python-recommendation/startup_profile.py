@@ -0,0 +1,143 @@
+"""Import-time accounting for the analytics service.
+
+app.py wraps its startup phases in startup_profile.measure(), and heavy optional dependencies
+(face_recognition/dlib, OpenCV, Pillow, scikit-learn) are imported on first use through
+startup_profile.lazy_import(). Every step records wall time and the change in resident
+memory, so the startup log and /health attribute the cost to a subsystem.
+
+The budget check imports a module in a fresh interpreter and fails when it is too slow:
+
+    python startup_profile.py --module app --budget-seconds 3
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv('IMPORT_TIME_BUDGET_SECONDS', 5.0))
+
+
+class StartupProfile:
+    """Wall time and RSS per startup phase and per lazily imported dependency"""
+
+    def __init__(self):
+        self._process = psutil.Process()
+        self._started_at = time.perf_counter()
+        self._lock = threading.RLock()
+        self._modules: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self.ready_seconds: Optional[float] = None
+
+    def _rss_mb(self) -> float:
+        return self._process.memory_info().rss / (1024 * 1024)
+
+    @contextmanager
+    def measure(self, subsystem: str, phase: str = 'startup'):
+        rss_before = self._rss_mb()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {
+                'subsystem': subsystem,
+                'phase': phase,
+                'seconds': round(time.perf_counter() - started, 4),
+                'rss_delta_mb': round(self._rss_mb() - rss_before, 2),
+            }
+            with self._lock:
+                self.entries.append(entry)
+
+    def lazy_import(self, module_name: str, subsystem: str, required: bool = False) -> Optional[Any]:
+        """Import module_name on first use; None (or ImportError if required) when unavailable"""
+        module = self._modules.get(module_name)
+        if module is not None:
+            return module
+
+        with self._lock:
+            if module_name not in self._modules and module_name not in self._errors:
+                with self.measure(f"{subsystem} ({module_name})", phase='lazy'):
+                    # face_recognition calls quit() when its model package is missing.
+                    try:
+                        self._modules[module_name] = importlib.import_module(module_name)
+                    except (Exception, SystemExit) as e:
+                        self._errors[module_name] = str(e)
+                        logger.warning(f"Optional dependency {module_name} unavailable: {e}")
+
+        if module_name in self._errors:
+            if required:
+                raise ImportError(f"{module_name} is unavailable: {self._errors[module_name]}")
+            return None
+        return self._modules[module_name]
+
+    def mark_ready(self):
+        self.ready_seconds = round(time.perf_counter() - self._started_at, 4)
+        startup = [entry for entry in self.entries if entry['phase'] == 'startup']
+        breakdown = ', '.join(f"{entry['subsystem']} {entry['seconds']:.2f}s/{entry['rss_delta_mb']:+.0f}MB" for entry in startup)
+        logger.info(f"Startup finished in {self.ready_seconds:.2f}s, RSS {self._rss_mb():.0f}MB ({breakdown})")
+
+    def get_report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'ready_seconds': self.ready_seconds,
+                'rss_mb': round(self._rss_mb(), 1),
+                'entries': list(self.entries),
+                'lazy_modules_loaded': sorted(self._modules),
+                'lazy_modules_unavailable': dict(self._errors),
+            }
+
+
+startup_profile = StartupProfile()
+
+
+def measure_import(module_name: str) -> Dict[str, Any]:
+    """Import module_name in a fresh interpreter and return its wall time and startup report"""
+    script = (
+        "import json, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "seconds = time.perf_counter() - started\n"
+        "from startup_profile import startup_profile\n"
+        "print(json.dumps({'seconds': seconds, 'report': startup_profile.get_report()}))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', script],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module_name} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help='Module to import')
+    parser.add_argument('--budget-seconds', type=float, default=IMPORT_TIME_BUDGET_SECONDS)
+    parser.add_argument('--runs', type=int, default=3, help='The fastest run is compared with the budget')
+    args = parser.parse_args()
+
+    results = [measure_import(args.module) for _ in range(args.runs)]
+    best = min(results, key=lambda result: result['seconds'])
+    for entry in best['report']['entries']:
+        print(f"  {entry['subsystem']:<32} {entry['seconds']:>8.3f}s {entry['rss_delta_mb']:>+9.1f}MB")
+    print(f"import {args.module}: {best['seconds']:.3f}s (budget {args.budget_seconds:.3f}s), RSS {best['report']['rss_mb']:.0f}MB")
+
+    if best['seconds'] > args.budget_seconds:
+        raise SystemExit(f"import {args.module} took {best['seconds']:.3f}s, over the {args.budget_seconds:.3f}s budget")
+
+
+if __name__ == '__main__':
+    main()